@@ -0,0 +1,316 @@
+from timeit import default_timer as timer
+from indexer import build_index, write_impact_index, MEGABYTE
+from indexClasses.manifest import IndexManifest
+from queryProcessingClasses.queryProcess import QueryProcessor, process_query_in_worker
+from queryProcessingClasses.query_timings import TimingsSummary
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from multiprocessing import cpu_count, get_context
+from statistics import mean
+
+import argparse
+import logging
+import platform
+import resource
+import pathlib
+import json
+
+def main(my_args):
+    """
+    Builds the index if it is not there yet and replays the queries once for each ranker and evaluator.
+    Each run is done in a new process, so its peak RSS is its own
+    """
+    index_path = pathlib.Path(my_args.index_path)
+
+    build_info = None
+    if my_args.rebuild or not index_path.exists():
+        if my_args.corpus_path == None:
+            raise ValueError(f"{index_path} does not exist and no corpus was given to build it")
+        build_info = build_index(my_args.corpus_path, index_path, my_args.memory_limit, my_args.store_positions)
+
+    with open(my_args.queries_path, 'r') as queries_file:
+        queries_list = [query.strip() for query in queries_file if query.strip() != ""]
+    if my_args.max_queries > 0:
+        queries_list = queries_list[:my_args.max_queries]
+
+    runs = list()
+    for ranker in my_args.rankers:
+        for evaluator in my_args.evaluators:
+            settings = {
+                'index_file_path': index_path,
+                'scoring_method': ranker,
+                'evaluator': evaluator,
+                'query_mode': my_args.query_mode,
+                'posting_list_cache_bytes': my_args.cache_mb * MEGABYTE,
+                'result_cache_size': my_args.result_cache_size,
+                'collect_timings': True,
+                'use_shards': my_args.use_shards,
+                'stream_postings': my_args.stream_postings
+            }
+            if evaluator == 'SAAT':
+                settings['impact_index_file_path'] = get_impact_index(index_path, ranker)
+
+            logging.info(f"Benchmarking {ranker}/{evaluator}")
+            with ProcessPoolExecutor(1, mp_context=get_context('spawn')) as run_executor:
+                runs.append(run_executor.submit(run_benchmark, settings, queries_list, my_args.concurrency,
+                                                my_args.num_processes, my_args.warmup_passes).result())
+
+    report = dict()
+    report['Index'] = str(index_path)
+    report['Index Size'] = index_path.stat().st_size / MEGABYTE
+    report['Build'] = build_info
+    report['Manifest'] = get_manifest_of(index_path)
+    report['Queries'] = len(queries_list)
+    report['Concurrency'] = my_args.concurrency
+    report['Processes'] = my_args.num_processes
+    report['CPUs'] = cpu_count()
+    report['Python'] = platform.python_version()
+    report['Runs'] = runs
+
+    report_json = json.dumps(report, indent=4, ensure_ascii=False)
+    if my_args.output_path != None:
+        with open(my_args.output_path, 'w') as output_file:
+            output_file.write(report_json)
+    print(report_json)
+
+def get_manifest_of(index_path:pathlib.Path) -> dict:
+    manifest_file = index_path.with_suffix('.manifest')
+    if not manifest_file.exists():
+        return None
+
+    manifest = IndexManifest()
+    manifest.load_from(manifest_file)
+    return manifest.as_dict()
+
+def get_impact_index(index_path:pathlib.Path, ranker:str) -> pathlib.Path:
+    """
+    SAAT needs an impact index of the ranker being benchmarked. One is kept for each ranker next to the index
+    """
+    impact_index_path = index_path.with_suffix(f'.{ranker}.impact')
+    if not impact_index_path.exists():
+        write_impact_index(index_path, ranker, impact_index_path)
+
+    return impact_index_path
+
+def run_benchmark(settings:dict, queries_list:list, concurrency:int, num_processes:int, warmup_passes:int) -> dict:
+    """
+    Answers queries_list warmup_passes times and then once more with concurrency clients, each waiting for its
+    answer before sending the next query. With num_processes the queries are answered by a process pool
+    """
+    query_processor = QueryProcessor.from_settings(settings)
+    query_processor.num_processes = num_processes
+    query_processor.load()
+
+    process_pool = query_processor.make_process_pool() if num_processes > 0 else None
+    if process_pool != None:
+        answer_query = lambda query: process_pool.submit(process_query_in_worker, query).result()
+    else:
+        answer_query = query_processor.process_query
+
+    def timed_answer_query(query:str) -> tuple:
+        query_start = timer()
+        query_result = answer_query(query)
+        return timer() - query_start, query_result
+
+    try:
+        with ThreadPoolExecutor(concurrency) as clients:
+            for _ in range(warmup_passes):
+                list(clients.map(answer_query, queries_list))
+
+            run_start = timer()
+            timed_results = list(clients.map(timed_answer_query, queries_list))
+            elapsed_time = timer() - run_start
+    finally:
+        if process_pool != None:
+            process_pool.shutdown()
+        query_processor.close()
+
+    ranker = f"{settings['scoring_method']}/{settings['evaluator']}"
+    latencies_ms = [latency * 1000 for latency, _ in timed_results]
+    timings_summary = TimingsSummary()
+    timings_summary.add_results(ranker, [query_result for _, query_result in timed_results])
+
+    run_info = dict()
+    run_info['Ranker'] = settings['scoring_method']
+    run_info['Evaluator'] = settings['evaluator']
+    run_info['Elapsed Time'] = elapsed_time
+    run_info['QPS'] = len(queries_list) / elapsed_time if elapsed_time > 0 else 0
+    run_info['Latency ms'] = dict(zip(('p50', 'p95', 'p99'),
+                                    TimingsSummary.get_percentiles(latencies_ms, TimingsSummary.PERCENTILES)))
+    run_info['Latency ms']['mean'] = mean(latencies_ms)
+    run_info['Latency ms']['max'] = max(latencies_ms)
+    run_info['Stages'] = timings_summary.get_summary().get(ranker, dict())
+    run_info['Peak RSS MB'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    run_info['Peak Worker RSS MB'] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    run_info['Posting List Cache'] = query_processor.posting_list_cache.get_stats()
+
+    return run_info
+
+def configArgs(parser):
+    parser.add_argument(
+        '-i',
+        dest='index_path',
+        action='store',
+        required=True,
+        help='path of the index file. It is built from the corpus if it does not exist'
+    )
+
+    parser.add_argument(
+        '-c',
+        dest='corpus_path',
+        action='store',
+        required=False,
+        default=None,
+        help='path to the corpus files directory the index is built from'
+    )
+
+    parser.add_argument(
+        '-m',
+        dest='memory_limit',
+        action='store',
+        type=int,
+        default=1024,
+        help='memory available in MB when building the index'
+    )
+
+    parser.add_argument(
+        '-p',
+        dest='store_positions',
+        action='store_true',
+        help='store the positions of the tokens when building the index, so PHRASE queries can be benchmarked'
+    )
+
+    parser.add_argument(
+        '--rebuild',
+        dest='rebuild',
+        action='store_true',
+        help='build the index even if it exists'
+    )
+
+    parser.add_argument(
+        '-q',
+        dest='queries_path',
+        action='store',
+        required=True,
+        help='path to the query log, one query per line'
+    )
+
+    parser.add_argument(
+        '-n',
+        dest='max_queries',
+        action='store',
+        type=int,
+        default=0,
+        help='replay only the first n queries of the log. 0 replays all of them'
+    )
+
+    parser.add_argument(
+        '-r',
+        dest='rankers',
+        action='store',
+        nargs='+',
+        choices=QueryProcessor.SCORING_METHODS,
+        default=list(QueryProcessor.SCORING_METHODS),
+        help='the rankers benchmarked'
+    )
+
+    parser.add_argument(
+        '-e',
+        dest='evaluators',
+        action='store',
+        nargs='+',
+        choices=QueryProcessor.EVALUATORS,
+        default=list(QueryProcessor.EVALUATORS),
+        help='the evaluators benchmarked. An impact index is written for each ranker benchmarked with SAAT'
+    )
+
+    parser.add_argument(
+        '--mode',
+        dest='query_mode',
+        action='store',
+        choices=QueryProcessor.QUERY_MODES,
+        default='DISJUNCTIVE',
+        help='how queries are read'
+    )
+
+    parser.add_argument(
+        '-k',
+        dest='concurrency',
+        action='store',
+        type=int,
+        default=1,
+        help='how many clients send queries at the same time'
+    )
+
+    parser.add_argument(
+        '-w',
+        dest='num_processes',
+        action='store',
+        type=int,
+        default=0,
+        help='answer the queries with this many worker processes instead of threads'
+    )
+
+    parser.add_argument(
+        '-s',
+        dest='use_shards',
+        action='store_true',
+        help='answer the queries with the shards of the index, written by the indexer with --shards'
+    )
+
+    parser.add_argument(
+        '--stream-postings',
+        dest='stream_postings',
+        action='store_true',
+        help=f'release the pages of the inverted lists already walked, so the peak RSS does not grow with their length. Only available with -e {" ".join(QueryProcessor.STREAMING_EVALUATORS)}'
+    )
+
+    parser.add_argument(
+        '--warmup',
+        dest='warmup_passes',
+        action='store',
+        type=int,
+        default=1,
+        help='how many times the queries are answered before measuring, filling the page and posting list caches'
+    )
+
+    parser.add_argument(
+        '--cache-mb',
+        dest='cache_mb',
+        action='store',
+        type=int,
+        default=QueryProcessor.POSTING_LIST_CACHE_BYTES // MEGABYTE,
+        help='megabytes of decoded inverted lists kept in memory between queries. Only used by indexes without a lexicon, the lists of a binary index are memory mapped. 0 disables the cache'
+    )
+
+    parser.add_argument(
+        '--result-cache',
+        dest='result_cache_size',
+        action='store',
+        type=int,
+        default=0,
+        help='how many query results are kept. Disabled by default, so repeated queries are evaluated again'
+    )
+
+    parser.add_argument(
+        '-o',
+        dest='output_path',
+        action='store',
+        required=False,
+        default=None,
+        help='also write the JSON report to this file'
+    )
+    return parser
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Measures the throughput and latency of the query processor.')
+    parser = configArgs(parser)
+    logging.basicConfig(level=logging.INFO, format='%(process)d-%(processName)s-%(levelname)s-%(message)s',
+    filename="benchmark.log", filemode="w")
+
+    my_args = parser.parse_args()
+    if my_args.concurrency < 1:
+        parser.error("-k should be at least 1")
+    if my_args.stream_postings and not set(my_args.evaluators).issubset(QueryProcessor.STREAMING_EVALUATORS):
+        parser.error(f"--stream-postings is only available with -e {' '.join(QueryProcessor.STREAMING_EVALUATORS)}")
+
+    main(my_args)
@@ -0,0 +1,488 @@
+from indexClasses.doc_table import encode_varint, decode_varint
+from array import array
+from bisect import bisect_left
+from functools import partial
+import pathlib
+import mmap
+
+def encode_positions(positions:list) -> bytes:
+    """
+    Encodes the sorted positions of a token in a doc as varints of the gaps between them
+    """
+    encoded = bytearray()
+    previous_position = 0
+    for position in positions:
+        encoded += encode_varint(position - previous_position)
+        previous_position = position
+    return bytes(encoded)
+
+def decode_positions(buffer) -> list:
+    positions = list()
+    pos = 0
+    position = 0
+    while pos < len(buffer):
+        gap, pos = decode_varint(buffer, pos)
+        position += gap
+        positions.append(position)
+    return positions
+
+class PostingList():
+    """
+    The doc ids and frequencies of an inverted list as two parallel sequences.
+    Built over a memory mapped index, no Python object is created per posting until it is read.
+    The postings are split in blocks of BLOCK_SIZE. For each block the last doc id and the highest frequency are kept.
+    Positional lists also keep the encoded positions of every posting, one after the other, and where each one starts
+    """
+
+    BLOCK_SIZE = 128
+
+    def __init__(self, doc_ids, frequencies, block_last_doc_ids = None, block_max_frequencies = None, 
+                    positions_offsets = None, positions = None):
+        if len(doc_ids) != len(frequencies):
+            raise ValueError("doc_ids and frequencies should have the same length")
+
+        self._doc_ids = doc_ids
+        self._frequencies = frequencies
+        self._max_frequency = None
+        self._collection_df = len(doc_ids)
+        self._pages_releaser = None
+
+        if block_last_doc_ids == None or block_max_frequencies == None:
+            block_last_doc_ids, block_max_frequencies = self._get_blocks_info()
+        self._block_last_doc_ids = block_last_doc_ids
+        self._block_max_frequencies = block_max_frequencies
+
+        if positions_offsets != None and len(positions_offsets) != len(doc_ids) + 1:
+            raise ValueError("positions_offsets should have one more item than doc_ids")
+        self._positions_offsets = positions_offsets
+        self._positions = positions
+
+    @property
+    def doc_ids(self):
+        """
+        The sorted doc ids of the inverted list
+        """
+        return self._doc_ids
+
+    @doc_ids.setter
+    def doc_ids(self, new_doc_ids):
+        raise AttributeError("doc_ids is not writable")
+
+    @property
+    def frequencies(self):
+        """
+        The frequency of the token in each doc of doc_ids
+        """
+        return self._frequencies
+
+    @frequencies.setter
+    def frequencies(self, new_frequencies):
+        raise AttributeError("frequencies is not writable")
+
+    @property
+    def block_last_doc_ids(self):
+        """
+        The last doc id of each block of postings
+        """
+        return self._block_last_doc_ids
+
+    @block_last_doc_ids.setter
+    def block_last_doc_ids(self, new_block_last_doc_ids):
+        raise AttributeError("block_last_doc_ids is not writable")
+
+    @property
+    def block_max_frequencies(self):
+        """
+        The highest frequency of each block of postings
+        """
+        return self._block_max_frequencies
+
+    @block_max_frequencies.setter
+    def block_max_frequencies(self, new_block_max_frequencies):
+        raise AttributeError("block_max_frequencies is not writable")
+
+    @property
+    def num_blocks(self):
+        """
+        The number of blocks of postings
+        """
+        return len(self._block_last_doc_ids)
+
+    @property
+    def positions_offsets(self):
+        """
+        Where the encoded positions of each posting start in positions. None if the list has no positions
+        """
+        return self._positions_offsets
+
+    @positions_offsets.setter
+    def positions_offsets(self, new_positions_offsets):
+        raise AttributeError("positions_offsets is not writable")
+
+    @property
+    def positions(self):
+        """
+        The encoded positions of all postings. None if the list has no positions
+        """
+        return self._positions
+
+    @positions.setter
+    def positions(self, new_positions):
+        raise AttributeError("positions is not writable")
+
+    @property
+    def has_positions(self):
+        """
+        If the positions of the token in each doc are known
+        """
+        return self._positions_offsets != None
+
+    @has_positions.setter
+    def has_positions(self, new_has_positions):
+        raise AttributeError("has_positions is not writable")
+
+    @property
+    def max_frequency(self):
+        """
+        The highest frequency in the inverted list
+        """
+        if self._max_frequency == None:
+            self._max_frequency = max(self._block_max_frequencies, default=0)
+        return self._max_frequency
+
+    @max_frequency.setter
+    def max_frequency(self, new_max_frequency):
+        raise AttributeError("max_frequency is not writable")
+
+    @property
+    def collection_df(self):
+        """
+        The number of docs with the token in the whole collection, used by the idf. The same as len, unless the list
+        is the part of a shard
+        """
+        return self._collection_df
+
+    @collection_df.setter
+    def collection_df(self, new_collection_df:int):
+        if type(new_collection_df) != int:
+            raise TypeError("new_collection_df should be an int!")
+        if new_collection_df < len(self._doc_ids):
+            raise ValueError("new_collection_df should not be smaller than the list")
+
+        self._collection_df = new_collection_df
+
+    @property
+    def pages_releaser(self):
+        """
+        Called with (start, end) by release_pages. Set by the BinaryIndexReader of a memory mapped list, None otherwise
+        """
+        return self._pages_releaser
+
+    @pages_releaser.setter
+    def pages_releaser(self, new_pages_releaser):
+        if new_pages_releaser != None and not callable(new_pages_releaser):
+            raise TypeError("new_pages_releaser should be callable or None")
+
+        self._pages_releaser = new_pages_releaser
+
+    @property
+    def num_bytes(self):
+        """
+        The bytes taken by the sequences of the list
+        """
+        sequences = (self._doc_ids, self._frequencies, self._block_last_doc_ids, self._block_max_frequencies,
+                        self._positions_offsets, self._positions)
+        return sum(memoryview(sequence).nbytes for sequence in sequences if sequence != None)
+
+    @num_bytes.setter
+    def num_bytes(self, new_num_bytes):
+        raise AttributeError("num_bytes is not writable")
+
+    def __len__(self):
+        return len(self._doc_ids)
+
+    def __getitem__(self, idx:int) -> tuple:
+        return (self._doc_ids[idx], self._frequencies[idx])
+
+    def _get_blocks_info(self) -> tuple:
+        block_last_doc_ids = array(BinaryIndexWriter.ITEM_TYPE)
+        block_max_frequencies = array(BinaryIndexWriter.ITEM_TYPE)
+        for block_start in range(0, len(self._doc_ids), PostingList.BLOCK_SIZE):
+            block_end = min(block_start + PostingList.BLOCK_SIZE, len(self._doc_ids))
+            block_last_doc_ids.append(self._doc_ids[block_end - 1])
+            block_max_frequencies.append(max(self._frequencies[block_start:block_end]))
+        
+        return block_last_doc_ids, block_max_frequencies
+
+    def get_encoded_positions_of(self, idx:int):
+        return self._positions[self._positions_offsets[idx]:self._positions_offsets[idx + 1]]
+
+    def positions_of(self, idx:int) -> list:
+        """
+        The sorted positions of the token in the doc of the idx-th posting
+        """
+        if not self.has_positions:
+            raise ValueError("the inverted list has no positions")
+        return decode_positions(self.get_encoded_positions_of(idx))
+
+    def get_block_of(self, pos:int) -> int:
+        return pos // PostingList.BLOCK_SIZE
+
+    def release_pages(self, start:int, end:int):
+        """
+        Tells that the postings from start to end - 1 will not be read again by whoever is walking the list, so
+        the memory mapped pages holding only them can leave the process. Does nothing for lists not memory mapped
+        """
+        if self._pages_releaser != None:
+            self._pages_releaser(start, end)
+
+    @classmethod
+    def get_num_blocks_for(cls, df:int) -> int:
+        return (df + PostingList.BLOCK_SIZE - 1) // PostingList.BLOCK_SIZE
+
+    def as_tuples(self) -> list:
+        if self.has_positions:
+            return [(doc_id, frequency, bytes(self.get_encoded_positions_of(idx))) 
+                        for idx, (doc_id, frequency) in enumerate(zip(self._doc_ids, self._frequencies))]
+        return list(zip(self._doc_ids, self._frequencies))
+
+    @classmethod
+    def from_tuples(cls, postings:list):
+        """
+        postings are (doc_id, frequency) or, for positional lists, (doc_id, frequency, encoded positions) tuples
+        """
+        doc_ids = array(BinaryIndexWriter.ITEM_TYPE, (posting[0] for posting in postings))
+        frequencies = array(BinaryIndexWriter.ITEM_TYPE, (posting[1] for posting in postings))
+        if len(postings) == 0 or len(postings[0]) < 3:
+            return PostingList(doc_ids, frequencies)
+
+        positions_offsets = array(BinaryIndexWriter.ITEM_TYPE, [0])
+        positions = bytearray()
+        for posting in postings:
+            positions += posting[2]
+            positions_offsets.append(len(positions))
+        return PostingList(doc_ids, frequencies, positions_offsets=positions_offsets, positions=bytes(positions))
+
+class PostingCursor():
+    """
+    Moves forward over a PostingList. The last doc id of each block works as a skip pointer, so next_geq only
+    searches inside the block that may hold the doc. doc is END_OF_LIST after the last posting.
+    With release_consumed_pages, every RELEASE_CHUNK_SIZE postings moved past are released from the list, so walking
+    a memory mapped list keeps about a chunk of it in the process, however long the list is
+    """
+
+    END_OF_LIST = 2**32
+    RELEASE_CHUNK_SIZE = 16384
+
+    def __init__(self, posting_list:PostingList, release_consumed_pages:bool = False):
+        self._posting_list = posting_list
+        self._doc_ids = posting_list.doc_ids
+        self._frequencies = posting_list.frequencies
+        self._num_postings = len(posting_list)
+        self._pos = 0
+        self._released_pos = 0
+        self._next_release_pos = PostingCursor.END_OF_LIST
+        if release_consumed_pages:
+            self._next_release_pos = min(PostingCursor.RELEASE_CHUNK_SIZE, self._num_postings)
+
+    @property
+    def posting_list(self):
+        """
+        The PostingList being iterated
+        """
+        return self._posting_list
+
+    @posting_list.setter
+    def posting_list(self, new_posting_list):
+        raise AttributeError("posting_list is not writable")
+
+    @property
+    def doc(self):
+        """
+        The doc id of the current posting or END_OF_LIST
+        """
+        if self._pos < self._num_postings:
+            return self._doc_ids[self._pos]
+        return PostingCursor.END_OF_LIST
+
+    @doc.setter
+    def doc(self, new_doc):
+        raise AttributeError("doc is not writable")
+
+    @property
+    def freq(self):
+        """
+        The frequency of the current posting
+        """
+        return self._frequencies[self._pos]
+
+    @freq.setter
+    def freq(self, new_freq):
+        raise AttributeError("freq is not writable")
+
+    @property
+    def positions(self):
+        """
+        The decoded positions of the current posting
+        """
+        return self._posting_list.positions_of(self._pos)
+
+    @positions.setter
+    def positions(self, new_positions):
+        raise AttributeError("positions is not writable")
+
+    def is_exhausted(self) -> bool:
+        return self._pos >= self._num_postings
+
+    def next(self) -> int:
+        """
+        Moves to the next posting and returns its doc id
+        """
+        if self._pos < self._num_postings:
+            self._pos += 1
+            if self._pos >= self._next_release_pos:
+                self._release_consumed_pages()
+        if self._pos < self._num_postings:
+            return self._doc_ids[self._pos]
+        return PostingCursor.END_OF_LIST
+
+    def next_geq(self, doc_id:int) -> int:
+        """
+        Moves to the first posting with a doc id not smaller than doc_id and returns its doc id
+        """
+        if self.doc >= doc_id:
+            return self.doc
+
+        block = self.find_block_of(doc_id)
+        if block >= self._posting_list.num_blocks:
+            self._pos = self._num_postings
+        else:
+            block_start = max(self._pos, block * PostingList.BLOCK_SIZE)
+            block_end = min((block + 1) * PostingList.BLOCK_SIZE, self._num_postings)
+            self._pos = bisect_left(self._doc_ids, doc_id, block_start, block_end)
+
+        if self._pos >= self._next_release_pos:
+            self._release_consumed_pages()
+        return self.doc
+
+    def find_block_of(self, doc_id:int) -> int:
+        """
+        Returns the block, from the current one on, that would hold doc_id without moving the cursor.
+        Returns the number of blocks if doc_id is after the last posting
+        """
+        return bisect_left(self._posting_list.block_last_doc_ids, doc_id, self._posting_list.get_block_of(self._pos))
+
+    def _release_consumed_pages(self):
+        if self._pos > self._released_pos:
+            self._posting_list.release_pages(self._released_pos, self._pos)
+            self._released_pos = self._pos
+        if self._pos < self._num_postings:
+            self._next_release_pos = min(self._pos + PostingCursor.RELEASE_CHUNK_SIZE, self._num_postings)
+        else:
+            self._next_release_pos = PostingCursor.END_OF_LIST
+
+class BinaryIndexWriter():
+    """
+    Writes inverted lists as contiguous runs of fixed width unsigned ints:
+    all the doc ids, all the frequencies, the last doc id of each block and the highest frequency of each block.
+    Positional lists are followed by the offset where the positions of each posting start and the encoded positions
+    """
+
+    ITEM_TYPE = 'I'
+    ITEM_SIZE = array(ITEM_TYPE).itemsize
+
+    def write_postings(self, index_file, postings:list) -> tuple:
+        """
+        Writes the postings at the current position of index_file. Returns the (offset, length) written
+        """
+        postings_offset = index_file.tell()
+
+        posting_list = PostingList.from_tuples(postings)
+        posting_list.doc_ids.tofile(index_file)
+        posting_list.frequencies.tofile(index_file)
+        posting_list.block_last_doc_ids.tofile(index_file)
+        posting_list.block_max_frequencies.tofile(index_file)
+        if posting_list.has_positions:
+            posting_list.positions_offsets.tofile(index_file)
+            index_file.write(posting_list.positions)
+
+        return postings_offset, index_file.tell() - postings_offset
+
+class BinaryIndexReader():
+    """
+    Memory maps a binary index file so inverted lists are read straight from the page cache.
+    The pages of a list can be released back, see PostingList.release_pages
+    """
+
+    def __init__(self, file:str):
+        self._file_path = pathlib.Path(file)
+        self._file = open(self._file_path, 'rb')
+        self._mmap = None
+        self._view = memoryview(b'')
+        if self._file_path.stat().st_size > 0:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._view = memoryview(self._mmap)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_postings(self, offset:int, df:int, length:int = None) -> PostingList:
+        """
+        length is the one written for the list. When it goes past the block maxima the list has positions
+        """
+        item_size = BinaryIndexWriter.ITEM_SIZE
+        num_blocks = PostingList.get_num_blocks_for(df)
+        doc_ids_end = offset + df * item_size
+        frequencies_end = doc_ids_end + df * item_size
+        block_last_doc_ids_end = frequencies_end + num_blocks * item_size
+        block_max_frequencies_end = block_last_doc_ids_end + num_blocks * item_size
+
+        doc_ids = self._view[offset:doc_ids_end].cast(BinaryIndexWriter.ITEM_TYPE)
+        frequencies = self._view[doc_ids_end:frequencies_end].cast(BinaryIndexWriter.ITEM_TYPE)
+        block_last_doc_ids = self._view[frequencies_end:block_last_doc_ids_end].cast(BinaryIndexWriter.ITEM_TYPE)
+        block_max_frequencies = self._view[block_last_doc_ids_end:block_max_frequencies_end].cast(BinaryIndexWriter.ITEM_TYPE)
+        if length == None or offset + length <= block_max_frequencies_end:
+            posting_list = PostingList(doc_ids, frequencies, block_last_doc_ids, block_max_frequencies)
+        else:
+            positions_offsets_end = block_max_frequencies_end + (df + 1) * item_size
+            positions_offsets = self._view[block_max_frequencies_end:positions_offsets_end].cast(BinaryIndexWriter.ITEM_TYPE)
+            positions = self._view[positions_offsets_end:offset + length]
+            posting_list = PostingList(doc_ids, frequencies, block_last_doc_ids, block_max_frequencies, 
+                                        positions_offsets, positions)
+
+        if self._mmap != None and hasattr(mmap, 'MADV_DONTNEED'):
+            posting_list.pages_releaser = partial(self._release_pages_of, offset, df)
+        return posting_list
+
+    def _release_pages_of(self, offset:int, df:int, start:int, end:int):
+        """
+        Unmaps from this process the whole pages holding only doc ids and frequencies of postings start to end - 1
+        of the list at offset. The mapping is read only and shared, so the pages stay in the page cache and are
+        mapped again if the list is read again
+        """
+        if self._mmap == None:
+            return
+
+        item_size = BinaryIndexWriter.ITEM_SIZE
+        for sequence_offset in (offset, offset + df * item_size):
+            first_page_start = -(-(sequence_offset + start * item_size) // mmap.PAGESIZE) * mmap.PAGESIZE
+            last_page_end = (sequence_offset + end * item_size) // mmap.PAGESIZE * mmap.PAGESIZE
+            if last_page_end > first_page_start:
+                self._mmap.madvise(mmap.MADV_DONTNEED, first_page_start, last_page_end - first_page_start)
+
+    def close(self):
+        """
+        The mapping can only be closed when no PostingList read from it is left. Otherwise it is unmapped when the
+        last of them is dropped
+        """
+        self._view.release()
+        if self._mmap != None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass
+        self._mmap = None
+        self._file.close()
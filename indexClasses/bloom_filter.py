@@ -0,0 +1,80 @@
+from array import array
+from hashlib import blake2b
+from math import ceil, log
+
+class BloomFilter():
+    """
+    Set of str with no false negatives and false positives at about the rate it was sized for.
+    Each key is hashed once and the num_hashes bit positions are derived from the two halves of the hash
+    """
+
+    HEADER_TYPE = 'Q'
+
+    def __init__(self, num_bits:int = 8, num_hashes:int = 1):
+        if type(num_bits) != int or type(num_hashes) != int:
+            raise TypeError("num_bits and num_hashes should be ints")
+        if num_bits < 1 or num_hashes < 1:
+            raise ValueError("num_bits and num_hashes should be at least 1")
+
+        self._num_bits = num_bits
+        self._num_hashes = num_hashes
+        self._bits = bytearray((num_bits + 7) // 8)
+
+    @property
+    def num_bits(self):
+        """
+        The size of the bit array
+        """
+        return self._num_bits
+
+    @num_bits.setter
+    def num_bits(self, new_num_bits):
+        raise AttributeError("num_bits is not writable")
+
+    @property
+    def num_hashes(self):
+        """
+        How many bits each key sets
+        """
+        return self._num_hashes
+
+    @num_hashes.setter
+    def num_hashes(self, new_num_hashes):
+        raise AttributeError("num_hashes is not writable")
+
+    @classmethod
+    def for_capacity(cls, capacity:int, false_positive_rate:float = 0.01):
+        """
+        The smallest filter with false_positive_rate after capacity keys are added
+        """
+        capacity = max(1, capacity)
+        num_bits = max(8, ceil(-capacity * log(false_positive_rate) / log(2)**2))
+        num_hashes = max(1, round(num_bits / capacity * log(2)))
+        return BloomFilter(num_bits, num_hashes)
+
+    def add(self, key:str):
+        for bit in self._get_bits_of(key):
+            self._bits[bit >> 3] |= 1 << (bit & 7)
+
+    def __contains__(self, key:str) -> bool:
+        return all(self._bits[bit >> 3] & (1 << (bit & 7)) for bit in self._get_bits_of(key))
+
+    def _get_bits_of(self, key:str):
+        key_hash = blake2b(key.encode('utf-8'), digest_size=16).digest()
+        first_hash = int.from_bytes(key_hash[:8], 'little')
+        second_hash = int.from_bytes(key_hash[8:], 'little') | 1
+        return ((first_hash + hash_idx * second_hash) % self._num_bits for hash_idx in range(self._num_hashes))
+
+    def save_to(self, file:str):
+        with open(file, 'wb') as bloom_filter_file:
+            array(BloomFilter.HEADER_TYPE, [self._num_bits, self._num_hashes]).tofile(bloom_filter_file)
+            bloom_filter_file.write(self._bits)
+
+    def load_from(self, file:str):
+        header = array(BloomFilter.HEADER_TYPE)
+        with open(file, 'rb') as bloom_filter_file:
+            header.fromfile(bloom_filter_file, 2)
+            bits = bytearray(bloom_filter_file.read())
+
+        self._num_bits, self._num_hashes = header
+        self._bits = bits
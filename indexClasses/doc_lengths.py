@@ -0,0 +1,136 @@
+from array import array
+
+class DocLengthTable():
+    """
+    Number of tokens of each document, stored in an array indexed by doc id.
+    The number of documents and the sum of all lengths are kept so the average length costs nothing
+    """
+
+    LENGTH_TYPE = 'I'
+    HEADER_TYPE = 'Q'
+
+    def __init__(self):
+        self._lengths = array(DocLengthTable.LENGTH_TYPE)
+        self._num_docs = 0
+        self._total_length = 0
+        self._min_length = 0
+
+    @property
+    def num_docs(self):
+        """
+        The number of documents with a length in the table
+        """
+        return self._num_docs
+
+    @num_docs.setter
+    def num_docs(self, new_num_docs):
+        raise AttributeError("num_docs is not writable")
+
+    @property
+    def total_length(self):
+        """
+        The sum of the lengths of all documents
+        """
+        return self._total_length
+
+    @total_length.setter
+    def total_length(self, new_total_length):
+        raise AttributeError("total_length is not writable")
+
+    @property
+    def min_length(self):
+        """
+        The smallest length of a non empty document
+        """
+        return self._min_length
+
+    @min_length.setter
+    def min_length(self, new_min_length):
+        raise AttributeError("min_length is not writable")
+
+    @property
+    def lengths(self):
+        """
+        The array of lengths indexed by doc id
+        """
+        return self._lengths
+
+    @lengths.setter
+    def lengths(self, new_lengths):
+        raise AttributeError("lengths is not writable")
+
+    @property
+    def average_length(self):
+        """
+        The average document length
+        """
+        if self._num_docs == 0:
+            return 0
+        return self._total_length/self._num_docs
+
+    @average_length.setter
+    def average_length(self, new_average_length):
+        raise AttributeError("average_length is not writable")
+
+    def add(self, doc_id:int, length:int):
+        if doc_id >= len(self._lengths):
+            self._lengths.extend([0] * (doc_id + 1 - len(self._lengths)))
+
+        self._lengths[doc_id] = length
+        self._num_docs += 1
+        self._total_length += length
+        if length > 0 and (self._min_length == 0 or length < self._min_length):
+            self._min_length = length
+
+    def length_of(self, doc_id:int) -> int:
+        if doc_id < len(self._lengths):
+            return self._lengths[doc_id]
+        return 0
+
+    @classmethod
+    def write_pairs_to(cls, file:str, doc_ids:array, lengths:array):
+        """
+        Appends (doc_id, length) pairs to file. Used by each indexing process before the table is built
+        """
+        pairs = array(DocLengthTable.LENGTH_TYPE)
+        for doc_id, length in zip(doc_ids, lengths):
+            pairs.append(doc_id)
+            pairs.append(length)
+
+        with open(file, 'ab') as pairs_file:
+            pairs.tofile(pairs_file)
+
+    def update_from_pairs_file(self, file:str):
+        pairs = array(DocLengthTable.LENGTH_TYPE)
+        with open(file, 'rb') as pairs_file:
+            pairs.frombytes(pairs_file.read())
+
+        for pair_idx in range(0, len(pairs), 2):
+            self.add(pairs[pair_idx], pairs[pair_idx + 1])
+
+    def save_to(self, file:str):
+        with open(file, 'wb') as lengths_file:
+            array(DocLengthTable.HEADER_TYPE, [self._num_docs, self._total_length]).tofile(lengths_file)
+            self._lengths.tofile(lengths_file)
+
+    @classmethod
+    def read_totals_from(cls, file:str) -> tuple:
+        """
+        Returns the (num_docs, total_length) of a saved table reading only its header
+        """
+        header = array(DocLengthTable.HEADER_TYPE)
+        with open(file, 'rb') as lengths_file:
+            header.fromfile(lengths_file, 2)
+
+        return header[0], header[1]
+
+    def load_from(self, file:str):
+        header = array(DocLengthTable.HEADER_TYPE)
+        lengths = array(DocLengthTable.LENGTH_TYPE)
+        with open(file, 'rb') as lengths_file:
+            header.fromfile(lengths_file, 2)
+            lengths.frombytes(lengths_file.read())
+
+        self._num_docs, self._total_length = header
+        self._lengths = lengths
+        self._min_length = min((length for length in lengths if length > 0), default=0)
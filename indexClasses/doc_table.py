@@ -0,0 +1,164 @@
+from array import array
+import pathlib
+import mmap
+
+def encode_varint(num:int) -> bytes:
+    """
+    Encodes a non negative int using 7 bits per byte. The high bit tells if more bytes follow
+    """
+    if num < 0:
+        raise ValueError("num should not be negative")
+
+    encoded = bytearray()
+    while num >= 0x80:
+        encoded.append((num & 0x7F) | 0x80)
+        num >>= 7
+    encoded.append(num)
+    return bytes(encoded)
+
+def decode_varint(buffer, pos:int) -> tuple:
+    """
+    Returns the (decoded int, position after it)
+    """
+    num = 0
+    shift = 0
+    while True:
+        byte = buffer[pos]
+        pos += 1
+        num |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return num, pos
+        shift += 7
+
+class DocTableWriter():
+    """
+    Append only doc id to url table. Doc ids should be added consecutively.
+    URLs are front coded in blocks of BLOCK_SIZE: the first URL of a block is stored entirely and the others
+    only store the length of the prefix shared with the previous URL and the remaining suffix.
+    The .offsets file stores the first doc id, the block size and the offset of each block in the .urls file
+    """
+
+    BLOCK_SIZE = 16
+    OFFSET_TYPE = 'Q'
+
+    def __init__(self, file:str):
+        file = pathlib.Path(file)
+        file.parent.mkdir(parents=True, exist_ok=True)
+        self._urls_file = open(file.with_suffix('.urls'), 'wb')
+        self._offsets_file = open(file.with_suffix('.offsets'), 'wb')
+        self._first_doc_id = None
+        self._last_doc_id = None
+        self._curr_block = list()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add(self, doc_id:int, url:str):
+        if self._first_doc_id == None:
+            self._first_doc_id = doc_id
+            array(DocTableWriter.OFFSET_TYPE, [doc_id, DocTableWriter.BLOCK_SIZE]).tofile(self._offsets_file)
+        elif doc_id != self._last_doc_id + 1:
+            raise ValueError(f"doc ids should be consecutive. Expected {self._last_doc_id + 1}, got {doc_id}")
+
+        self._last_doc_id = doc_id
+        self._curr_block.append(url.encode())
+        if len(self._curr_block) == DocTableWriter.BLOCK_SIZE:
+            self._write_curr_block()
+
+    def _write_curr_block(self):
+        array(DocTableWriter.OFFSET_TYPE, [self._urls_file.tell()]).tofile(self._offsets_file)
+
+        encoded_block = bytearray()
+        previous_url = b''
+        for url_idx, url in enumerate(self._curr_block):
+            shared_prefix_len = 0
+            if url_idx > 0:
+                max_prefix_len = min(len(url), len(previous_url))
+                while shared_prefix_len < max_prefix_len and url[shared_prefix_len] == previous_url[shared_prefix_len]:
+                    shared_prefix_len += 1
+                encoded_block += encode_varint(shared_prefix_len)
+            encoded_block += encode_varint(len(url) - shared_prefix_len)
+            encoded_block += url[shared_prefix_len:]
+            previous_url = url
+
+        self._urls_file.write(encoded_block)
+        self._curr_block.clear()
+
+    def flush(self):
+        self._urls_file.flush()
+        self._offsets_file.flush()
+
+    def close(self):
+        if len(self._curr_block) > 0:
+            self._write_curr_block()
+        self._urls_file.close()
+        self._offsets_file.close()
+
+class DocTable():
+    """
+    Memory maps a table written by DocTableWriter. Finding an url decodes at most one block
+    """
+
+    HEADER_SIZE = 2
+
+    def __init__(self, file:str):
+        file = pathlib.Path(file)
+        self._urls_file = open(file.with_suffix('.urls'), 'rb')
+        self._urls_mmap = None
+        self._urls = b''
+        if file.with_suffix('.urls').stat().st_size > 0:
+            self._urls_mmap = mmap.mmap(self._urls_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._urls = self._urls_mmap
+
+        self._offsets = array(DocTableWriter.OFFSET_TYPE)
+        with open(file.with_suffix('.offsets'), 'rb') as offsets_file:
+            self._offsets.frombytes(offsets_file.read())
+
+        self._first_doc_id = 0
+        self._block_size = DocTableWriter.BLOCK_SIZE
+        if len(self._offsets) >= DocTable.HEADER_SIZE:
+            self._first_doc_id = self._offsets[0]
+            self._block_size = self._offsets[1]
+        self._num_blocks = max(len(self._offsets) - DocTable.HEADER_SIZE, 0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_url(self, doc_id:int) -> str:
+        """
+        Returns the url of doc_id or an empty str if the doc is not in the table
+        """
+        doc_idx = doc_id - self._first_doc_id
+        block_idx = doc_idx // self._block_size if doc_idx >= 0 else self._num_blocks
+        if block_idx >= self._num_blocks:
+            return ""
+
+        block_start = self._offsets[DocTable.HEADER_SIZE + block_idx]
+        block_end = len(self._urls)
+        if block_idx + 1 < self._num_blocks:
+            block_end = self._offsets[DocTable.HEADER_SIZE + block_idx + 1]
+
+        pos = block_start
+        url = b''
+        for url_idx in range(doc_idx % self._block_size + 1):
+            if pos >= block_end:
+                return ""
+            shared_prefix_len = 0
+            if url_idx > 0:
+                shared_prefix_len, pos = decode_varint(self._urls, pos)
+            suffix_len, pos = decode_varint(self._urls, pos)
+            url = url[:shared_prefix_len] + self._urls[pos:pos + suffix_len]
+            pos += suffix_len
+
+        return url.decode()
+
+    def close(self):
+        if self._urls_mmap != None:
+            self._urls_mmap.close()
+        self._urls_file.close()
@@ -0,0 +1,208 @@
+from indexClasses.binary_index import BinaryIndexWriter, BinaryIndexReader
+from indexClasses.lexicon import Lexicon
+from array import array
+import numpy as np
+import pathlib
+import mmap
+
+class ImpactList():
+    """
+    The postings of a token grouped in segments of the same impact, the score of the posting quantized to a small int.
+    Segments are ordered by decreasing impact and the doc ids inside each one are sorted
+    """
+
+    def __init__(self, impacts, segment_ends, doc_ids):
+        if len(impacts) != len(segment_ends):
+            raise ValueError("impacts and segment_ends should have the same length")
+
+        self._impacts = impacts
+        self._segment_ends = segment_ends
+        self._doc_ids = doc_ids
+
+    @property
+    def impacts(self):
+        """
+        The impact of each segment, from the highest to the lowest
+        """
+        return self._impacts
+
+    @impacts.setter
+    def impacts(self, new_impacts):
+        raise AttributeError("impacts is not writable")
+
+    @property
+    def segment_ends(self):
+        """
+        Where each segment ends in doc_ids
+        """
+        return self._segment_ends
+
+    @segment_ends.setter
+    def segment_ends(self, new_segment_ends):
+        raise AttributeError("segment_ends is not writable")
+
+    @property
+    def doc_ids(self):
+        """
+        The doc ids of all segments, one segment after the other
+        """
+        return self._doc_ids
+
+    @doc_ids.setter
+    def doc_ids(self, new_doc_ids):
+        raise AttributeError("doc_ids is not writable")
+
+    @property
+    def num_segments(self):
+        """
+        The number of distinct impacts of the list
+        """
+        return len(self._impacts)
+
+    @num_segments.setter
+    def num_segments(self, new_num_segments):
+        raise AttributeError("num_segments is not writable")
+
+    def __len__(self):
+        return len(self._doc_ids)
+
+    def get_segment(self, segment:int) -> tuple:
+        """
+        Returns the (impact, doc ids) of a segment
+        """
+        segment_start = self._segment_ends[segment - 1] if segment > 0 else 0
+        return self._impacts[segment], self._doc_ids[segment_start:self._segment_ends[segment]]
+
+    def as_tuples(self) -> list:
+        """
+        The (doc_id, impact) of each posting sorted by doc id
+        """
+        postings = list()
+        for segment in range(self.num_segments):
+            impact, doc_ids = self.get_segment(segment)
+            postings.extend((doc_id, impact) for doc_id in doc_ids)
+
+        return sorted(postings)
+
+    @classmethod
+    def from_impacts(cls, doc_ids, impacts):
+        """
+        doc_ids are sorted and impacts are the positive impact of each one
+        """
+        doc_ids_by_impact = dict()
+        for doc_id, impact in zip(doc_ids, impacts):
+            doc_ids_by_impact.setdefault(impact, []).append(doc_id)
+
+        segment_impacts = array(BinaryIndexWriter.ITEM_TYPE)
+        segment_ends = array(BinaryIndexWriter.ITEM_TYPE)
+        segments_doc_ids = array(BinaryIndexWriter.ITEM_TYPE)
+        for impact in sorted(doc_ids_by_impact, reverse=True):
+            segments_doc_ids.extend(doc_ids_by_impact[impact])
+            segment_impacts.append(impact)
+            segment_ends.append(len(segments_doc_ids))
+
+        return ImpactList(segment_impacts, segment_ends, segments_doc_ids)
+
+class ImpactIndexWriter():
+    """
+    Writes each ImpactList as its number of segments, the impact and the end of each segment and all the doc ids.
+    The file starts with the score of one impact unit, so impacts can be turned back into scores
+    """
+
+    HEADER_TYPE = 'd'
+    HEADER_SIZE = array(HEADER_TYPE).itemsize
+    IMPACT_LEVELS = 255
+
+    def write_header(self, index_file, impact_scale:float):
+        array(ImpactIndexWriter.HEADER_TYPE, [impact_scale]).tofile(index_file)
+
+    def write_postings(self, index_file, impact_list:ImpactList) -> tuple:
+        """
+        Writes the list at the current position of index_file. Returns the (offset, length) written
+        """
+        postings_offset = index_file.tell()
+
+        array(BinaryIndexWriter.ITEM_TYPE, [impact_list.num_segments]).tofile(index_file)
+        impact_list.impacts.tofile(index_file)
+        impact_list.segment_ends.tofile(index_file)
+        impact_list.doc_ids.tofile(index_file)
+
+        return postings_offset, index_file.tell() - postings_offset
+
+    def write_index(self, index_file, index_reader:BinaryIndexReader, lexicon:Lexicon, vectorized_scoring_function,
+                    upper_bound_function) -> Lexicon:
+        """
+        Writes the binary index again with the postings of each token grouped by impact, their score quantized in
+        IMPACT_LEVELS levels. The impacts are rounded up, so a quantized score is never below the real one.
+        vectorized_scoring_function and upper_bound_function are the ones of a Scorer. Returns the lexicon of the impact index
+        """
+        max_score = 0
+        for _, lexicon_entry in lexicon.items():
+            inverted_list = index_reader.get_postings(lexicon_entry.offset, lexicon_entry.df, lexicon_entry.length)
+            max_score = max(max_score, upper_bound_function(inverted_list, inverted_list.max_frequency))
+        impact_scale = max_score/ImpactIndexWriter.IMPACT_LEVELS if max_score > 0 else 1
+        inverted_list = None
+
+        impact_lexicon = Lexicon()
+        self.write_header(index_file, impact_scale)
+        for token, lexicon_entry in lexicon.items():
+            inverted_list = index_reader.get_postings(lexicon_entry.offset, lexicon_entry.df, lexicon_entry.length)
+            doc_ids = np.asarray(inverted_list.doc_ids)
+            scores = vectorized_scoring_function(inverted_list, np.asarray(inverted_list.frequencies), doc_ids)
+            impacts = np.clip(np.ceil(scores/impact_scale), 1, ImpactIndexWriter.IMPACT_LEVELS).astype(np.uint32)
+
+            impact_list = ImpactList.from_impacts(doc_ids.tolist(), impacts.tolist())
+            postings_offset, postings_length = self.write_postings(index_file, impact_list)
+            impact_lexicon.add(token, postings_offset, postings_length, len(impact_list))
+
+        return impact_lexicon
+
+class ImpactIndexReader():
+    """
+    Memory maps an impact index file, like BinaryIndexReader
+    """
+
+    def __init__(self, file:str):
+        self._file_path = pathlib.Path(file)
+        self._file = open(self._file_path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        self._impact_scale = self._view[:ImpactIndexWriter.HEADER_SIZE].cast(ImpactIndexWriter.HEADER_TYPE)[0]
+
+    @property
+    def impact_scale(self):
+        """
+        The score of one impact unit
+        """
+        return self._impact_scale
+
+    @impact_scale.setter
+    def impact_scale(self, new_impact_scale):
+        raise AttributeError("impact_scale is not writable")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_postings(self, offset:int, length:int) -> ImpactList:
+        items = self._view[offset:offset + length].cast(BinaryIndexWriter.ITEM_TYPE)
+        num_segments = items[0]
+
+        impacts = items[1:1 + num_segments]
+        segment_ends = items[1 + num_segments:1 + 2 * num_segments]
+        doc_ids = items[1 + 2 * num_segments:]
+        return ImpactList(impacts, segment_ends, doc_ids)
+
+    def close(self):
+        """
+        Like BinaryIndexReader.close, the mapping stays until the last ImpactList read from it is dropped
+        """
+        self._view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+        self._mmap = None
+        self._file.close()
@@ -1,9 +1,11 @@
+from indexClasses.binary_index import encode_positions
 from collections import namedtuple, Counter
 import json
 import sys
 import pickle
 
 PostingTuple = namedtuple('PostingTuple', 'doc_id frequency')
+PositionalPostingTuple = namedtuple('PositionalPostingTuple', 'doc_id frequency positions')
         
 class Index():
     def __init__(self):
@@ -81,10 +83,21 @@ class Index():
             new_posting = PostingTuple(doc_id, frequency)
             self.add(token, new_posting)
     
+    def add_from_positions(self, positions_per_token:dict, doc_id:int):
+        """
+        positions_per_token maps each token of the doc to the sorted positions where it happens
+        """
+        for token, positions in positions_per_token.items():
+            new_posting = PositionalPostingTuple(doc_id, len(positions), encode_positions(positions))
+            self.add(token, new_posting)
+    
     def update_from_list_of_tuples(self, list_of_tuples:list):
         for token, postings_list in list_of_tuples:
             for posting in postings_list:
-                self.add(token, PostingTuple(posting[0], posting[1]))
+                if len(posting) > 2:
+                    self.add(token, PositionalPostingTuple(posting[0], posting[1], posting[2]))
+                else:
+                    self.add(token, PostingTuple(posting[0], posting[1]))
 
     def has_entry(self, token:str, doc_id:int) -> bool:
         invertedList = self._get_inverted_list(token)
@@ -135,8 +148,8 @@ class Index():
         """
         dist = Counter()
         for _, inverted_list in self._index.items():
-            for _, frequency in inverted_list.get_all_postings_as_tuples():
-                dist[frequency] += 1
+            for posting in inverted_list.get_all_postings_as_tuples():
+                dist[posting[1]] += 1
         
         return dist
     
@@ -216,8 +229,13 @@ class InvertedList():
         return len(self._postings)
     
     def add(self, new_posting:PostingTuple):
-        
-        self._postings.setdefault(new_posting.doc_id, {'frequency':0})['frequency']+=new_posting.frequency
+        """
+        The positions of a PositionalPostingTuple should be all the positions of the token in the doc
+        """
+        posting = self._postings.setdefault(new_posting.doc_id, {'frequency':0})
+        posting['frequency']+=new_posting.frequency
+        if type(new_posting) == PositionalPostingTuple:
+            posting['positions'] = new_posting.positions
     
     def get_posting(self, doc_id:int) -> PostingTuple:
 
@@ -235,7 +253,8 @@ class InvertedList():
         return [PostingTuple(doc_id, posting['frequency']) for doc_id, posting in self._postings.items()]
     
     def get_all_postings_as_tuples(self) -> list:
-        return [(doc_id, posting['frequency']) for doc_id, posting in self._postings.items()]
+        return [(doc_id, posting['frequency'], posting['positions']) if 'positions' in posting else (doc_id, posting['frequency']) 
+                    for doc_id, posting in self._postings.items()]
     
     def get_all_postings_as_dicts(self) -> list:
         return {doc_id:posting['frequency'] for doc_id, posting in self._postings.items()}
@@ -1,6 +1,9 @@
 from multiprocessing import Process, Queue, Semaphore, Lock
 from parserClasses.myparser import TextParser
 from indexClasses.index import Index
+from indexClasses.doc_table import DocTableWriter
+from indexClasses.doc_lengths import DocLengthTable
+from array import array
 from warcio import ArchiveIterator
 import resource
 import pathlib
@@ -14,6 +17,7 @@ class Indexer():
 
     STOP_FLAG = -1
     MEGABYTE = 1024 * 1024
+    FULL_QUEUE_WAIT_SECONDS = 1
 
     def __init__(self, corpus_dir_path:str, index_dir_path:str):
         self._corpus_dir_path = pathlib.Path(corpus_dir_path)
@@ -24,6 +28,9 @@ class Indexer():
         assert self._index_dir_path.exists()
 
         self._id_to_doc_file = "" #Path
+        self._doc_table_file = pathlib.Path("id_to_doc") / 'doc_table'
+        self._doc_lengths_file = pathlib.Path("id_to_doc") / 'doc_lengths'
+        self._store_positions = False
 
         #Dining Savages Problem
         self._empty_text_queue_sem = Semaphore()
@@ -50,6 +57,52 @@ class Indexer():
     def id_to_doc_file(self, new_id_to_doc_file):
         self._id_to_doc_file = new_id_to_doc_file
     
+    @property
+    def doc_table_file(self):
+        """
+        Where the doc id to url table is written. The .urls and .offsets suffixes are added to it
+        """
+        return self._doc_table_file
+    
+    @doc_table_file.setter
+    def doc_table_file(self, new_doc_table_file):
+        if isinstance(new_doc_table_file, str):
+            self._doc_table_file = pathlib.Path(new_doc_table_file)
+        elif isinstance(new_doc_table_file, pathlib.Path):
+            self._doc_table_file = new_doc_table_file
+        else:
+            raise TypeError("new_doc_table_file should be a str or pathlib.Path")
+    
+    @property
+    def doc_lengths_file(self):
+        """
+        Where the DocLengthTable is written after indexing
+        """
+        return self._doc_lengths_file
+    
+    @doc_lengths_file.setter
+    def doc_lengths_file(self, new_doc_lengths_file):
+        if isinstance(new_doc_lengths_file, str):
+            self._doc_lengths_file = pathlib.Path(new_doc_lengths_file)
+        elif isinstance(new_doc_lengths_file, pathlib.Path):
+            self._doc_lengths_file = new_doc_lengths_file
+        else:
+            raise TypeError("new_doc_lengths_file should be a str or pathlib.Path")
+    
+    @property
+    def store_positions(self):
+        """
+        If the position of each token in each doc is stored in the postings. Needed by phrase queries
+        """
+        return self._store_positions
+    
+    @store_positions.setter
+    def store_positions(self, new_store_positions:bool):
+        if type(new_store_positions) != bool:
+            raise TypeError("new_store_positions should be a bool")
+        
+        self._store_positions = new_store_positions
+    
     def set_n_queue_factor(self, new_factor:int):
         if type(new_factor) != int:
             raise TypeError('new_factor should be an int!')
@@ -83,6 +136,25 @@ class Indexer():
         
         reading_proccess.join()
         [proc.join() for proc in tokenizing_proccesses]
+
+        self._build_doc_length_table()
+    
+    def _get_doc_lengths_pairs_file(self, worker_id:int) -> pathlib.Path:
+        return self._index_dir_path/f'doc_lengths-{worker_id}.pairs'
+
+    def _build_doc_length_table(self):
+        """
+        Joins the (doc_id, length) pairs written by each indexing process in a single DocLengthTable
+        """
+        doc_length_table = DocLengthTable()
+        for worker_id in range(1, self._num_workers+1):
+            pairs_file = self._get_doc_lengths_pairs_file(worker_id)
+            if pairs_file.exists():
+                doc_length_table.update_from_pairs_file(pairs_file)
+                pairs_file.unlink()
+        
+        self._doc_lengths_file.parent.mkdir(parents=True, exist_ok=True)
+        doc_length_table.save_to(self._doc_lengths_file)
     
     def _get_from_corpus_files(self, my_id:int, max_mem_mb:int):
         max_mem_usage = max_mem_mb * Indexer.MEGABYTE
@@ -92,9 +164,7 @@ class Indexer():
         curr_doc_id = 0
         docs_added_to_queue = 0
 
-        id_to_doc_set = set()
-        if self._id_to_doc_file.exists():
-            self._id_to_doc_file.unlink()
+        doc_table_writer = DocTableWriter(self._doc_table_file)
 
         try:
             warc_file_count = 0
@@ -114,12 +184,7 @@ class Indexer():
                         curr_doc_id += 1
                         docs_added_to_queue += 1
 
-                        id_to_doc_set.add((curr_doc_id, doc_url))
-
-                        curr_mem_usage = psutil.Process(os.getpid()).memory_info().rss
-                        if  curr_mem_usage >= max_mem_usage:
-                            self.write_id_to_doc_map_to(id_to_doc_set, self._id_to_doc_file)
-                            id_to_doc_set.clear()
+                        doc_table_writer.add(curr_doc_id, doc_url)
                          
                         self._text_queue.put((curr_doc_id, text))
 
@@ -138,12 +203,11 @@ class Indexer():
             #As we use a Queue, we must wait for the queue to be empty to add
             # self._num_workers STOP_FLAGS 
             self._put_stop_flag_for_workers()
-
-            self.write_id_to_doc_map_to(id_to_doc_set, self._id_to_doc_file)
-            id_to_doc_set.clear()
             
         except MemoryError:
             sys.stderr.write(f'\n\nERROR: Memory Exception for READER. total_docs_added: {curr_doc_id}\n')
+        finally:
+            doc_table_writer.close()
 
     def _put_stop_flag_for_workers(self):
         self._empty_text_queue_sem.acquire()
@@ -174,6 +238,12 @@ class Indexer():
         my_index = Index()
         curr_mem_usage = 0
 
+        doc_lengths_pairs_file = self._get_doc_lengths_pairs_file(my_id)
+        if doc_lengths_pairs_file.exists():
+            doc_lengths_pairs_file.unlink()
+        indexed_doc_ids = array(DocLengthTable.LENGTH_TYPE)
+        indexed_doc_lengths = array(DocLengthTable.LENGTH_TYPE)
+
         num_proc_file = 0
         sub_index_file = self._index_dir_path/f'index-{my_id}-{num_proc_file}.pickle'
         if sub_index_file.exists():
@@ -187,7 +257,9 @@ class Indexer():
 
                 if self._text_queue.empty():
                     self._empty_text_queue_sem.release()
-                    self._full_text_queue_sem.acquire()
+                    #Queue.empty() is not reliable, so this may be waiting for a release that already happened.
+                    #The get() below blocks until there is a doc anyway
+                    self._full_text_queue_sem.acquire(timeout=Indexer.FULL_QUEUE_WAIT_SECONDS)
 
                 info_from_reading_proc = self._text_queue.get()
                 
@@ -198,6 +270,9 @@ class Indexer():
                 curr_mem_usage = psutil.Process(os.getpid()).memory_info().rss
                 if curr_mem_usage > max_mem_usage:
                     my_index.save_to_pickle_and_clear(sub_index_file)
+                    DocLengthTable.write_pairs_to(doc_lengths_pairs_file, indexed_doc_ids, indexed_doc_lengths)
+                    indexed_doc_ids = array(DocLengthTable.LENGTH_TYPE)
+                    indexed_doc_lengths = array(DocLengthTable.LENGTH_TYPE)
                     num_proc_file += 1
                     sub_index_file = self._index_dir_path/f'index-{my_id}-{num_proc_file}.pickle'
                     if sub_index_file.exists():
@@ -206,13 +281,22 @@ class Indexer():
                 received_should_stop_signal = info_from_reading_proc[0] == Indexer.STOP_FLAG
                 if not received_should_stop_signal:
 
-                    text_distribuition = TextParser.get_distribuition_of(text_from_corpus)
-                    my_index.add_from_distribuition(text_distribuition, doc_id)
+                    if self._store_positions:
+                        token_positions = TextParser.get_positions_of(text_from_corpus)
+                        my_index.add_from_positions(token_positions, doc_id)
+                        doc_length = sum(len(positions) for positions in token_positions.values())
+                    else:
+                        text_distribuition = TextParser.get_distribuition_of(text_from_corpus)
+                        my_index.add_from_distribuition(text_distribuition, doc_id)
+                        doc_length = sum(text_distribuition.values())
+                    indexed_doc_ids.append(doc_id)
+                    indexed_doc_lengths.append(doc_length)
                     
                 else:
                     break
             
             my_index.save_to_pickle_and_clear(sub_index_file)
+            DocLengthTable.write_pairs_to(doc_lengths_pairs_file, indexed_doc_ids, indexed_doc_lengths)
 
         except MemoryError:
             sys.stderr.write(f'\n\nERROR: Memory Exception in Process {my_id}. MEM_USED: {curr_mem_usage}/{max_mem_usage}. Index size: {my_index.size}\n')
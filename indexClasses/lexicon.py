@@ -0,0 +1,101 @@
+from collections import namedtuple
+from bisect import bisect_left
+import pickle
+
+LexiconEntry = namedtuple('LexiconEntry', 'offset length df')
+
+class Lexicon():
+    """
+    Sorted mapping of each term of the final index to where its inverted list is stored
+    """
+
+    def __init__(self):
+        self._terms = list()
+        self._entries = list()
+
+    @property
+    def terms(self):
+        """
+        The sorted list of terms
+        """
+        return self._terms
+
+    @terms.setter
+    def terms(self, new_terms):
+        raise AttributeError("terms is not writable")
+
+    @property
+    def size(self):
+        """
+        Num of terms in this lexicon
+        """
+        return len(self._terms)
+
+    def __len__(self):
+        return len(self._terms)
+
+    def __contains__(self, term:str) -> bool:
+        return self._find(term) != None
+
+    def add(self, term:str, offset:int, length:int, df:int):
+        if len(self._terms) > 0 and term <= self._terms[-1]:
+            raise ValueError("terms should be added in increasing order")
+
+        self._terms.append(term)
+        self._entries.append(LexiconEntry(offset, length, df))
+
+    def get(self, term:str) -> LexiconEntry:
+        term_idx = self._find(term)
+
+        if term_idx == None:
+            return None
+        else:
+            return self._entries[term_idx]
+
+    def _find(self, term:str) -> int:
+        term_idx = bisect_left(self._terms, term)
+        if term_idx < len(self._terms) and self._terms[term_idx] == term:
+            return term_idx
+
+        return None
+
+    def get_stats(self):
+        """
+        Returns a tuple of (numTokens, meanPostingsPerToken)
+        """
+        num_tokens = len(self._terms)
+        mean_postings = 0
+        if num_tokens != 0:
+            mean_postings = sum(entry.df for entry in self._entries)/num_tokens
+        return num_tokens, mean_postings
+
+    def items(self):
+        return zip(self._terms, self._entries)
+
+    def items_with_prefix(self, prefix:str):
+        """
+        The (term, entry) pairs of the terms starting with prefix, in term order. As the terms are sorted they are
+        a contiguous range found with two binary searches, so the cost is the log of the size plus the terms found
+        """
+        first_term_idx = bisect_left(self._terms, prefix)
+        if prefix == "":
+            last_term_idx = len(self._terms)
+        else:
+            last_term_idx = bisect_left(self._terms, prefix[:-1] + chr(ord(prefix[-1]) + 1), first_term_idx)
+
+        return zip(self._terms[first_term_idx:last_term_idx], self._entries[first_term_idx:last_term_idx])
+
+    def clear(self):
+        self._terms.clear()
+        self._entries.clear()
+
+    def save_to_pickle(self, file:str):
+        with open(file, 'wb') as lexicon_file:
+            pickle.dump((self._terms, [tuple(entry) for entry in self._entries]), lexicon_file)
+
+    def load_from(self, file:str):
+        with open(file, 'rb') as lexicon_file:
+            terms, entries = pickle.load(lexicon_file)
+
+        self._terms = terms
+        self._entries = [LexiconEntry(*entry) for entry in entries]
@@ -0,0 +1,145 @@
+import json
+
+class IndexManifest():
+    """
+    Collection statistics of an index and the parameters it was built with. It is a small JSON file written next to
+    the index, so they are known without reading the index, its lexicon or the doc lengths.
+    The IndexMerger writes the vocabulary statistics and the indexer adds the documents ones
+    """
+
+    def __init__(self):
+        self._num_docs = 0
+        self._total_doc_length = 0
+        self._vocabulary_size = 0
+        self._total_postings = 0
+        self._build_params = dict()
+
+    @property
+    def num_docs(self):
+        """
+        The number of documents indexed, the N of the idf
+        """
+        return self._num_docs
+
+    @num_docs.setter
+    def num_docs(self, new_num_docs):
+        raise AttributeError("num_docs is not writable. Use set_doc_stats")
+
+    @property
+    def total_doc_length(self):
+        """
+        The sum of the number of tokens of all documents
+        """
+        return self._total_doc_length
+
+    @total_doc_length.setter
+    def total_doc_length(self, new_total_doc_length):
+        raise AttributeError("total_doc_length is not writable. Use set_doc_stats")
+
+    @property
+    def average_doc_length(self):
+        """
+        The average number of tokens of a document
+        """
+        if self._num_docs == 0:
+            return 0
+        return self._total_doc_length/self._num_docs
+
+    @average_doc_length.setter
+    def average_doc_length(self, new_average_doc_length):
+        raise AttributeError("average_doc_length is not writable")
+
+    @property
+    def vocabulary_size(self):
+        """
+        The number of distinct tokens, one inverted list each
+        """
+        return self._vocabulary_size
+
+    @vocabulary_size.setter
+    def vocabulary_size(self, new_vocabulary_size):
+        raise AttributeError("vocabulary_size is not writable. Use set_vocabulary_stats")
+
+    @property
+    def total_postings(self):
+        """
+        The number of postings of all inverted lists
+        """
+        return self._total_postings
+
+    @total_postings.setter
+    def total_postings(self, new_total_postings):
+        raise AttributeError("total_postings is not writable. Use set_vocabulary_stats")
+
+    @property
+    def average_postings_per_token(self):
+        """
+        The average inverted list size
+        """
+        if self._vocabulary_size == 0:
+            return 0
+        return self._total_postings/self._vocabulary_size
+
+    @average_postings_per_token.setter
+    def average_postings_per_token(self, new_average_postings_per_token):
+        raise AttributeError("average_postings_per_token is not writable")
+
+    @property
+    def build_params(self):
+        """
+        The parameters the index was built with, by name
+        """
+        return self._build_params
+
+    @build_params.setter
+    def build_params(self, new_build_params):
+        raise AttributeError("build_params is not writable. Use update_build_params")
+
+    def set_doc_stats(self, num_docs:int, total_doc_length:int):
+        if type(num_docs) != int or type(total_doc_length) != int:
+            raise TypeError("num_docs and total_doc_length should be ints!")
+        if num_docs < 0 or total_doc_length < 0:
+            raise ValueError("num_docs and total_doc_length should not be negative")
+
+        self._num_docs = num_docs
+        self._total_doc_length = total_doc_length
+
+    def set_vocabulary_stats(self, vocabulary_size:int, total_postings:int):
+        if type(vocabulary_size) != int or type(total_postings) != int:
+            raise TypeError("vocabulary_size and total_postings should be ints!")
+        if vocabulary_size < 0 or total_postings < 0:
+            raise ValueError("vocabulary_size and total_postings should not be negative")
+
+        self._vocabulary_size = vocabulary_size
+        self._total_postings = total_postings
+
+    def update_build_params(self, build_params:dict):
+        """
+        Values should be JSON serializable
+        """
+        self._build_params.update(build_params)
+
+    def as_dict(self) -> dict:
+        return {
+            'num_docs': self._num_docs,
+            'total_doc_length': self._total_doc_length,
+            'average_doc_length': self.average_doc_length,
+            'vocabulary_size': self._vocabulary_size,
+            'total_postings': self._total_postings,
+            'average_postings_per_token': self.average_postings_per_token,
+            'build_params': self._build_params
+        }
+
+    def save_to(self, file:str):
+        with open(file, 'w') as manifest_file:
+            json.dump(self.as_dict(), manifest_file, indent=4, ensure_ascii=False)
+
+    def load_from(self, file:str):
+        with open(file, 'r') as manifest_file:
+            manifest = json.load(manifest_file)
+
+        self._num_docs = manifest['num_docs']
+        self._total_doc_length = manifest['total_doc_length']
+        self._vocabulary_size = manifest['vocabulary_size']
+        self._total_postings = manifest['total_postings']
+        self._build_params = manifest.get('build_params', dict())
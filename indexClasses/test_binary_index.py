@@ -0,0 +1,203 @@
+from unittest import TestCase, main
+from indexClasses.binary_index import BinaryIndexWriter, BinaryIndexReader, PostingList, PostingCursor
+from indexClasses.binary_index import encode_positions, decode_positions
+import pathlib
+
+class TestBinaryIndex(TestCase):
+
+    def setUp(self):
+        self.test_dir = pathlib.Path('test_utils')
+        self.test_dir.mkdir(exist_ok=True)
+        self.index_file = self.test_dir / 'test_binary_index.bin'
+
+    def tearDown(self):
+        if self.index_file.exists():
+            self.index_file.unlink()
+
+    def test_write_and_read_postings(self):
+        inverted_lists = [
+            [(1, 2), (2, 4), (5, 6)],
+            [(6, 5), (8, 6)],
+            [(100000, 1)]
+        ]
+
+        index_writer = BinaryIndexWriter()
+        written_positions = list()
+        with open(self.index_file, 'wb') as index_file:
+            for postings in inverted_lists:
+                written_positions.append(index_writer.write_postings(index_file, postings))
+
+        self.assertEqual(written_positions[1][0], written_positions[0][0] + written_positions[0][1])
+
+        with BinaryIndexReader(self.index_file) as index_reader:
+            for (offset, _), postings in zip(written_positions, inverted_lists):
+                posting_list = index_reader.get_postings(offset, len(postings))
+                self.assertListEqual(posting_list.as_tuples(), postings)
+                self.assertEqual(len(posting_list), len(postings))
+                posting_list = None
+
+    def test_close_with_posting_lists_in_use(self):
+        with open(self.index_file, 'wb') as index_file:
+            postings_offset, _ = BinaryIndexWriter().write_postings(index_file, [(1, 2), (5, 6)])
+
+        index_reader = BinaryIndexReader(self.index_file)
+        posting_list = index_reader.get_postings(postings_offset, 2)
+        index_reader.close()
+        self.assertListEqual(posting_list.as_tuples(), [(1, 2), (5, 6)])
+        posting_list.release_pages(0, 2)
+        posting_list = None
+
+        index_reader = BinaryIndexReader(self.index_file)
+        index_reader.get_postings(postings_offset, 2)
+        index_reader.close()
+
+    def test_posting_list(self):
+        posting_list = PostingList.from_tuples([(1, 2), (2, 7), (5, 6)])
+
+        self.assertListEqual(list(posting_list.doc_ids), [1, 2, 5])
+        self.assertTupleEqual(posting_list[1], (2, 7))
+        self.assertEqual(posting_list.max_frequency, 7)
+        self.assertEqual(PostingList.from_tuples([]).max_frequency, 0)
+
+        self.assertEqual(posting_list.collection_df, 3)
+        posting_list.collection_df = 10
+        self.assertEqual(posting_list.collection_df, 10)
+        with self.assertRaises(ValueError):
+            posting_list.collection_df = 2
+    
+    def test_blocks_written_and_read(self):
+        postings = [(doc_id, doc_id % 7 + 1) for doc_id in range(0, 3 * PostingList.BLOCK_SIZE, 3)]
+
+        with open(self.index_file, 'wb') as index_file:
+            postings_offset, _ = BinaryIndexWriter().write_postings(index_file, postings)
+            postings_end = index_file.tell()
+            BinaryIndexWriter().write_postings(index_file, [(1, 1)])
+
+        block_size = PostingList.BLOCK_SIZE
+        with BinaryIndexReader(self.index_file) as index_reader:
+            posting_list = index_reader.get_postings(postings_offset, len(postings))
+            self.assertEqual(posting_list.num_blocks, PostingList.get_num_blocks_for(len(postings)))
+            self.assertListEqual(list(posting_list.block_last_doc_ids), 
+                                    [postings[min(start + block_size, len(postings)) - 1][0] 
+                                        for start in range(0, len(postings), block_size)])
+            self.assertListEqual(list(posting_list.block_max_frequencies), 
+                                    [max(freq for _, freq in postings[start:start + block_size]) 
+                                        for start in range(0, len(postings), block_size)])
+            self.assertEqual(posting_list.max_frequency, 7)
+            self.assertEqual(posting_list.get_block_of(block_size), 1)
+            self.assertListEqual(posting_list.as_tuples(), postings)
+            posting_list = None
+
+        self.assertEqual(postings_end - postings_offset, 
+                            BinaryIndexWriter.ITEM_SIZE * 2 * (len(postings) + PostingList.get_num_blocks_for(len(postings))))
+
+    def test_cursor_next(self):
+        cursor = PostingCursor(PostingList.from_tuples([(1, 2), (4, 7)]))
+
+        self.assertEqual(cursor.doc, 1)
+        self.assertEqual(cursor.freq, 2)
+        self.assertEqual(cursor.next(), 4)
+        self.assertEqual(cursor.freq, 7)
+        self.assertEqual(cursor.next(), PostingCursor.END_OF_LIST)
+        self.assertTrue(cursor.is_exhausted())
+        self.assertEqual(cursor.next(), PostingCursor.END_OF_LIST)
+
+    def test_cursor_next_geq(self):
+        doc_ids = list(range(0, 10 * PostingList.BLOCK_SIZE, 2))
+        cursor = PostingCursor(PostingList.from_tuples([(doc_id, doc_id + 1) for doc_id in doc_ids]))
+
+        self.assertEqual(cursor.next_geq(0), 0)
+        self.assertEqual(cursor.next_geq(3), 4)
+        self.assertEqual(cursor.next_geq(2), 4)
+        self.assertEqual(cursor.next_geq(3 * PostingList.BLOCK_SIZE + 1), 3 * PostingList.BLOCK_SIZE + 2)
+        self.assertEqual(cursor.freq, 3 * PostingList.BLOCK_SIZE + 3)
+        self.assertEqual(cursor.next_geq(doc_ids[-1]), doc_ids[-1])
+        self.assertEqual(cursor.next_geq(doc_ids[-1] + 1), PostingCursor.END_OF_LIST)
+        self.assertTrue(cursor.is_exhausted())
+
+    def test_cursor_find_block_of(self):
+        cursor = PostingCursor(PostingList.from_tuples([(doc_id, 1) for doc_id in range(3 * PostingList.BLOCK_SIZE)]))
+
+        self.assertEqual(cursor.find_block_of(PostingList.BLOCK_SIZE), 1)
+        self.assertEqual(cursor.doc, 0)
+        self.assertEqual(cursor.find_block_of(3 * PostingList.BLOCK_SIZE), 3)
+
+    def test_encode_decode_positions(self):
+        positions = [0, 1, 5, 127, 128, 100000]
+
+        self.assertListEqual(decode_positions(encode_positions(positions)), positions)
+        self.assertEqual(decode_positions(encode_positions([])), [])
+        self.assertEqual(len(encode_positions([1, 2, 3])), 3)
+
+    def test_write_and_read_positions(self):
+        positions_per_posting = [[0, 4], [1, 2, 300], [7]]
+        postings = [(doc_id, len(positions), encode_positions(positions)) 
+                        for doc_id, positions in zip([1, 2, 3], positions_per_posting)]
+
+        index_writer = BinaryIndexWriter()
+        with open(self.index_file, 'wb') as index_file:
+            without_positions_offset, without_positions_length = index_writer.write_postings(index_file, [(1, 2), (5, 1)])
+            postings_offset, postings_length = index_writer.write_postings(index_file, postings)
+
+        with BinaryIndexReader(self.index_file) as index_reader:
+            posting_list = index_reader.get_postings(without_positions_offset, 2, without_positions_length)
+            self.assertFalse(posting_list.has_positions)
+
+            posting_list = index_reader.get_postings(postings_offset, len(postings), postings_length)
+            self.assertTrue(posting_list.has_positions)
+            self.assertListEqual(posting_list.as_tuples(), postings)
+            self.assertListEqual([posting_list.positions_of(idx) for idx in range(len(postings))], positions_per_posting)
+
+            cursor = PostingCursor(posting_list)
+            cursor.next_geq(2)
+            self.assertListEqual(cursor.positions, [1, 2, 300])
+            posting_list = None
+            cursor = None
+
+    def test_cursor_releases_consumed_pages(self):
+        num_postings = 3 * PostingCursor.RELEASE_CHUNK_SIZE + 10
+        posting_list = PostingList.from_tuples([(doc_id, 1) for doc_id in range(num_postings)])
+        released_ranges = list()
+        posting_list.pages_releaser = lambda start, end: released_ranges.append((start, end))
+
+        cursor = PostingCursor(posting_list)
+        while not cursor.is_exhausted():
+            cursor.next()
+        self.assertListEqual(released_ranges, [])
+
+        cursor = PostingCursor(posting_list, release_consumed_pages=True)
+        self.assertEqual(cursor.next_geq(PostingCursor.RELEASE_CHUNK_SIZE + 5), PostingCursor.RELEASE_CHUNK_SIZE + 5)
+        while cursor.next() != PostingCursor.END_OF_LIST:
+            self.assertEqual(cursor.freq, 1)
+        self.assertEqual(released_ranges[0], (0, PostingCursor.RELEASE_CHUNK_SIZE + 5))
+        self.assertTrue(all(previous[1] == curr[0] for previous, curr in zip(released_ranges, released_ranges[1:])))
+        self.assertEqual(released_ranges[-1][1], num_postings)
+
+        with self.assertRaises(TypeError):
+            posting_list.pages_releaser = 1
+        PostingList.from_tuples([(1, 1)]).release_pages(0, 1)
+
+    def test_release_pages_of_read_list(self):
+        num_postings = 4 * PostingCursor.RELEASE_CHUNK_SIZE
+        postings = [(doc_id, doc_id % 5 + 1) for doc_id in range(0, 2 * num_postings, 2)]
+        with open(self.index_file, 'wb') as index_file:
+            BinaryIndexWriter().write_postings(index_file, [(1, 1)])
+            postings_offset, _ = BinaryIndexWriter().write_postings(index_file, postings)
+
+        with BinaryIndexReader(self.index_file) as index_reader:
+            posting_list = index_reader.get_postings(postings_offset, num_postings)
+            cursor = PostingCursor(posting_list, release_consumed_pages=True)
+            read_postings = list()
+            while not cursor.is_exhausted():
+                read_postings.append((cursor.doc, cursor.freq))
+                cursor.next()
+            self.assertListEqual(read_postings, postings)
+            self.assertListEqual(posting_list.as_tuples(), postings)
+            posting_list = None
+            cursor = None
+
+    def test_raise_on_different_lengths(self):
+        self.assertRaises(ValueError, PostingList, [1, 2], [1])
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+from unittest import TestCase, main
+from indexClasses.bloom_filter import BloomFilter
+import pathlib
+
+class TestBloomFilter(TestCase):
+
+    def setUp(self):
+        self.test_dir = pathlib.Path('test_utils')
+        self.test_dir.mkdir(exist_ok=True)
+        self.bloom_filter = BloomFilter.for_capacity(1000, 0.01)
+        for key_idx in range(1000):
+            self.bloom_filter.add(f'token{key_idx}')
+
+    def test_no_false_negatives(self):
+        for key_idx in range(1000):
+            self.assertIn(f'token{key_idx}', self.bloom_filter)
+
+    def test_false_positive_rate(self):
+        false_positives = sum(f'other{key_idx}' in self.bloom_filter for key_idx in range(10000))
+        self.assertLess(false_positives, 300)
+
+    def test_save_and_load(self):
+        test_file = self.test_dir / 'test_bloom_filter'
+        self.bloom_filter.save_to(test_file)
+
+        loaded_bloom_filter = BloomFilter()
+        loaded_bloom_filter.load_from(test_file)
+
+        self.assertEqual(loaded_bloom_filter.num_bits, self.bloom_filter.num_bits)
+        self.assertEqual(loaded_bloom_filter.num_hashes, self.bloom_filter.num_hashes)
+        self.assertIn('token7', loaded_bloom_filter)
+        self.assertNotIn('', BloomFilter.for_capacity(10))
+
+        test_file.unlink()
+
+    def test_validation(self):
+        with self.assertRaises(TypeError):
+            BloomFilter(8.0, 1)
+        with self.assertRaises(ValueError):
+            BloomFilter(8, 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+from unittest import TestCase, main
+from indexClasses.doc_lengths import DocLengthTable
+from array import array
+import pathlib
+
+class TestDocLengthTable(TestCase):
+
+    def setUp(self):
+        self.test_dir = pathlib.Path('test_utils')
+        self.test_dir.mkdir(exist_ok=True)
+        self.doc_lengths = DocLengthTable()
+        self.doc_lengths.add(1, 10)
+        self.doc_lengths.add(3, 30)
+        self.doc_lengths.add(2, 20)
+
+    def test_length_of(self):
+        self.assertEqual(self.doc_lengths.length_of(3), 30)
+        self.assertEqual(self.doc_lengths.length_of(0), 0)
+        self.assertEqual(self.doc_lengths.length_of(100), 0)
+
+    def test_stats(self):
+        self.assertEqual(self.doc_lengths.num_docs, 3)
+        self.assertEqual(self.doc_lengths.total_length, 60)
+        self.assertEqual(self.doc_lengths.average_length, 20)
+        self.assertEqual(DocLengthTable().average_length, 0)
+
+    def test_save_and_load(self):
+        test_file = self.test_dir / 'test_doc_lengths'
+        self.doc_lengths.save_to(test_file)
+
+        loaded_doc_lengths = DocLengthTable()
+        loaded_doc_lengths.load_from(test_file)
+
+        self.assertEqual(loaded_doc_lengths.average_length, 20)
+        self.assertListEqual([loaded_doc_lengths.length_of(doc_id) for doc_id in range(5)], [0, 10, 20, 30, 0])
+        self.assertTupleEqual(DocLengthTable.read_totals_from(test_file), (3, 60))
+
+        test_file.unlink()
+
+    def test_update_from_pairs_files(self):
+        pairs_file = self.test_dir / 'test_doc_lengths.pairs'
+        if pairs_file.exists():
+            pairs_file.unlink()
+
+        DocLengthTable.write_pairs_to(pairs_file, array('I', [5, 4]), array('I', [7, 9]))
+        DocLengthTable.write_pairs_to(pairs_file, array('I', [6]), array('I', [2]))
+        self.doc_lengths.update_from_pairs_file(pairs_file)
+
+        self.assertEqual(self.doc_lengths.num_docs, 6)
+        self.assertListEqual([self.doc_lengths.length_of(doc_id) for doc_id in range(4, 7)], [9, 7, 2])
+
+        pairs_file.unlink()
+
+if __name__ == '__main__':
+    main()
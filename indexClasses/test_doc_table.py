@@ -0,0 +1,51 @@
+from unittest import TestCase, main
+from indexClasses.doc_table import DocTableWriter, DocTable, encode_varint, decode_varint
+import pathlib
+
+class TestDocTable(TestCase):
+
+    def setUp(self):
+        self.test_dir = pathlib.Path('test_utils')
+        self.test_dir.mkdir(exist_ok=True)
+        self.doc_table_file = self.test_dir / 'test_doc_table'
+
+    def tearDown(self):
+        for suffix in ['.urls', '.offsets']:
+            if self.doc_table_file.with_suffix(suffix).exists():
+                self.doc_table_file.with_suffix(suffix).unlink()
+
+    def test_varint(self):
+        for num in [0, 1, 127, 128, 300, 2**40]:
+            encoded = encode_varint(num)
+            self.assertTupleEqual(decode_varint(encoded, 0), (num, len(encoded)))
+        
+        self.assertRaises(ValueError, encode_varint, -1)
+
+    def test_get_url(self):
+        urls = {doc_id: f'https://pt.wikipedia.org/wiki/Artigo_{doc_id}' for doc_id in range(1, 51)}
+        urls[20] = 'https://www.ufmg.br/ção'
+        with DocTableWriter(self.doc_table_file) as doc_table_writer:
+            for doc_id, url in urls.items():
+                doc_table_writer.add(doc_id, url)
+
+        with DocTable(self.doc_table_file) as doc_table:
+            for doc_id, url in urls.items():
+                self.assertEqual(doc_table.get_url(doc_id), url)
+            
+            self.assertEqual(doc_table.get_url(0), "")
+            self.assertEqual(doc_table.get_url(51), "")
+            self.assertEqual(doc_table.get_url(100), "")
+
+    def test_empty_table(self):
+        DocTableWriter(self.doc_table_file).close()
+
+        with DocTable(self.doc_table_file) as doc_table:
+            self.assertEqual(doc_table.get_url(1), "")
+
+    def test_raise_on_non_consecutive_doc_id(self):
+        with DocTableWriter(self.doc_table_file) as doc_table_writer:
+            doc_table_writer.add(1, 'url1')
+            self.assertRaises(ValueError, doc_table_writer.add, 3, 'url3')
+
+if __name__ == '__main__':
+    main()
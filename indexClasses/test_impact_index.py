@@ -0,0 +1,81 @@
+from unittest import TestCase, main
+from indexClasses.impact_index import ImpactList, ImpactIndexWriter, ImpactIndexReader
+from indexClasses.binary_index import BinaryIndexWriter, BinaryIndexReader
+from indexClasses.lexicon import Lexicon
+import pathlib
+
+class TestImpactIndex(TestCase):
+
+    def setUp(self):
+        self.test_dir = pathlib.Path('test_utils')
+        self.test_dir.mkdir(exist_ok=True)
+        self.index_file = self.test_dir / 'test_impact_index.impact'
+        self.binary_index_file = self.test_dir / 'test_impact_index.bin'
+
+    def tearDown(self):
+        for file in [self.index_file, self.binary_index_file]:
+            if file.exists():
+                file.unlink()
+
+    def test_from_impacts(self):
+        impact_list = ImpactList.from_impacts([1, 3, 4, 7, 9], [2, 5, 2, 1, 5])
+
+        self.assertListEqual(list(impact_list.impacts), [5, 2, 1])
+        self.assertListEqual(list(impact_list.segment_ends), [2, 4, 5])
+        self.assertListEqual(list(impact_list.doc_ids), [3, 9, 1, 4, 7])
+        self.assertEqual(impact_list.num_segments, 3)
+        self.assertEqual(len(impact_list), 5)
+
+        impact, doc_ids = impact_list.get_segment(1)
+        self.assertEqual(impact, 2)
+        self.assertListEqual(list(doc_ids), [1, 4])
+        self.assertListEqual(impact_list.as_tuples(), [(1, 2), (3, 5), (4, 2), (7, 1), (9, 5)])
+
+    def test_write_and_read(self):
+        impact_lists = [
+            ImpactList.from_impacts([1, 3, 4, 7, 9], [2, 5, 2, 1, 5]),
+            ImpactList.from_impacts([2], [255]),
+            ImpactList.from_impacts([5, 100000], [1, 1])
+        ]
+
+        index_writer = ImpactIndexWriter()
+        written_positions = list()
+        with open(self.index_file, 'wb') as index_file:
+            index_writer.write_header(index_file, 0.25)
+            for impact_list in impact_lists:
+                written_positions.append(index_writer.write_postings(index_file, impact_list))
+
+        with ImpactIndexReader(self.index_file) as index_reader:
+            self.assertEqual(index_reader.impact_scale, 0.25)
+            for (offset, length), impact_list in zip(written_positions, impact_lists):
+                read_impact_list = index_reader.get_postings(offset, length)
+                self.assertListEqual(read_impact_list.as_tuples(), impact_list.as_tuples())
+                self.assertListEqual(list(read_impact_list.segment_ends), list(impact_list.segment_ends))
+                read_impact_list = None
+
+    def test_write_index(self):
+        postings_by_token = {'a': [(1, 1), (2, 4), (3, 2)], 'b': [(2, 8)]}
+        lexicon = Lexicon()
+        binary_index_writer = BinaryIndexWriter()
+        with open(self.binary_index_file, 'wb') as binary_index_file:
+            for token, postings in postings_by_token.items():
+                postings_offset, postings_length = binary_index_writer.write_postings(binary_index_file, postings)
+                lexicon.add(token, postings_offset, postings_length, len(postings))
+
+        scoring_function = lambda inv_list, doc_freqs, doc_ids: doc_freqs * 0.5
+        upper_bound_function = lambda inv_list, max_frequency: max_frequency * 0.5
+        with BinaryIndexReader(self.binary_index_file) as binary_index_reader:
+            with open(self.index_file, 'wb') as index_file:
+                impact_lexicon = ImpactIndexWriter().write_index(index_file, binary_index_reader, lexicon,
+                                                                scoring_function, upper_bound_function)
+
+        with ImpactIndexReader(self.index_file) as index_reader:
+            self.assertEqual(index_reader.impact_scale, 4/ImpactIndexWriter.IMPACT_LEVELS)
+            impact_lists = {token: index_reader.get_postings(entry.offset, entry.length).as_tuples() 
+                                for token, entry in impact_lexicon.items()}
+
+        #The impacts are the scores over the impact scale rounded up: 255/8, 255/2 and 255/4 for a
+        self.assertDictEqual(impact_lists, {'a': [(1, 32), (2, 128), (3, 64)], 'b': [(2, 255)]})
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 from unittest import TestCase, main
-from index import Index, PostingTuple
+from indexClasses.index import Index, PostingTuple
+from indexClasses.binary_index import decode_positions
 import pathlib
 
 class TestIndex(TestCase):
@@ -152,6 +153,19 @@ class TestIndex(TestCase):
         
         self.assertTupleEqual(self.index.size, (4, 4))
     
+    def test_add_from_positions(self):
+        self.index.add_from_positions({'a': [0, 3, 9], 'b': [1]}, 4)
+
+        self.assertEqual(self.index.get_freq_of_doc_for_token(4, 'a'), 3)
+        token_postings = dict(self.index.get_index_as_tuples_gen())
+        doc_id, frequency, encoded_positions = token_postings['a'][0]
+        self.assertEqual((doc_id, frequency), (4, 3))
+        self.assertListEqual(decode_positions(encoded_positions), [0, 3, 9])
+
+        loaded_index = Index()
+        loaded_index.update_from_list_of_tuples(list(self.index.get_index_as_tuples_gen()))
+        self.assertListEqual(list(loaded_index.get_index_as_tuples_gen()), list(self.index.get_index_as_tuples_gen()))
+
     def test_load_index(self):
         test_dir = pathlib.Path('test_utils')
         test_dir.mkdir(exist_ok=True)
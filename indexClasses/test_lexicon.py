@@ -0,0 +1,57 @@
+from unittest import TestCase, main
+from indexClasses.lexicon import Lexicon, LexiconEntry
+import pathlib
+
+class TestLexicon(TestCase):
+
+    def setUp(self):
+        self.lexicon = Lexicon()
+        self.lexicon.add('A', 0, 10, 3)
+        self.lexicon.add('B', 10, 7, 2)
+        self.lexicon.add('D', 17, 12, 5)
+
+    def test_get_entry(self):
+        self.assertEqual(self.lexicon.get('B'), LexiconEntry(10, 7, 2))
+        self.assertEqual(self.lexicon.get('D').df, 5)
+
+    def test_dont_get_entry(self):
+        self.assertEqual(self.lexicon.get('C'), None)
+        self.assertEqual(self.lexicon.get('E'), None)
+        self.assertFalse('0' in self.lexicon)
+    
+    def test_raise_on_unordered_add(self):
+        self.assertRaises(ValueError, self.lexicon.add, 'C', 29, 3, 1)
+        self.assertRaises(ValueError, self.lexicon.add, 'D', 29, 3, 1)
+
+    def test_items_with_prefix(self):
+        lexicon = Lexicon()
+        for term_idx, term in enumerate(['infla', 'inform', 'informa', 'informz', 'informát', 'infos', 'ingl']):
+            lexicon.add(term, term_idx * 10, 10, term_idx + 1)
+
+        self.assertListEqual([term for term, _ in lexicon.items_with_prefix('inform')], 
+                                ['inform', 'informa', 'informz', 'informát'])
+        self.assertListEqual([entry.df for _, entry in lexicon.items_with_prefix('infos')], [6])
+        self.assertListEqual(list(lexicon.items_with_prefix('infz')), [])
+        self.assertEqual(len(list(lexicon.items_with_prefix(''))), 7)
+        self.assertListEqual(list(self.lexicon.items_with_prefix('B')), [('B', LexiconEntry(10, 7, 2))])
+
+    def test_get_stats(self):
+        self.assertTupleEqual(self.lexicon.get_stats(), (3, 10/3))
+        self.assertTupleEqual(Lexicon().get_stats(), (0, 0))
+
+    def test_save_and_load(self):
+        test_dir = pathlib.Path('test_utils')
+        test_dir.mkdir(exist_ok=True)
+        test_file = test_dir / 'test_lexicon.lexicon'
+
+        self.lexicon.save_to_pickle(test_file)
+        loaded_lexicon = Lexicon()
+        loaded_lexicon.load_from(test_file)
+
+        self.assertListEqual(list(self.lexicon.items()), list(loaded_lexicon.items()))
+
+        if test_file.exists():
+            test_file.unlink()
+
+if __name__ == '__main__':
+    main()
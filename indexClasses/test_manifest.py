@@ -0,0 +1,44 @@
+from unittest import TestCase, main
+from indexClasses.manifest import IndexManifest
+import pathlib
+
+class TestIndexManifest(TestCase):
+
+    def setUp(self):
+        self.test_dir = pathlib.Path('test_utils')
+        self.test_dir.mkdir(exist_ok=True)
+        self.manifest = IndexManifest()
+        self.manifest.set_doc_stats(4, 100)
+        self.manifest.set_vocabulary_stats(10, 25)
+        self.manifest.update_build_params({'store_positions': True})
+
+    def test_stats(self):
+        self.assertEqual(self.manifest.average_doc_length, 25)
+        self.assertEqual(self.manifest.average_postings_per_token, 2.5)
+        self.assertEqual(IndexManifest().average_doc_length, 0)
+        self.assertEqual(IndexManifest().average_postings_per_token, 0)
+
+    def test_save_and_load(self):
+        test_file = self.test_dir / 'test_index.manifest'
+        self.manifest.save_to(test_file)
+
+        loaded_manifest = IndexManifest()
+        loaded_manifest.load_from(test_file)
+
+        self.assertDictEqual(loaded_manifest.as_dict(), self.manifest.as_dict())
+        self.assertEqual(loaded_manifest.num_docs, 4)
+        self.assertEqual(loaded_manifest.total_postings, 25)
+        self.assertDictEqual(loaded_manifest.build_params, {'store_positions': True})
+
+        test_file.unlink()
+
+    def test_validation(self):
+        with self.assertRaises(TypeError):
+            self.manifest.set_doc_stats(4.0, 100)
+        with self.assertRaises(ValueError):
+            self.manifest.set_vocabulary_stats(-1, 0)
+        with self.assertRaises(AttributeError):
+            self.manifest.num_docs = 3
+
+if __name__ == '__main__':
+    main()
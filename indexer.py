@@ -2,7 +2,14 @@ from timeit import default_timer as timer
 from parserClasses.myparser import *
 from indexClasses.indexer import *
 from indexClasses.index import *
+from indexClasses.doc_lengths import DocLengthTable
+from indexClasses.manifest import IndexManifest
+from indexClasses.lexicon import Lexicon
+from indexClasses.binary_index import BinaryIndexReader
+from indexClasses.impact_index import ImpactIndexWriter
+from queryProcessingClasses.scorer import Scorer
 from mergerClasses.index_merger import *
+from mergerClasses.index_sharder import IndexSharder
 from multiprocessing import cpu_count
 
 import logging
@@ -21,44 +28,115 @@ def main(my_args):
     """
     Your main calls should be added here
     """
-    final_index_dir = pathlib.Path(my_args.index_path).parent
+    run_info = build_index(my_args.corpus_path, my_args.index_path, my_args.memory_limit, my_args.store_positions,
+                            my_args.impact_ranker, my_args.num_shards)
+
+    print(json.dumps(run_info, indent=4, ensure_ascii=False))
+
+def build_index(corpus_path:str, index_path:str, memory_limit:int, store_positions:bool = False, 
+                impact_ranker:str = None, num_shards:int = 0) -> dict:
+    """
+    Indexes the corpus and merges the sub indexes into index_path. With num_shards the final index is also split
+    by doc id ranges for QueryProcessor.use_shards. Returns the run info printed by main
+    """
+    final_index_dir = pathlib.Path(index_path).parent
     sub_indexes_dir = final_index_dir / 'sub_indexes'
     sub_indexes_dir.mkdir(parents=True, exist_ok=True)
-    indexer = Indexer(my_args.corpus_path, sub_indexes_dir)
+    indexer = Indexer(corpus_path, sub_indexes_dir)
 
-    id_to_doc_file = pathlib.Path("id_to_doc") / 'id_to_doc_map.pickle'
-    indexer.id_to_doc_file = id_to_doc_file
+    #Each index generation has its own doc table and doc lengths, like its lexicon and manifest, so rebuilding
+    # into a new index path never truncates the files mapped by the query processor of the index being served
+    final_index_path_file = pathlib.Path(index_path)
+    indexer.doc_table_file = final_index_path_file.with_suffix('.doc_table')
+    indexer.doc_lengths_file = final_index_path_file.with_suffix('.doc_lengths')
+    indexer.store_positions = store_positions
 
     max_num_procs = cpu_count()
     num_procs_for_indexing = 1
     if max_num_procs > 1:
         num_procs_for_indexing = max_num_procs - 1
 
-    max_mem_used_indexing = my_args.memory_limit * 0.9
+    max_mem_used_indexing = memory_limit * 0.9
     
     start = timer()
     indexer.index_multiprocess(max_mem_used_indexing, num_procs_for_indexing)
     
     sub_index_files = list(sub_indexes_dir.glob('*.pickle'))
-    final_index_path_file = pathlib.Path(my_args.index_path)
-    max_mem_used_index_merge = my_args.memory_limit * 0.45 * MEGABYTE
+    max_mem_used_index_merge = memory_limit * 0.45 * MEGABYTE
 
     index_merger = IndexMerger()
     index_merger.max_files_opened_at_once = 100
-    index_merger.merge_index_file = my_args.index_path
+    index_merger.merge_index_file = index_path
     index_merger.merge_pickle_files(sub_index_files, max_mem_used_index_merge)
 
+    manifest = IndexManifest()
+    manifest.load_from(index_merger.manifest_file)
+    manifest.set_doc_stats(*DocLengthTable.read_totals_from(indexer.doc_lengths_file))
+    manifest.update_build_params({
+        'corpus_path': str(corpus_path),
+        'memory_limit': memory_limit,
+        'store_positions': store_positions,
+        'num_indexing_processes': num_procs_for_indexing,
+        'impact_ranker': impact_ranker,
+        'num_shards': num_shards
+    })
+    manifest.save_to(index_merger.manifest_file)
+
+    if num_shards > 0:
+        index_sharder = IndexSharder()
+        index_sharder.index_file = final_index_path_file
+        index_sharder.num_shards = num_shards
+        index_sharder.split()
+
+    if impact_ranker != None:
+        write_impact_index(final_index_path_file, impact_ranker)
+
     end = timer()
     total_time = end-start
 
-    index_size, avg_inv_list_size = Index.get_stats_from_file(final_index_path_file)
+    return get_run_info(final_index_path_file, total_time)
+
+def get_run_info(index_path:pathlib.Path, total_time:float) -> dict:
+    """
+    The statistics of the index come from its manifest, so reporting does not depend on the index size
+    """
+    manifest = IndexManifest()
+    manifest.load_from(index_path.with_suffix('.manifest'))
+
     run_info = dict()
-    run_info['Index Size'] = final_index_path_file.stat().st_size / MEGABYTE
+    run_info['Index Size'] = index_path.stat().st_size / MEGABYTE
     run_info['Elapsed Time'] = total_time
-    run_info['Number of Lists'] = index_size
-    run_info['Average List Size'] = avg_inv_list_size
+    run_info['Number of Lists'] = manifest.vocabulary_size
+    run_info['Average List Size'] = manifest.average_postings_per_token
 
-    print(json.dumps(run_info, indent=4, ensure_ascii=False))
+    return run_info
+
+def write_impact_index(index_path:pathlib.Path, ranker:str, impact_index_path = None):
+    """
+    The postings are scored with the number of documents of the index manifest and the doc lengths written next to
+    the index, like in the query processor. The impact index defaults to the index path with the .impact suffix
+    """
+    index_path = pathlib.Path(index_path)
+    if impact_index_path == None:
+        impact_index_path = index_path.with_suffix('.impact')
+    impact_index_path = pathlib.Path(impact_index_path)
+
+    manifest = IndexManifest()
+    manifest.load_from(index_path.with_suffix('.manifest'))
+    doc_lengths = None
+    doc_lengths_file = index_path.with_suffix('.doc_lengths')
+    if ranker in Scorer.LENGTH_NORMALIZED_METHODS and doc_lengths_file.exists():
+        doc_lengths = DocLengthTable()
+        doc_lengths.load_from(doc_lengths_file)
+    scorer = Scorer(manifest.num_docs, doc_lengths)
+
+    lexicon = Lexicon()
+    lexicon.load_from(index_path.with_suffix('.lexicon'))
+    with BinaryIndexReader(index_path) as index_reader, open(impact_index_path, 'wb') as impact_index_file:
+        impact_lexicon = ImpactIndexWriter().write_index(impact_index_file, index_reader, lexicon,
+                                                        scorer.get_vectorized_scoring_function(ranker),
+                                                        scorer.get_upper_bound_function(ranker))
+    impact_lexicon.save_to_pickle(impact_index_path.with_name(impact_index_path.name + '.lexicon'))
 
 def configArgs(parser):
     parser.add_argument(
@@ -83,7 +161,32 @@ def configArgs(parser):
         dest='index_path',
         action='store',
         required=True,
-        help='path of the index file to be generated'
+        help='path of the binary index file to be generated, e.g. index.bin'
+    )
+
+    parser.add_argument(
+        '-p',
+        dest='store_positions',
+        action='store_true',
+        help='store the positions of the tokens in each doc, so phrase queries can be answered'
+    )
+
+    parser.add_argument(
+        '--impact',
+        dest='impact_ranker',
+        action='store',
+        choices=Scorer.SCORING_METHODS,
+        default=None,
+        help='also write an impact ordered copy of the index with the scores of this ranker, for the SAAT evaluator'
+    )
+
+    parser.add_argument(
+        '--shards',
+        dest='num_shards',
+        action='store',
+        type=int,
+        default=0,
+        help='also split the index in this many shards of doc id ranges, answered in parallel by the query processor'
     )
     return parser
 
@@ -1,5 +1,9 @@
 from multiprocessing import Pool, cpu_count
+from indexClasses.lexicon import Lexicon
+from indexClasses.binary_index import BinaryIndexWriter
+from indexClasses.manifest import IndexManifest
 from timeit import default_timer as timer
+from heapq import nlargest
 import pathlib
 import pickle
 import psutil
@@ -9,11 +13,14 @@ class IndexMerger():
     
     MEGABYTE = 1024 * 1024
     LEVEL_DIR_FORMATER = "subindex_merges/merged_index_level_{}/"
+    CHAMPION_LIST_SIZE = 100
 
     def __init__(self):
         self._max_files_opened_at_once = 100
         self._merge_index_file = "" #Path
+        self._lexicon_file = None #Path
         self._curr_fake_level_for_dir_name = 0
+        self._champion_list_size = IndexMerger.CHAMPION_LIST_SIZE
     
     @property
     def max_files_opened_at_once(self):
@@ -36,7 +43,8 @@ class IndexMerger():
     @property
     def merge_index_file(self):
         """
-        The final index path
+        The final index path. The final index is a binary index, so it should not have the .pickle suffix of the
+        sub indexes, e.g. index.bin
         """
         return self._merge_index_file
     
@@ -49,6 +57,76 @@ class IndexMerger():
         else:
             raise TypeError("new_merge_index_file should be a str or pathlib.Path")
     
+    @property
+    def lexicon_file(self):
+        """
+        The final index lexicon path. Defaults to the final index path with the .lexicon suffix
+        """
+        if self._lexicon_file == None:
+            return self._merge_index_file.with_suffix('.lexicon')
+
+        return self._lexicon_file
+    
+    @lexicon_file.setter
+    def lexicon_file(self, new_lexicon_file:str):
+        if isinstance(new_lexicon_file, str):
+            self._lexicon_file = pathlib.Path(new_lexicon_file)
+        elif isinstance(new_lexicon_file, pathlib.Path):
+            self._lexicon_file = new_lexicon_file
+        else:
+            raise TypeError("new_lexicon_file should be a str or pathlib.Path")
+    
+    @property
+    def champion_list_size(self):
+        """
+        How many postings, the ones with the highest frequencies, each champion list keeps. Only tokens with more
+        postings than that get a champion list. 0 writes none
+        """
+        return self._champion_list_size
+    
+    @champion_list_size.setter
+    def champion_list_size(self, new_champion_list_size:int):
+        if type(new_champion_list_size) != int:
+            raise TypeError("new_champion_list_size should be an int!")
+        if new_champion_list_size < 0:
+            raise ValueError("new_champion_list_size should not be negative")
+        
+        self._champion_list_size = new_champion_list_size
+
+    @property
+    def champion_lists_file(self):
+        """
+        The binary index with the champion lists, written next to the final index with the .champions suffix.
+        Its lexicon is the same path with .lexicon appended
+        """
+        return self._merge_index_file.with_suffix('.champions')
+
+    @champion_lists_file.setter
+    def champion_lists_file(self, new_champion_lists_file):
+        raise AttributeError("champion_lists_file is not writable")
+
+    @property
+    def champion_lexicon_file(self):
+        """
+        The lexicon of the champion lists
+        """
+        return self.champion_lists_file.with_name(self.champion_lists_file.name + '.lexicon')
+
+    @champion_lexicon_file.setter
+    def champion_lexicon_file(self, new_champion_lexicon_file):
+        raise AttributeError("champion_lexicon_file is not writable")
+
+    @property
+    def manifest_file(self):
+        """
+        The IndexManifest of the final index, written next to it with the .manifest suffix
+        """
+        return self._merge_index_file.with_suffix('.manifest')
+
+    @manifest_file.setter
+    def manifest_file(self, new_manifest_file):
+        raise AttributeError("manifest_file is not writable")
+
     @property
     def num_levels_run(self):
         """
@@ -64,13 +142,23 @@ class IndexMerger():
         self._curr_fake_level_for_dir_name = new_starting_merge_level
 
     def merge_pickle_files(self, file_list:list, max_mem_usage:int = 700 * MEGABYTE):
+        if len(file_list) == 0:
+            raise ValueError("file_list should have at least one sub index. Was the corpus empty?")
+
         self._clear_and_create_parents(self._merge_index_file)
+        self._clear_and_create_parents(self.lexicon_file)
+        self._clear_and_create_parents(self.champion_lists_file)
+        self._clear_and_create_parents(self.champion_lexicon_file)
+        self._clear_and_create_parents(self.manifest_file)
 
         total_files = len(file_list)
         
         curr_real_level = 0
         print("STARTING MERGE")
-        while self._should_merge_another_level(total_files):
+        #A single sub index still has to be rewritten as the final index
+        is_single_file = total_files == 1
+        while self._should_merge_another_level(total_files) or is_single_file:
+            is_single_file = False
             print(f"CURR Level real: {curr_real_level} fake: {self._curr_fake_level_for_dir_name}")
             start = timer()
             self._merge_level_files(file_list, max_mem_usage, self._curr_fake_level_for_dir_name)
@@ -145,8 +233,12 @@ class IndexMerger():
         curr_files_read = set()
 
         merged_index_file = 0
+        lexicon = None
+        champion_lexicon = None
         if is_last_level:
             merged_index_file = self._merge_index_file
+            lexicon = Lexicon()
+            champion_lexicon = Lexicon()
         else:
             level_dir_path = pathlib.Path(IndexMerger.LEVEL_DIR_FORMATER.format(level))
             level_dir_path.mkdir(parents=True, exist_ok=True)
@@ -171,7 +263,7 @@ class IndexMerger():
 
                     curr_mem_usage = psutil.Process(os.getpid()).memory_info().rss
                     if curr_mem_usage >= max_mem_usage:
-                        self._save_and_clear_index(merged_index, merged_index_file)
+                        self._save_and_clear_level_index(merged_index, merged_index_file, lexicon, champion_lexicon)
 
                     #Deletar do curr_token_per_file
                     del curr_token_per_file[curr_token]
@@ -183,7 +275,22 @@ class IndexMerger():
             for open_file in open_files_list:
                 open_file.close()
 
-        self._save_and_clear_index(merged_index, merged_index_file)
+        self._save_and_clear_level_index(merged_index, merged_index_file, lexicon, champion_lexicon)
+
+        if lexicon != None:
+            lexicon.save_to_pickle(self.lexicon_file)
+            self._save_manifest(lexicon)
+        if champion_lexicon != None and len(champion_lexicon) > 0:
+            champion_lexicon.save_to_pickle(self.champion_lexicon_file)
+
+    def _save_manifest(self, lexicon:Lexicon):
+        """
+        Writes the vocabulary statistics of the final index. The indexer adds the documents ones
+        """
+        manifest = IndexManifest()
+        manifest.set_vocabulary_stats(len(lexicon), sum(entry.df for _, entry in lexicon.items()))
+        manifest.update_build_params({'champion_list_size': self._champion_list_size})
+        manifest.save_to(self.manifest_file)
 
     def _merge_token_postings(self, curr_postings_from_files:dict, curr_files_read:set, idx_files_associated_with_token:list):
         all_token_postings = list()
@@ -227,9 +334,51 @@ class IndexMerger():
         
         return open_files_list
     
+    def _save_and_clear_level_index(self, index:dict, file:str, lexicon:Lexicon = None, champion_lexicon:Lexicon = None):
+        """
+        The final index (the one with a lexicon) is saved in the binary format. The intermediate ones are kept as pickle
+        """
+        if lexicon != None:
+            self._save_champion_lists(index, champion_lexicon)
+            self._save_and_clear_final_index(index, file, lexicon)
+        else:
+            self._save_and_clear_index(index, file)
+    
     def _save_and_clear_index(self, index:dict, file:str):
         with open(file, 'ab') as merged_index_file:
             for token, postings in index.items():
                 pickle.dump((token, postings), merged_index_file)
         
-        index.clear()
\ No newline at end of file
+        index.clear()
+    
+    def _save_and_clear_final_index(self, index:dict, file:str, lexicon:Lexicon):
+        """
+        Appends the index to the file in the binary format and records where each token was written
+        """
+        index_writer = BinaryIndexWriter()
+        with open(file, 'ab') as merged_index_file:
+            for token, postings in index.items():
+                postings_offset, postings_length = index_writer.write_postings(merged_index_file, postings)
+                lexicon.add(token, postings_offset, postings_length, len(postings))
+        
+        index.clear()
+
+    def _save_champion_lists(self, index:dict, champion_lexicon:Lexicon):
+        """
+        Appends the champion lists of the tokens of index to the champion lists file. Each one has the postings with
+        the highest frequencies, the lowest doc ids first on ties, sorted by doc id and without positions
+        """
+        champion_lists = [(token, self._get_champion_list_of(postings)) for token, postings in index.items()
+                            if self._champion_list_size > 0 and len(postings) > self._champion_list_size]
+        if len(champion_lists) == 0:
+            return
+        
+        index_writer = BinaryIndexWriter()
+        with open(self.champion_lists_file, 'ab') as champion_lists_file:
+            for token, champion_list in champion_lists:
+                postings_offset, postings_length = index_writer.write_postings(champion_lists_file, champion_list)
+                champion_lexicon.add(token, postings_offset, postings_length, len(champion_list))
+
+    def _get_champion_list_of(self, postings:list) -> list:
+        champion_postings = nlargest(self._champion_list_size, postings, key=lambda posting: (posting[1], -posting[0]))
+        return sorted((posting[0], posting[1]) for posting in champion_postings)
\ No newline at end of file
@@ -0,0 +1,154 @@
+from indexClasses.lexicon import Lexicon
+from indexClasses.binary_index import BinaryIndexWriter, BinaryIndexReader
+from indexClasses.bloom_filter import BloomFilter
+from indexClasses.manifest import IndexManifest
+from bisect import bisect_left
+import pathlib
+import json
+
+class IndexSharder():
+    """
+    Splits a final binary index in num_shards indexes of consecutive doc id ranges. Each shard is a binary index with
+    its own lexicon, a BloomFilter of its tokens and a copy of the collection manifest, so the idf of a shard is
+    the same of the whole index. The shards file lists the shards and their doc id ranges
+    """
+
+    BLOOM_FALSE_POSITIVE_RATE = 0.01
+    SHARD_SUFFIX = '.bin'
+
+    def __init__(self):
+        self._index_file = None #Path
+        self._num_shards = 2
+
+    @property
+    def index_file(self):
+        """
+        The final index to be split. Its lexicon is the same path with the .lexicon suffix
+        """
+        return self._index_file
+
+    @index_file.setter
+    def index_file(self, new_index_file):
+        if isinstance(new_index_file, str):
+            self._index_file = pathlib.Path(new_index_file)
+        elif isinstance(new_index_file, pathlib.Path):
+            self._index_file = new_index_file
+        else:
+            raise TypeError("new_index_file should be a str or pathlib.Path")
+
+    @property
+    def num_shards(self):
+        """
+        How many doc id ranges the index is split in
+        """
+        return self._num_shards
+
+    @num_shards.setter
+    def num_shards(self, new_num_shards:int):
+        if type(new_num_shards) != int:
+            raise TypeError("new_num_shards should be an int!")
+        if new_num_shards < 1:
+            raise ValueError("new_num_shards should be at least 1")
+
+        self._num_shards = new_num_shards
+
+    @property
+    def shards_file(self):
+        """
+        The JSON list of the shards, next to the index with the .shards suffix
+        """
+        return self._index_file.with_suffix('.shards')
+
+    @shards_file.setter
+    def shards_file(self, new_shards_file):
+        raise AttributeError("shards_file is not writable")
+
+    def get_shard_file(self, shard:int) -> pathlib.Path:
+        """
+        index.bin is split in index.shard0.bin, index.shard1.bin... Their lexicons, bloom filters and manifests
+        have the same name with the .lexicon, .bloom and .manifest suffixes. An index without a suffix gets
+        SHARD_SUFFIX, so the suffix replaced by those is never the shard number
+        """
+        suffix = self._index_file.suffix if self._index_file.suffix != '' else IndexSharder.SHARD_SUFFIX
+        return self._index_file.parent / f'{self._index_file.stem}.shard{shard}{suffix}'
+
+    def split(self) -> list:
+        """
+        Writes the shards and returns their files
+        """
+        lexicon = Lexicon()
+        lexicon.load_from(self._index_file.with_suffix('.lexicon'))
+        shard_files = [self.get_shard_file(shard) for shard in range(self._num_shards)]
+        shard_lexicons = [Lexicon() for _ in shard_files]
+        shard_bloom_filters = [BloomFilter.for_capacity(len(lexicon), IndexSharder.BLOOM_FALSE_POSITIVE_RATE)
+                                for _ in shard_files]
+        shard_num_postings = [0 for _ in shard_files]
+
+        index_writer = BinaryIndexWriter()
+        with BinaryIndexReader(self._index_file) as index_reader:
+            docs_per_shard = self._get_docs_per_shard(index_reader, lexicon)
+
+            shard_index_files = [open(shard_file, 'wb') for shard_file in shard_files]
+            try:
+                for token, lexicon_entry in lexicon.items():
+                    postings = index_reader.get_postings(lexicon_entry.offset, lexicon_entry.df, lexicon_entry.length).as_tuples()
+                    doc_ids = [posting[0] for posting in postings]
+
+                    shard_start = 0
+                    for shard, shard_index_file in enumerate(shard_index_files):
+                        shard_end = bisect_left(doc_ids, (shard + 1) * docs_per_shard, shard_start)
+                        if shard_end > shard_start:
+                            postings_offset, postings_length = index_writer.write_postings(shard_index_file,
+                                                                                            postings[shard_start:shard_end])
+                            shard_lexicons[shard].add(token, postings_offset, postings_length, shard_end - shard_start)
+                            shard_bloom_filters[shard].add(token)
+                            shard_num_postings[shard] += shard_end - shard_start
+                        shard_start = shard_end
+            finally:
+                for shard_index_file in shard_index_files:
+                    shard_index_file.close()
+
+        shards = list()
+        for shard, shard_file in enumerate(shard_files):
+            shard_lexicons[shard].save_to_pickle(shard_file.with_suffix('.lexicon'))
+            shard_bloom_filters[shard].save_to(shard_file.with_suffix('.bloom'))
+            self._save_shard_manifest(shard, shard_file, len(shard_lexicons[shard]), shard_num_postings[shard],
+                                        docs_per_shard)
+            shards.append({
+                'index_file': shard_file.name,
+                'first_doc_id': shard * docs_per_shard,
+                'last_doc_id': (shard + 1) * docs_per_shard - 1
+            })
+
+        with open(self.shards_file, 'w') as shards_file:
+            json.dump({'shards': shards}, shards_file, indent=4)
+
+        return shard_files
+
+    def _get_docs_per_shard(self, index_reader:BinaryIndexReader, lexicon:Lexicon) -> int:
+        max_doc_id = 0
+        for _, lexicon_entry in lexicon.items():
+            if lexicon_entry.df > 0:
+                max_doc_id = max(max_doc_id, index_reader.get_postings(lexicon_entry.offset, lexicon_entry.df).doc_ids[-1])
+
+        return (max_doc_id + self._num_shards) // self._num_shards
+
+    def _save_shard_manifest(self, shard:int, shard_file:pathlib.Path, shard_vocabulary_size:int,
+                                shard_num_postings:int, docs_per_shard:int):
+        """
+        The statistics are the ones of the whole collection, only the build params tell the shard apart
+        """
+        manifest = IndexManifest()
+        manifest_file = self._index_file.with_suffix('.manifest')
+        if manifest_file.exists():
+            manifest.load_from(manifest_file)
+
+        manifest.update_build_params({
+            'shard': shard,
+            'num_shards': self._num_shards,
+            'first_doc_id': shard * docs_per_shard,
+            'last_doc_id': (shard + 1) * docs_per_shard - 1,
+            'shard_vocabulary_size': shard_vocabulary_size,
+            'shard_postings': shard_num_postings
+        })
+        manifest.save_to(shard_file.with_suffix('.manifest'))
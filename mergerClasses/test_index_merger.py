@@ -1,4 +1,7 @@
-from index_merger import IndexMerger
+from mergerClasses.index_merger import IndexMerger
+from indexClasses.lexicon import Lexicon
+from indexClasses.binary_index import BinaryIndexReader, encode_positions
+from indexClasses.manifest import IndexManifest
 from unittest import TestCase, main
 import pathlib
 import pickle
@@ -9,6 +12,16 @@ class TestIndexMerger(TestCase):
         self.sub_indexes_dir.mkdir(exist_ok=True)
         self.index_merger = IndexMerger()
 
+    def load_merged_index(self, merged_file_path:pathlib.Path) -> list:
+        lexicon = Lexicon()
+        lexicon.load_from(self.index_merger.lexicon_file)
+
+        with BinaryIndexReader(merged_file_path) as index_reader:
+            loaded_index = [(token, index_reader.get_postings(entry.offset, entry.df, entry.length).as_tuples()) 
+                                for token, entry in lexicon.items()]
+        
+        return loaded_index
+
     def create_sub_indexes(self):
         sub_indexes = [
             [
@@ -35,7 +48,7 @@ class TestIndexMerger(TestCase):
     def test_merge_sub_index_files(self):
         self.create_sub_indexes()
         sub_indexes_files = [self.sub_indexes_dir / f'sub_index_{i}.pickle' for i in range(1, 3)]
-        merged_file_path = self.sub_indexes_dir / 'final_index/merged_index.pickle'
+        merged_file_path = self.sub_indexes_dir / 'final_index/merged_index.bin'
         self.index_merger.merge_index_file = merged_file_path
         self.index_merger.merge_pickle_files(sub_indexes_files)
         expected_merged_index = [
@@ -45,13 +58,7 @@ class TestIndexMerger(TestCase):
             ('E', [(2, 5), (4, 9), (5, 5), (7, 2), (9, 2), (10, 1)])
         ]
 
-        loaded_index = list()
-        with open(merged_file_path,'rb') as merged_file:
-            while True:
-                try:
-                    loaded_index.append(pickle.load(merged_file))
-                except EOFError:
-                    break
+        loaded_index = self.load_merged_index(merged_file_path)
         
         self.assertListEqual(expected_merged_index, loaded_index)
 
@@ -62,10 +69,130 @@ class TestIndexMerger(TestCase):
         if merged_file_path.exists():
             merged_file_path.unlink()
     
+    def test_merge_writes_lexicon(self):
+        self.create_sub_indexes()
+        sub_indexes_files = [self.sub_indexes_dir / f'sub_index_{i}.pickle' for i in range(1, 3)]
+        merged_file_path = self.sub_indexes_dir / 'final_index/merged_index.bin'
+        self.index_merger.merge_index_file = merged_file_path
+        self.index_merger.merge_pickle_files(sub_indexes_files)
+
+        lexicon = Lexicon()
+        lexicon.load_from(self.index_merger.lexicon_file)
+        self.assertListEqual(lexicon.terms, ['A', 'B', 'C', 'E'])
+
+        lexicon_entry = lexicon.get('C')
+        with BinaryIndexReader(merged_file_path) as index_reader:
+            postings = index_reader.get_postings(lexicon_entry.offset, lexicon_entry.df).as_tuples()
+        
+        self.assertListEqual(postings, [(1, 6), (3, 2), (4, 1), (7, 6), (8, 5), (10, 3)])
+        self.assertEqual(lexicon_entry.df, 6)
+
+        for file in sub_indexes_files + [merged_file_path, self.index_merger.lexicon_file]:
+            if file.exists():
+                file.unlink()
+    
+    def test_merge_writes_manifest(self):
+        self.create_sub_indexes()
+        sub_indexes_files = [self.sub_indexes_dir / f'sub_index_{i}.pickle' for i in range(1, 3)]
+        merged_file_path = self.sub_indexes_dir / 'final_index/merged_index.bin'
+        self.index_merger.merge_index_file = merged_file_path
+        self.index_merger.merge_pickle_files(sub_indexes_files)
+
+        manifest = IndexManifest()
+        manifest.load_from(self.index_merger.manifest_file)
+        self.assertEqual(manifest.vocabulary_size, 4)
+        self.assertEqual(manifest.total_postings, 17)
+        self.assertEqual(manifest.build_params['champion_list_size'], IndexMerger.CHAMPION_LIST_SIZE)
+
+        for file in sub_indexes_files + [merged_file_path, self.index_merger.lexicon_file, self.index_merger.manifest_file]:
+            if file.exists():
+                file.unlink()
+
+    def test_merge_single_sub_index_file(self):
+        self.create_sub_indexes()
+        sub_indexes_files = [self.sub_indexes_dir / 'sub_index_1.pickle']
+        merged_file_path = self.sub_indexes_dir / 'final_index/merged_index.bin'
+        self.index_merger.merge_index_file = merged_file_path
+        self.index_merger.merge_pickle_files(sub_indexes_files)
+        expected_merged_index = [
+            ('A',[(1, 2), (2, 4), (5, 6)]),
+            ('C', [(1, 6), (3, 2), (4, 1)]),
+            ('E', [(2, 5), (4, 9),(5, 5)])
+        ]
+
+        self.assertListEqual(expected_merged_index, self.load_merged_index(merged_file_path))
+
+        for file in sub_indexes_files + [merged_file_path, self.index_merger.lexicon_file]:
+            if file.exists():
+                file.unlink()
+    
+    def test_merge_no_sub_index_files(self):
+        merged_file_path = self.sub_indexes_dir / 'final_index/merged_index.bin'
+        self.index_merger.merge_index_file = merged_file_path
+        with self.assertRaises(ValueError):
+            self.index_merger.merge_pickle_files([])
+
+    def test_merge_keeps_positions(self):
+        sub_indexes = [
+            [('A', [(1, 2, encode_positions([0, 4])), (3, 1, encode_positions([7]))])],
+            [('A', [(2, 3, encode_positions([1, 2, 300]))]), ('B', [(2, 1, encode_positions([0]))])]
+        ]
+        sub_indexes_files = [self.sub_indexes_dir / f'sub_index_{i}.pickle' for i in range(1, 3)]
+        for sub_index, sub_index_file_name in zip(sub_indexes, sub_indexes_files):
+            with open(sub_index_file_name, 'wb') as sub_index_file:
+                for token_postings_tuple in sub_index:
+                    pickle.dump(token_postings_tuple, sub_index_file)
+        
+        merged_file_path = self.sub_indexes_dir / 'final_index/merged_index.bin'
+        self.index_merger.merge_index_file = merged_file_path
+        self.index_merger.merge_pickle_files(sub_indexes_files)
+        expected_merged_index = [
+            ('A', [(1, 2, encode_positions([0, 4])), (2, 3, encode_positions([1, 2, 300])), (3, 1, encode_positions([7]))]),
+            ('B', [(2, 1, encode_positions([0]))])
+        ]
+
+        self.assertListEqual(expected_merged_index, self.load_merged_index(merged_file_path))
+
+        for file in sub_indexes_files + [merged_file_path, self.index_merger.lexicon_file]:
+            if file.exists():
+                file.unlink()
+    
+    def test_merge_writes_champion_lists(self):
+        self.create_sub_indexes()
+        sub_indexes_files = [self.sub_indexes_dir / f'sub_index_{i}.pickle' for i in range(1, 3)]
+        merged_file_path = self.sub_indexes_dir / 'final_index/merged_index.bin'
+        self.index_merger.merge_index_file = merged_file_path
+        self.index_merger.champion_list_size = 2
+        self.index_merger.merge_pickle_files(sub_indexes_files)
+
+        champion_lexicon = Lexicon()
+        champion_lexicon.load_from(self.index_merger.champion_lexicon_file)
+        with BinaryIndexReader(self.index_merger.champion_lists_file) as index_reader:
+            champion_lists = [(token, index_reader.get_postings(entry.offset, entry.df, entry.length).as_tuples()) 
+                                for token, entry in champion_lexicon.items()]
+        expected_champion_lists = [
+            ('A', [(2, 4), (5, 6)]),
+            ('C', [(1, 6), (7, 6)]),
+            ('E', [(2, 5), (4, 9)])
+        ]
+
+        self.assertListEqual(expected_champion_lists, champion_lists)
+
+        for file in sub_indexes_files + [merged_file_path, self.index_merger.lexicon_file, 
+                                            self.index_merger.champion_lists_file, self.index_merger.champion_lexicon_file]:
+            if file.exists():
+                file.unlink()
+
+    def test_champion_list_size_validation(self):
+        with self.assertRaises(TypeError):
+            self.index_merger.champion_list_size = '2'
+        with self.assertRaises(ValueError):
+            self.index_merger.champion_list_size = -1
+
     def test_merge_sub_index_files_mem_limit(self):
         self.create_sub_indexes()
         sub_indexes_files = [self.sub_indexes_dir / f'sub_index_{i}.pickle' for i in range(1, 3)]
-        merged_file_path = self.sub_indexes_dir / 'final_index/merged_index.pickle'
+        merged_file_path = self.sub_indexes_dir / 'final_index/merged_index.bin'
         max_mem_usage = 10 * 1024 * 1024
         self.index_merger.merge_index_file = merged_file_path
         self.index_merger.merge_pickle_files(sub_indexes_files, max_mem_usage)
@@ -76,13 +203,7 @@ class TestIndexMerger(TestCase):
             ('E', [(2, 5), (4, 9), (5, 5), (7, 2), (9, 2), (10, 1)])
         ]
 
-        loaded_index = list()
-        with open(merged_file_path,'rb') as merged_file:
-            while True:
-                try:
-                    loaded_index.append(pickle.load(merged_file))
-                except EOFError:
-                    break
+        loaded_index = self.load_merged_index(merged_file_path)
         
         self.assertListEqual(expected_merged_index, loaded_index)
 
@@ -98,7 +219,7 @@ class TestIndexMerger(TestCase):
         self.index_merger.max_files_opened_at_once = 2
 
         sub_indexes_files = [self.sub_indexes_dir / f'sub_index_{i}.pickle' for i in range(1, 6)]
-        merged_file_path = self.sub_indexes_dir / 'final_index/merged_index.pickle'
+        merged_file_path = self.sub_indexes_dir / 'final_index/merged_index.bin'
         self.index_merger.merge_index_file = merged_file_path
         max_mem_usage = 10 * 1024 * 1024
         
@@ -112,13 +233,7 @@ class TestIndexMerger(TestCase):
             ('E', [(2, 5), (4, 9), (5, 5), (7, 2), (9, 2), (10, 1), (21, 7), (23, 9)])
         ]
 
-        loaded_index = list()
-        with open(merged_file_path,'rb') as merged_file:
-            while True:
-                try:
-                    loaded_index.append(pickle.load(merged_file))
-                except EOFError:
-                    break
+        loaded_index = self.load_merged_index(merged_file_path)
         
         self.assertListEqual(expected_merged_index, loaded_index)
 
@@ -173,7 +288,7 @@ class TestIndexMerger(TestCase):
         first_merged_files_dir.mkdir(parents=True, exist_ok=True)
 
         sub_indexes_files = [first_merged_files_dir / f'sub_index_{i}.pickle' for i in range(1, 6)]
-        merged_file_path = self.sub_indexes_dir / 'final_index/merged_index.pickle'
+        merged_file_path = self.sub_indexes_dir / 'final_index/merged_index.bin'
         self.index_merger.merge_index_file = merged_file_path
         max_mem_usage = 10 * 1024 * 1024
         
@@ -187,13 +302,7 @@ class TestIndexMerger(TestCase):
             ('E', [(2, 5), (4, 9), (5, 5), (7, 2), (9, 2), (10, 1), (21, 7), (23, 9)])
         ]
 
-        loaded_index = list()
-        with open(merged_file_path,'rb') as merged_file:
-            while True:
-                try:
-                    loaded_index.append(pickle.load(merged_file))
-                except EOFError:
-                    break
+        loaded_index = self.load_merged_index(merged_file_path)
         
         self.assertListEqual(expected_merged_index, loaded_index)
 
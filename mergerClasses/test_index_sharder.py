@@ -0,0 +1,119 @@
+from mergerClasses.index_merger import IndexMerger
+from mergerClasses.index_sharder import IndexSharder
+from indexClasses.lexicon import Lexicon
+from indexClasses.binary_index import BinaryIndexReader
+from indexClasses.bloom_filter import BloomFilter
+from indexClasses.manifest import IndexManifest
+from unittest import TestCase, main
+import pathlib
+import pickle
+import json
+
+class TestIndexSharder(TestCase):
+    def setUp(self):
+        self.sub_indexes_dir = pathlib.Path("subindexes")
+        self.sub_indexes_dir.mkdir(exist_ok=True)
+        self.index_sharder = IndexSharder()
+
+    def create_merged_index(self, merged_file_name:str = 'merged_index.bin') -> pathlib.Path:
+        sub_indexes = [
+            [
+                ('A',[(1, 2), (2, 4), (5, 6)]),
+                ('C', [(1, 6), (3, 2), (4, 1)]),
+                ('E', [(2, 5), (4, 9),(5, 5)])
+            ],
+            [
+                ('B', [(6,5), (8,6)]),
+                ('C', [(7, 6), (8, 5), (10, 3)]),
+                ('E', [(7, 2), (9, 2), (10, 1)])
+            ]
+        ]
+        sub_indexes_files = [self.sub_indexes_dir / f'sub_index_{i}.pickle' for i in range(1, len(sub_indexes)+1)]
+        for sub_index, sub_index_file_name in zip(sub_indexes, sub_indexes_files):
+            with open(sub_index_file_name,'wb') as sub_index_file:
+                for token_postings_tuple in sub_index:
+                    pickle.dump(token_postings_tuple, sub_index_file)
+
+        merged_file_path = self.sub_indexes_dir / 'final_index' / merged_file_name
+        index_merger = IndexMerger()
+        index_merger.merge_index_file = merged_file_path
+        index_merger.merge_pickle_files(sub_indexes_files)
+        
+        for sub_index_file_name in sub_indexes_files:
+            sub_index_file_name.unlink()
+        return merged_file_path
+
+    def load_shard(self, shard_file:pathlib.Path) -> list:
+        lexicon = Lexicon()
+        lexicon.load_from(shard_file.with_suffix('.lexicon'))
+
+        with BinaryIndexReader(shard_file) as index_reader:
+            return [(token, index_reader.get_postings(entry.offset, entry.df, entry.length).as_tuples()) 
+                        for token, entry in lexicon.items()]
+
+    def test_split_by_doc_id_range(self):
+        merged_file_path = self.create_merged_index()
+        self.index_sharder.index_file = merged_file_path
+        self.index_sharder.num_shards = 2
+        shard_files = self.index_sharder.split()
+
+        self.assertListEqual(shard_files, [merged_file_path.with_name('merged_index.shard0.bin'), 
+                                            merged_file_path.with_name('merged_index.shard1.bin')])
+        expected_shards = [
+            [
+                ('A',[(1, 2), (2, 4), (5, 6)]),
+                ('C', [(1, 6), (3, 2), (4, 1)]),
+                ('E', [(2, 5), (4, 9),(5, 5)])
+            ],
+            [
+                ('B', [(6,5), (8,6)]),
+                ('C', [(7, 6), (8, 5), (10, 3)]),
+                ('E', [(7, 2), (9, 2), (10, 1)])
+            ]
+        ]
+        self.assertListEqual([self.load_shard(shard_file) for shard_file in shard_files], expected_shards)
+
+        bloom_filter = BloomFilter()
+        bloom_filter.load_from(shard_files[1].with_suffix('.bloom'))
+        for token in ['B', 'C', 'E']:
+            self.assertIn(token, bloom_filter)
+
+        manifest = IndexManifest()
+        manifest.load_from(shard_files[1].with_suffix('.manifest'))
+        self.assertEqual(manifest.vocabulary_size, 4)
+        self.assertEqual(manifest.build_params['shard_vocabulary_size'], 3)
+        self.assertEqual(manifest.build_params['first_doc_id'], 6)
+
+        with open(self.index_sharder.shards_file, 'r') as shards_file:
+            shards = json.load(shards_file)['shards']
+        self.assertListEqual([shard['index_file'] for shard in shards], [shard_file.name for shard_file in shard_files])
+
+        for file in merged_file_path.parent.iterdir():
+            file.unlink()
+
+    def test_split_index_without_suffix(self):
+        merged_file_path = self.create_merged_index('merged_index')
+        self.index_sharder.index_file = merged_file_path
+        self.index_sharder.num_shards = 2
+        shard_files = self.index_sharder.split()
+
+        self.assertListEqual(shard_files, [merged_file_path.with_name('merged_index.shard0.bin'),
+                                            merged_file_path.with_name('merged_index.shard1.bin')])
+        shards_derived_files = {shard_file.with_suffix(suffix) for shard_file in shard_files 
+                                    for suffix in ['.lexicon', '.bloom', '.manifest']}
+        self.assertEqual(len(shards_derived_files), 6)
+        self.assertNotIn(merged_file_path.with_suffix('.lexicon'), shards_derived_files)
+        self.assertNotIn(merged_file_path.with_suffix('.manifest'), shards_derived_files)
+        self.assertListEqual([self.load_shard(shard_file)[0][0] for shard_file in shard_files], ['A', 'B'])
+
+        for file in merged_file_path.parent.iterdir():
+            file.unlink()
+
+    def test_num_shards_validation(self):
+        with self.assertRaises(TypeError):
+            self.index_sharder.num_shards = '2'
+        with self.assertRaises(ValueError):
+            self.index_sharder.num_shards = 0
+
+if __name__ == '__main__':
+    main()
@@ -19,6 +19,16 @@ class TextParser():
         tokens = None
         return dict(token_frequency.items())
     
+    @classmethod
+    def get_positions_of(cls, text:str) -> dict:
+        """
+        Maps each token to the sorted positions where it happens among the tokens kept by pre_proccess
+        """
+        token_positions = dict()
+        for position, token in enumerate(TextParser.pre_proccess(text)):
+            token_positions.setdefault(token, []).append(position)
+        return token_positions
+    
     @classmethod
     def pre_proccess(cls, text:str) -> list:
 
@@ -74,6 +74,19 @@ class TestTextParser(TestCase):
         text='  O pêlo no pé do\n Pedro é preto   \n'
         self.assertTrue(len(TextParser.get_distribuition_of(text).keys()) > 0)
     
+    def test_get_positions(self):
+        text = 'Uvas e bananas uva Banana'
+
+        token_positions = {
+            'uva': [0, 2],
+            'banan': [1, 3]
+        }
+
+        self.assertDictEqual(TextParser.get_positions_of(text), token_positions)
+
+    def test_get_positions_empty_str(self):
+        self.assertDictEqual(TextParser.get_positions_of(""), {})
+
     def test_pre_proccess_type_error(self):
         self.assertRaises(TypeError, TextParser.pre_proccess, ['teste1','teste2'])
     
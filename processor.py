@@ -1,21 +1,66 @@
 # You can (and must) freely edit this file (add libraries, functions and calls) to implement your query processor
 import argparse
 import logging
+from indexClasses.binary_index import PostingCursor
 from queryProcessingClasses.queryProcess import QueryProcessor
+from queryProcessingClasses.query_server import QueryServer
+from queryProcessingClasses.query_timings import TimingsSummary
 import json
 
 def main(my_args):
     query_processor = QueryProcessor()
 
     query_processor.index_file_path = my_args.index_path
+    query_processor.scoring_method = my_args.ranker
+    query_processor.evaluator = my_args.evaluator
+    query_processor.query_mode = my_args.query_mode
+    query_processor.postings_budget = my_args.postings_budget
+    query_processor.use_champion_lists = my_args.use_champion_lists
+    query_processor.num_processes = my_args.num_processes
+    query_processor.posting_list_cache_bytes = my_args.cache_mb * 2**20
+    query_processor.result_cache_size = my_args.result_cache_size
+    query_processor.collect_timings = my_args.timings
+    query_processor.use_shards = my_args.use_shards
+    query_processor.max_wildcard_expansions = my_args.max_wildcard_expansions
+    query_processor.planner_tolerance = my_args.planner_tolerance
+    query_processor.planner_action = my_args.planner_action
+    query_processor.stream_postings = my_args.stream_postings
+
+    if my_args.serve_address != None:
+        serve(query_processor, my_args.serve_address)
+        return
 
     queries_list = list()
     with open(my_args.queries_path, 'r') as queries_file:
         queries_list = [query for query in queries_file]
     
-    responses = query_processor.process_queries(queries_list)
+    try:
+        if my_args.batch:
+            responses = query_processor.process_queries_in_batch(queries_list)
+        else:
+            responses = query_processor.process_queries(queries_list)
+    finally:
+        query_processor.close()
     for response in responses:
         print(json.dumps(response, ensure_ascii=False, indent=3))
+    logging.info(f"Posting list cache: {query_processor.posting_list_cache.get_stats()}")
+    logging.info(f"Result cache: {query_processor.result_cache.get_stats()}")
+
+    if my_args.timings:
+        timings_summary = TimingsSummary()
+        timings_summary.add_results(f"{my_args.ranker}/{my_args.evaluator}", responses)
+        print(json.dumps({'Timings summary': timings_summary.get_summary()}, indent=3))
+
+def serve(query_processor:QueryProcessor, address:str):
+    query_processor.load()
+    query_server = QueryServer(query_processor)
+    logging.info(f"Serving queries at {address}")
+    try:
+        query_server.serve_forever(address)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        query_server.close()
 
 def configArgs(parser):
     parser.add_argument(
@@ -30,19 +75,143 @@ def configArgs(parser):
         '-q',
         dest='queries_path',
         action='store',
-        required=True,
-        help='path to a queries file'
+        required=False,
+        help='path to a queries file. Required if not using --serve'
     )
 
     parser.add_argument(
         '-r',
         dest='ranker',
         action='store',
-        choices=['BM25', 'TFIDF'],
+        choices=['BM25', 'TFIDF', 'TFIDF_NORM'],
         required=True,
-        help='the ranker'
+        help='the ranker. TFIDF_NORM is TFIDF normalized by the doc lengths'
+    )
+
+    parser.add_argument(
+        '-e',
+        dest='evaluator',
+        action='store',
+        choices=QueryProcessor.EVALUATORS,
+        default='MAXSCORE',
+        help='the query evaluator. DAAT scores every document, MAXSCORE and BMW (Block-Max WAND) skip documents that can not get to the top, TAAT scores whole lists at once with NumPy, SAAT reads the impact index written by indexer.py --impact from the highest impacts down'
+    )
+
+    parser.add_argument(
+        '--postings-budget',
+        dest='postings_budget',
+        action='store',
+        type=int,
+        default=0,
+        help='how many postings SAAT reads per query before answering. 0 reads all of them'
+    )
+
+    parser.add_argument(
+        '--planner-tolerance',
+        dest='planner_tolerance',
+        action='store',
+        type=float,
+        default=0,
+        help='terms whose highest score is under this fraction of the one of the strongest term of the query are handled by --planner-action. 0 evaluates every term'
+    )
+
+    parser.add_argument(
+        '--planner-action',
+        dest='planner_action',
+        action='store',
+        choices=QueryProcessor.PLANNER_ACTIONS,
+        default='DEMOTE',
+        help='DEMOTE only adds the score of the planned out terms to the docs of the other terms. DROP leaves them out'
+    )
+
+    parser.add_argument(
+        '--stream-postings',
+        dest='stream_postings',
+        action='store_true',
+        help=f'release the pages of the inverted lists already walked by the query, keeping about {PostingCursor.RELEASE_CHUNK_SIZE} postings of each list in memory. Only available with -e {", ".join(QueryProcessor.STREAMING_EVALUATORS)}'
+    )
+
+    parser.add_argument(
+        '-t',
+        dest='use_champion_lists',
+        action='store_true',
+        help='answer from the champion lists written by the merger first, reading the full lists only when needed'
+    )
+
+    parser.add_argument(
+        '-m',
+        dest='query_mode',
+        action='store',
+        choices=QueryProcessor.QUERY_MODES,
+        default='DISJUNCTIVE',
+        help='how queries are read. BOOLEAN accepts AND, OR, NOT and parentheses. PHRASE needs an index built with -p. Outside PHRASE, a term like inform* matches the index tokens starting with inform'
+    )
+
+    parser.add_argument(
+        '-s',
+        dest='use_shards',
+        action='store_true',
+        help='answer each query in the shards written by the indexer with --shards, one process each, and merge their top docs'
+    )
+
+    parser.add_argument(
+        '--max-expansions',
+        dest='max_wildcard_expansions',
+        action='store',
+        type=int,
+        default=QueryProcessor.MAX_WILDCARD_EXPANSIONS,
+        help='how many index tokens a wildcard term like inform* matches at most, keeping the ones in the most docs'
+    )
+
+    parser.add_argument(
+        '-b',
+        dest='batch',
+        action='store_true',
+        help='answer all queries together, fetching each inverted list and url only once'
+    )
+
+    parser.add_argument(
+        '-w',
+        dest='num_processes',
+        action='store',
+        type=int,
+        default=0,
+        help='answer the queries with this many worker processes instead of threads'
     )
 
+    parser.add_argument(
+        '-c',
+        dest='cache_mb',
+        action='store',
+        type=int,
+        default=QueryProcessor.POSTING_LIST_CACHE_BYTES // 2**20,
+        help='megabytes of decoded inverted lists kept in memory between queries. Only used by indexes without a lexicon, the lists of a binary index are memory mapped. 0 disables the cache'
+    )
+
+    parser.add_argument(
+        '--result-cache',
+        dest='result_cache_size',
+        action='store',
+        type=int,
+        default=QueryProcessor.RESULT_CACHE_SIZE,
+        help='how many query results are kept. Queries with the same stemmed tokens share a result. 0 disables the cache'
+    )
+
+    parser.add_argument(
+        '--timings',
+        dest='timings',
+        action='store_true',
+        help='add the time of each stage and the postings read and docs scored to each result, and print their p50, p95 and p99 after the run. Not available with -b'
+    )
+
+    parser.add_argument(
+        '--serve',
+        dest='serve_address',
+        action='store',
+        required=False,
+        default=None,
+        help='keep running and serve JSON lines queries at HOST:PORT or at a Unix socket path'
+    )
     
     return parser
 
@@ -53,5 +222,13 @@ if __name__ == "__main__":
     filename="log.log", filemode="w")
 
     my_args = parser.parse_args()
+    if my_args.queries_path == None and my_args.serve_address == None:
+        parser.error("one of -q or --serve is required")
+    if my_args.timings and my_args.batch:
+        parser.error("--timings is not available with -b")
+    if my_args.batch and my_args.num_processes > 0:
+        parser.error("-w is not available with -b")
+    if my_args.stream_postings and my_args.evaluator not in QueryProcessor.STREAMING_EVALUATORS:
+        parser.error(f"--stream-postings is only available with -e {', '.join(QueryProcessor.STREAMING_EVALUATORS)}")
 
     main(my_args)
\ No newline at end of file
@@ -0,0 +1,138 @@
+from queryProcessingClasses.queryProcess import QueryProcessor, process_queries_in_batch_in_worker
+from concurrent.futures import Executor, ProcessPoolExecutor
+import asyncio
+
+class AsyncSearcher():
+    """
+    asyncio front end of a QueryProcessor:
+        results = await searcher.search(query)
+    Queries awaited together are answered as one batch by QueryProcessor.process_queries_in_batch, so their inverted
+    lists and urls are read only once. Batches run in executor, leaving the event loop free for other queries.
+    executor defaults to the loop default one. A ProcessPoolExecutor should come from QueryProcessor.make_process_pool
+    """
+
+    MAX_BATCH_SIZE = 64
+
+    def __init__(self, query_processor:QueryProcessor, executor:Executor = None, max_batch_size:int = MAX_BATCH_SIZE,
+                    batch_wait:float = 0):
+        if type(max_batch_size) != int:
+            raise TypeError("max_batch_size should be an int")
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size should be at least 1")
+
+        self._query_processor = query_processor
+        self._executor = executor
+        self._max_batch_size = max_batch_size
+        self._batch_wait = batch_wait
+        self._pending_queries = list()
+        self._batching_task = None
+        self._batch_tasks = set()
+
+    @property
+    def query_processor(self):
+        """
+        The QueryProcessor answering the queries
+        """
+        return self._query_processor
+
+    @query_processor.setter
+    def query_processor(self, new_query_processor):
+        raise AttributeError("query_processor is not writable")
+
+    @property
+    def executor(self):
+        """
+        Where the batches run. None is the event loop default executor
+        """
+        return self._executor
+
+    @executor.setter
+    def executor(self, new_executor):
+        raise AttributeError("executor is not writable")
+
+    @property
+    def max_batch_size(self):
+        """
+        The most queries answered together
+        """
+        return self._max_batch_size
+
+    @max_batch_size.setter
+    def max_batch_size(self, new_max_batch_size):
+        raise AttributeError("max_batch_size is not writable")
+
+    async def load(self):
+        """
+        QueryProcessor.load in the executor. Not needed by process pools, as their workers load on start
+        """
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._query_processor.load)
+
+    async def search(self, query:str) -> dict:
+        """
+        The same dict of QueryProcessor.process_query
+        """
+        loop = asyncio.get_running_loop()
+        result_future = loop.create_future()
+        self._pending_queries.append((query, result_future))
+        if self._batching_task == None:
+            self._batching_task = loop.create_task(self._make_batches())
+
+        return await result_future
+
+    async def search_many(self, queries_list:list) -> list:
+        """
+        The results in the same order of queries_list
+        """
+        return await asyncio.gather(*(self.search(query) for query in queries_list))
+
+    async def _make_batches(self):
+        """
+        Waits for the queries of the current loop iteration, or batch_wait seconds, and starts a batch for each
+        max_batch_size of them
+        """
+        await asyncio.sleep(self._batch_wait)
+
+        pending_queries = self._pending_queries
+        self._pending_queries = list()
+        self._batching_task = None
+
+        loop = asyncio.get_running_loop()
+        for batch_start in range(0, len(pending_queries), self._max_batch_size):
+            batch_task = loop.create_task(self._run_batch(pending_queries[batch_start:batch_start + self._max_batch_size]))
+            self._batch_tasks.add(batch_task)
+            batch_task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, batch:list):
+        queries_list = [query for query, _ in batch]
+        try:
+            queries_results = await self._process_in_executor(queries_list)
+        except Exception:
+            queries_results = await self._process_each_in_executor(queries_list)
+
+        for (_, result_future), query_result in zip(batch, queries_results):
+            if result_future.done():
+                continue
+            if isinstance(query_result, Exception):
+                result_future.set_exception(query_result)
+            else:
+                result_future.set_result(query_result)
+
+    async def _process_each_in_executor(self, queries_list:list) -> list:
+        """
+        Used when a batch fails, so only the queries that can not be answered get the exception
+        """
+        queries_results = list()
+        for query in queries_list:
+            try:
+                queries_results.append((await self._process_in_executor([query]))[0])
+            except Exception as e:
+                queries_results.append(e)
+
+        return queries_results
+
+    async def _process_in_executor(self, queries_list:list) -> list:
+        loop = asyncio.get_running_loop()
+        if isinstance(self._executor, ProcessPoolExecutor):
+            return await loop.run_in_executor(self._executor, process_queries_in_batch_in_worker, queries_list)
+
+        return await loop.run_in_executor(self._executor, self._query_processor.process_queries_in_batch, queries_list)
@@ -0,0 +1,106 @@
+from queryProcessingClasses.evaluator import Evaluator
+
+class BlockMaxWANDEvaluator(Evaluator):
+    """
+    Document at a time evaluation with Block-Max WAND dynamic pruning. Gives the same ranking of DAATEvaluator.
+    Lists are sorted by their current doc id and the pivot is the first doc whose lists upper bounds summed can beat
+    the current top TOP_N_DOCS threshold. Before scoring the pivot, the maximum frequency of the blocks holding it
+    gives a tighter bound. If this bound can not beat the threshold, every doc up to the end of the shortest
+    of these blocks is skipped.
+    demoted_inverted_lists never give a pivot. Their upper bounds are added to every bound and they are only
+    searched for the pivots scored, so the ranking is the same of DemotedEvaluator
+    """
+
+    def __init__(self, scoring_function, upper_bound_function, demoted_inverted_lists:list = None):
+        super().__init__()
+        self._scoring_function = scoring_function
+        self._upper_bound_function = upper_bound_function
+        self._demoted_inverted_lists = demoted_inverted_lists if demoted_inverted_lists != None else list()
+
+    def rank(self, inverted_lists_of_interest:list) -> list:
+        scoring_function = self._scoring_function
+        upper_bound_function = self._upper_bound_function
+        top_scored_docs = list()
+
+        demoted_cursors = self._get_cursors(self._demoted_inverted_lists)
+        demoted_upper_bound = sum(upper_bound_function(cursor.posting_list, cursor.posting_list.max_frequency) 
+                                    for cursor in demoted_cursors)
+
+        upper_bounds = [upper_bound_function(inverted_list, inverted_list.max_frequency) 
+                            for inverted_list in inverted_lists_of_interest]
+        block_upper_bounds = [[upper_bound_function(inverted_list, block_max_frequency) 
+                                for block_max_frequency in inverted_list.block_max_frequencies]
+                                    for inverted_list in inverted_lists_of_interest]
+        cursors = self._get_cursors(inverted_lists_of_interest)
+        threshold = None
+        live_inv_lists_idx = [inv_list_idx for inv_list_idx, cursor in enumerate(cursors) if not cursor.is_exhausted()]
+
+        def curr_doc_id_of(inv_list_idx:int) -> int:
+            return cursors[inv_list_idx].doc
+
+        while len(live_inv_lists_idx) > 0:
+            live_inv_lists_idx.sort(key=curr_doc_id_of)
+
+            pivot = self._find_pivot(live_inv_lists_idx, upper_bounds, threshold, demoted_upper_bound)
+            if pivot == None:
+                break
+
+            pivot_doc_id = curr_doc_id_of(live_inv_lists_idx[pivot])
+            while pivot + 1 < len(live_inv_lists_idx) and curr_doc_id_of(live_inv_lists_idx[pivot + 1]) == pivot_doc_id:
+                pivot += 1
+
+            block_upper_bound = demoted_upper_bound
+            next_candidate_doc_id = None
+            if pivot + 1 < len(live_inv_lists_idx):
+                next_candidate_doc_id = curr_doc_id_of(live_inv_lists_idx[pivot + 1])
+            for inv_list_idx in live_inv_lists_idx[:pivot + 1]:
+                cursor = cursors[inv_list_idx]
+                block = cursor.find_block_of(pivot_doc_id)
+                if block < cursor.posting_list.num_blocks:
+                    block_upper_bound += block_upper_bounds[inv_list_idx][block]
+                    block_end_doc_id = cursor.posting_list.block_last_doc_ids[block] + 1
+                    if next_candidate_doc_id == None or block_end_doc_id < next_candidate_doc_id:
+                        next_candidate_doc_id = block_end_doc_id
+
+            if self._cant_reach_threshold(block_upper_bound, threshold):
+                advanced_inv_lists_idx = live_inv_lists_idx[:pivot + 1]
+                target_doc_id = next_candidate_doc_id
+            elif curr_doc_id_of(live_inv_lists_idx[0]) == pivot_doc_id:
+                final_doc_score = 0
+                for inv_list_idx in sorted(live_inv_lists_idx[:pivot + 1]):
+                    cursor = cursors[inv_list_idx]
+                    final_doc_score += scoring_function(cursor.posting_list, cursor.freq, pivot_doc_id)
+                for cursor in demoted_cursors:
+                    if cursor.next_geq(pivot_doc_id) == pivot_doc_id:
+                        final_doc_score += scoring_function(cursor.posting_list, cursor.freq, pivot_doc_id)
+                self._add_doc_to_ranking(top_scored_docs, pivot_doc_id, final_doc_score)
+                if len(top_scored_docs) == Evaluator.TOP_N_DOCS:
+                    threshold = top_scored_docs[0][0]
+
+                advanced_inv_lists_idx = live_inv_lists_idx[:pivot + 1]
+                target_doc_id = pivot_doc_id + 1
+            else:
+                advanced_inv_lists_idx = [inv_list_idx for inv_list_idx in live_inv_lists_idx[:pivot] 
+                                            if curr_doc_id_of(inv_list_idx) < pivot_doc_id]
+                target_doc_id = pivot_doc_id
+
+            for inv_list_idx in advanced_inv_lists_idx:
+                cursors[inv_list_idx].next_geq(target_doc_id)
+            live_inv_lists_idx = [inv_list_idx for inv_list_idx in live_inv_lists_idx 
+                                    if not cursors[inv_list_idx].is_exhausted()]
+
+        return sorted(top_scored_docs, reverse=True)
+
+    def _find_pivot(self, inv_lists_idx_by_doc_id:list, upper_bounds:list, threshold:float, 
+                    base_upper_bound:float = 0) -> int:
+        """
+        Returns the position of the first list whose upper bound summed with the ones before it and base_upper_bound
+        can beat the threshold. Returns None if no doc left can get to the top
+        """
+        accumulated_upper_bound = base_upper_bound
+        for pivot, inv_list_idx in enumerate(inv_lists_idx_by_doc_id):
+            accumulated_upper_bound += upper_bounds[inv_list_idx]
+            if not self._cant_reach_threshold(accumulated_upper_bound, threshold):
+                return pivot
+        
+        return None
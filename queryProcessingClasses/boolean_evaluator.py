@@ -0,0 +1,26 @@
+from queryProcessingClasses.evaluator import Evaluator
+
+class BooleanEvaluator(Evaluator):
+    """
+    Scores only the docs matching a boolean or phrase query, with the inverted lists of its tokens that are not negated.
+    The matching docs are sorted, so each list is only walked forward
+    """
+
+    def __init__(self, matching_doc_ids, scoring_function):
+        super().__init__()
+        self._matching_doc_ids = matching_doc_ids
+        self._scoring_function = scoring_function
+
+    def rank(self, inverted_lists_of_interest:list) -> list:
+        top_scored_docs = list()
+
+        cursors = self._get_cursors(inverted_lists_of_interest)
+        for doc_id in self._matching_doc_ids:
+            final_doc_score = 0
+            for cursor in cursors:
+                if cursor.next_geq(doc_id) == doc_id:
+                    final_doc_score += self._scoring_function(cursor.posting_list, cursor.freq, doc_id)
+            
+            self._add_doc_to_ranking(top_scored_docs, doc_id, final_doc_score)
+
+        return sorted(top_scored_docs, reverse=True)
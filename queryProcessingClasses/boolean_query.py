@@ -0,0 +1,268 @@
+from parserClasses.myparser import TextParser
+from collections import namedtuple
+from bisect import bisect_left
+from heapq import merge
+from array import array
+import re
+
+TermNode = namedtuple('TermNode', 'token')
+AndNode = namedtuple('AndNode', 'children')
+OrNode = namedtuple('OrNode', 'children')
+NotNode = namedtuple('NotNode', 'child')
+
+DOC_ID_TYPE = 'I'
+
+def galloping_search(doc_ids, doc_id:int, lo:int = 0) -> int:
+    """
+    Returns the position of the first doc id not smaller than doc_id, starting at lo.
+    The searched range doubles until it passes doc_id, so the cost depends on how far the answer is from lo
+    """
+    num_doc_ids = len(doc_ids)
+    if lo >= num_doc_ids or doc_ids[lo] >= doc_id:
+        return lo
+
+    step = 1
+    hi = lo + step
+    while hi < num_doc_ids and doc_ids[hi] < doc_id:
+        lo = hi
+        step *= 2
+        hi = lo + step
+
+    return bisect_left(doc_ids, doc_id, lo + 1, min(hi + 1, num_doc_ids))
+
+def intersect(shorter_doc_ids, longer_doc_ids) -> array:
+    common_doc_ids = array(DOC_ID_TYPE)
+    pos = 0
+    num_longer_doc_ids = len(longer_doc_ids)
+    for doc_id in shorter_doc_ids:
+        pos = galloping_search(longer_doc_ids, doc_id, pos)
+        if pos == num_longer_doc_ids:
+            break
+        if longer_doc_ids[pos] == doc_id:
+            common_doc_ids.append(doc_id)
+            pos += 1
+
+    return common_doc_ids
+
+def difference(doc_ids, removed_doc_ids) -> array:
+    remaining_doc_ids = array(DOC_ID_TYPE)
+    pos = 0
+    for doc_id in doc_ids:
+        pos = galloping_search(removed_doc_ids, doc_id, pos)
+        if pos == len(removed_doc_ids) or removed_doc_ids[pos] != doc_id:
+            remaining_doc_ids.append(doc_id)
+
+    return remaining_doc_ids
+
+def union(doc_ids_lists:list) -> array:
+    united_doc_ids = array(DOC_ID_TYPE)
+    for doc_id in merge(*doc_ids_lists):
+        if len(united_doc_ids) == 0 or united_doc_ids[-1] != doc_id:
+            united_doc_ids.append(doc_id)
+
+    return united_doc_ids
+
+class BooleanQuery():
+    """
+    A query with the AND, OR and NOT operators and parentheses. Operators should be written in upper case.
+    Terms not separated by an operator are joined by AND and AND binds tighter than OR, so
+        animes 2022 OR (cruzeiro AND NOT clube)
+    is (animes AND 2022) OR (cruzeiro AND NOT clube).
+    Each term is pre processed by TextParser like any other query. Terms that turn into no token, like stopwords,
+    are ignored and terms that turn into many tokens require all of them.
+    NOT should be joined by AND to a term that is not negated, as the documents without a term are not known.
+    expand_wildcard, if given, gets each term before pre processing and returns the tokens it stands for, which are
+    joined by OR, or None if it is not a wildcard term
+    """
+
+    OPERATORS = ('AND', 'OR', 'NOT')
+    QUERY_TOKENS_PATTERN = re.compile(r'\(|\)|[^\s()]+')
+
+    def __init__(self, query:str, expand_wildcard = None):
+        if type(query) != str:
+            raise TypeError("query should be a str")
+
+        self._query_tokens = BooleanQuery.QUERY_TOKENS_PATTERN.findall(query)
+        self._pos = 0
+        self._expand_wildcard = expand_wildcard
+        self._root = self._parse_or()
+        self._expand_wildcard = None
+        if self._pos < len(self._query_tokens):
+            raise ValueError(f"unexpected '{self._query_tokens[self._pos]}' in boolean query")
+
+        self._check_negations(self._root)
+
+    @property
+    def root(self):
+        """
+        The root node of the parsed query. None if no term was left after pre processing
+        """
+        return self._root
+
+    @root.setter
+    def root(self, new_root):
+        raise AttributeError("root is not writable")
+
+    @property
+    def tokens(self):
+        """
+        The sorted tokens of the query, negated or not
+        """
+        tokens = set()
+        self._collect_tokens(self._root, tokens, True)
+        return sorted(tokens)
+
+    @tokens.setter
+    def tokens(self, new_tokens):
+        raise AttributeError("tokens is not writable")
+
+    @property
+    def positive_tokens(self):
+        """
+        The sorted tokens of the query that are not negated. Only these score the matching documents
+        """
+        tokens = set()
+        self._collect_tokens(self._root, tokens, False)
+        return sorted(tokens)
+
+    @positive_tokens.setter
+    def positive_tokens(self, new_positive_tokens):
+        raise AttributeError("positive_tokens is not writable")
+
+    def matching_doc_ids(self, inverted_lists_by_token:dict):
+        """
+        Returns the sorted doc ids matching the query. inverted_lists_by_token maps each token to its PostingList.
+        Tokens not in it match no document
+        """
+        if self._root == None:
+            return array(DOC_ID_TYPE)
+        return self._evaluate(self._root, inverted_lists_by_token)
+
+    def _evaluate(self, node, inverted_lists_by_token:dict):
+        if type(node) == TermNode:
+            inverted_list = inverted_lists_by_token.get(node.token, None)
+            if inverted_list == None:
+                return array(DOC_ID_TYPE)
+            return inverted_list.doc_ids
+        elif type(node) == OrNode:
+            return union([self._evaluate(child, inverted_lists_by_token) for child in node.children])
+        elif type(node) == AndNode:
+            return self._evaluate_and(node, inverted_lists_by_token)
+        else:
+            raise ValueError("NOT should be joined by AND to a term that is not negated")
+
+    def _evaluate_and(self, node:AndNode, inverted_lists_by_token:dict):
+        """
+        Intersects the shortest lists first, so each intersection walks the smallest possible candidate set
+        """
+        positive_doc_ids = [self._evaluate(child, inverted_lists_by_token)
+                                for child in node.children if type(child) != NotNode]
+        positive_doc_ids.sort(key=len)
+
+        matching_doc_ids = positive_doc_ids[0]
+        for doc_ids in positive_doc_ids[1:]:
+            if len(matching_doc_ids) == 0:
+                break
+            matching_doc_ids = intersect(matching_doc_ids, doc_ids)
+
+        for child in node.children:
+            if type(child) == NotNode and len(matching_doc_ids) > 0:
+                matching_doc_ids = difference(matching_doc_ids, self._evaluate(child.child, inverted_lists_by_token))
+
+        return matching_doc_ids
+
+    def _collect_tokens(self, node, tokens:set, with_negated:bool):
+        if type(node) == TermNode:
+            tokens.add(node.token)
+        elif type(node) == NotNode:
+            if with_negated:
+                self._collect_tokens(node.child, tokens, with_negated)
+        elif node != None:
+            for child in node.children:
+                self._collect_tokens(child, tokens, with_negated)
+
+    def _check_negations(self, node):
+        if type(node) == NotNode:
+            raise ValueError("NOT should be joined by AND to a term that is not negated")
+        elif type(node) == AndNode:
+            if all(type(child) == NotNode for child in node.children):
+                raise ValueError("NOT should be joined by AND to a term that is not negated")
+            for child in node.children:
+                self._check_negations(child.child if type(child) == NotNode else child)
+        elif type(node) == OrNode:
+            for child in node.children:
+                self._check_negations(child)
+
+    def _peek(self) -> str:
+        if self._pos < len(self._query_tokens):
+            return self._query_tokens[self._pos]
+        return None
+
+    def _parse_or(self):
+        children = [self._parse_and()]
+        while self._peek() == 'OR':
+            self._pos += 1
+            children.append(self._parse_and())
+
+        return self._join(OrNode, children)
+
+    def _parse_and(self):
+        children = [self._parse_not()]
+        while self._peek() not in (None, 'OR', ')'):
+            if self._peek() == 'AND':
+                self._pos += 1
+            children.append(self._parse_not())
+
+        return self._join(AndNode, children)
+
+    def _parse_not(self):
+        if self._peek() == 'NOT':
+            self._pos += 1
+            child = self._parse_not()
+            if child == None:
+                return None
+            elif type(child) == NotNode:
+                return child.child
+            return NotNode(child)
+
+        return self._parse_term()
+
+    def _parse_term(self):
+        query_token = self._peek()
+        if query_token == None or query_token in BooleanQuery.OPERATORS or query_token == ')':
+            raise ValueError(f"expected a term or '(' but got {query_token if query_token != None else 'the end'}")
+
+        self._pos += 1
+        if query_token == '(':
+            node = self._parse_or()
+            if self._peek() != ')':
+                raise ValueError("missing ')' in boolean query")
+            self._pos += 1
+            return node
+
+        expanded_tokens = self._expand_wildcard(query_token) if self._expand_wildcard != None else None
+        if expanded_tokens != None:
+            if len(expanded_tokens) == 0:
+                return TermNode(query_token)
+            return self._join(OrNode, [TermNode(token) for token in expanded_tokens])
+
+        return self._join(AndNode, [TermNode(token) for token in TextParser.pre_proccess(query_token)])
+
+    def _join(self, node_type, children:list):
+        """
+        Drops the empty children and flattens the ones of the same type
+        """
+        joined_children = list()
+        for child in children:
+            if child == None:
+                continue
+            elif type(child) == node_type:
+                joined_children.extend(child.children)
+            else:
+                joined_children.append(child)
+
+        if len(joined_children) == 0:
+            return None
+        elif len(joined_children) == 1:
+            return joined_children[0]
+        return node_type(tuple(joined_children))
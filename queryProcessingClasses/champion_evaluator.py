@@ -0,0 +1,73 @@
+from queryProcessingClasses.evaluator import Evaluator
+
+class ChampionEvaluator(Evaluator):
+    """
+    Answers from the first tier, the champion list of each token or its full list when it has none.
+    A posting left out of a champion list has at most the lowest frequency kept in it, so each doc found in the
+    first tier gets an upper bound. Docs are scored with the full lists from the highest upper bound down until
+    no other can get to the top. rank returns None, so the full lists are evaluated, if a doc missing from every
+    champion list could still get to the top.
+    demoted_inverted_lists have no champion lists. Their upper bounds are added to every doc bound and they are
+    only searched for the docs scored
+    """
+
+    def __init__(self, champion_lists:list, scoring_function, upper_bound_function, demoted_inverted_lists:list = None):
+        super().__init__()
+        self._champion_lists = champion_lists
+        self._scoring_function = scoring_function
+        self._upper_bound_function = upper_bound_function
+        self._demoted_inverted_lists = demoted_inverted_lists if demoted_inverted_lists != None else list()
+
+    def rank(self, inverted_lists_of_interest:list) -> list:
+        champion_lists = self._champion_lists
+        demoted_inverted_lists = self._demoted_inverted_lists
+        scoring_function = self._scoring_function
+        upper_bound_function = self._upper_bound_function
+        demoted_upper_bound = sum(upper_bound_function(inverted_list, inverted_list.max_frequency) 
+                                    for inverted_list in demoted_inverted_lists)
+
+        missing_upper_bounds = list()
+        for inverted_list, champion_list in zip(inverted_lists_of_interest, champion_lists):
+            if champion_list == None:
+                missing_upper_bounds.append(0)
+            else:
+                missing_upper_bounds.append(upper_bound_function(inverted_list, min(champion_list.frequencies)))
+        total_missing_upper_bound = sum(missing_upper_bounds)
+
+        frequencies_by_doc_id = dict()
+        upper_bounds_by_doc_id = dict()
+        for inv_list_idx, (inverted_list, champion_list) in enumerate(zip(inverted_lists_of_interest, champion_lists)):
+            first_tier_list = champion_list if champion_list != None else inverted_list
+            for doc_id, frequency in zip(first_tier_list.doc_ids, first_tier_list.frequencies):
+                frequencies_by_doc_id.setdefault(doc_id, dict())[inv_list_idx] = frequency
+                upper_bounds_by_doc_id[doc_id] = (upper_bounds_by_doc_id.get(doc_id, 
+                                                                            total_missing_upper_bound + demoted_upper_bound) 
+                                                    - missing_upper_bounds[inv_list_idx]
+                                                    + scoring_function(inverted_list, frequency, doc_id))
+
+        top_scored_docs = list()
+        for doc_id in sorted(upper_bounds_by_doc_id, key=lambda doc_id: upper_bounds_by_doc_id[doc_id], reverse=True):
+            threshold = top_scored_docs[0][0] if len(top_scored_docs) == Evaluator.TOP_N_DOCS else None
+            if self._cant_reach_threshold(upper_bounds_by_doc_id[doc_id], threshold):
+                break
+
+            final_doc_score = 0
+            for inv_list_idx, inverted_list in enumerate(inverted_lists_of_interest):
+                frequency = frequencies_by_doc_id[doc_id].get(inv_list_idx, None)
+                if frequency == None and champion_lists[inv_list_idx] != None:
+                    frequency = self._find_frequency_of(inverted_list, doc_id)
+                if frequency != None:
+                    final_doc_score += scoring_function(inverted_list, frequency, doc_id)
+            for inverted_list in demoted_inverted_lists:
+                frequency = self._find_frequency_of(inverted_list, doc_id)
+                if frequency != None:
+                    final_doc_score += scoring_function(inverted_list, frequency, doc_id)
+            
+            self._add_doc_to_ranking(top_scored_docs, doc_id, final_doc_score)
+
+        if total_missing_upper_bound > 0:
+            threshold = top_scored_docs[0][0] if len(top_scored_docs) == Evaluator.TOP_N_DOCS else None
+            if not self._cant_reach_threshold(total_missing_upper_bound + demoted_upper_bound, threshold):
+                return None
+
+        return sorted(top_scored_docs, reverse=True)
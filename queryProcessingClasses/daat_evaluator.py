@@ -0,0 +1,40 @@
+from queryProcessingClasses.evaluator import Evaluator
+from indexClasses.binary_index import PostingCursor
+from heapq import heappush, heappop
+
+class DAATEvaluator(Evaluator):
+    """
+    Exhaustive document at a time evaluation. Every document of every list is scored
+    """
+
+    def __init__(self, scoring_function):
+        super().__init__()
+        self._scoring_function = scoring_function
+
+    def rank(self, inverted_lists_of_interest:list) -> list:
+        scoring_function = self._scoring_function
+        top_scored_docs = list()
+
+        cursors = self._get_cursors(inverted_lists_of_interest)
+        next_doc_ids_heap = self._get_next_doc_ids_heap(cursors, range(len(cursors)))
+
+        while len(next_doc_ids_heap) > 0:
+            smallest_doc_id = next_doc_ids_heap[0][0]
+
+            associated_inv_lists_idx = list()
+            while len(next_doc_ids_heap) > 0 and next_doc_ids_heap[0][0] == smallest_doc_id:
+                associated_inv_lists_idx.append(heappop(next_doc_ids_heap)[1])
+            associated_inv_lists_idx.sort()
+
+            final_doc_score = 0
+            for inv_list_idx in associated_inv_lists_idx:
+                cursor = cursors[inv_list_idx]
+                final_doc_score += scoring_function(cursor.posting_list, cursor.freq, smallest_doc_id)
+
+                next_doc_id = cursor.next()
+                if next_doc_id != PostingCursor.END_OF_LIST:
+                    heappush(next_doc_ids_heap, (next_doc_id, inv_list_idx))
+        
+            self._add_doc_to_ranking(top_scored_docs, smallest_doc_id, final_doc_score)
+
+        return sorted(top_scored_docs, reverse=True)
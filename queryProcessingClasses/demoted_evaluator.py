@@ -0,0 +1,39 @@
+from queryProcessingClasses.evaluator import Evaluator
+from queryProcessingClasses.boolean_query import union
+
+class DemotedEvaluator(Evaluator):
+    """
+    Document at a time evaluation of a query with lists demoted by the query planner.
+    Only the docs in inverted_lists_of_interest are candidates. The demoted lists add their score to the candidates
+    they have, moving forward with next_geq, so most of their postings are skipped by the block pointers
+    """
+
+    def __init__(self, demoted_inverted_lists:list, scoring_function):
+        super().__init__()
+        self._demoted_inverted_lists = demoted_inverted_lists
+        self._scoring_function = scoring_function
+
+    def rank(self, inverted_lists_of_interest:list) -> list:
+        top_scored_docs = list()
+        num_probes = 0
+
+        cursors = self._get_cursors(inverted_lists_of_interest)
+        demoted_cursors = self._get_cursors(self._demoted_inverted_lists)
+        for doc_id in union([inverted_list.doc_ids for inverted_list in inverted_lists_of_interest]):
+            final_doc_score = 0
+            for cursor in cursors:
+                if cursor.next_geq(doc_id) == doc_id:
+                    final_doc_score += self._scoring_function(cursor.posting_list, cursor.freq, doc_id)
+            for cursor in demoted_cursors:
+                if not cursor.is_exhausted():
+                    num_probes += 1
+                    if cursor.next_geq(doc_id) == doc_id:
+                        final_doc_score += self._scoring_function(cursor.posting_list, cursor.freq, doc_id)
+            
+            self._add_doc_to_ranking(top_scored_docs, doc_id, final_doc_score)
+
+        if self._query_timings != None:
+            self._query_timings.add_postings_touched(sum(len(inverted_list) for inverted_list in inverted_lists_of_interest) 
+                                                        + num_probes)
+
+        return sorted(top_scored_docs, reverse=True)
@@ -0,0 +1,106 @@
+from indexClasses.binary_index import PostingList, PostingCursor
+from queryProcessingClasses.query_timings import QueryTimings
+from heapq import heapify, heappush, heapreplace
+import numpy as np
+
+class Evaluator():
+    """
+    Ranks the docs of the inverted lists of a query. rank returns the TOP_N_DOCS (score, doc_id) with the highest
+    scores, from the highest one, ties broken by the highest doc id.
+    What an evaluator needs besides the lists, like its scoring functions, is given when it is built, so QueryProcessor
+    builds one for each query
+    """
+
+    TOP_N_DOCS = 10
+    UPPER_BOUND_SLACK = 1e-9
+    DENSE_ACCUMULATOR_MIN_FILL = 1/16
+
+    def __init__(self):
+        self._stream_postings = False
+        self._query_timings = None
+
+    @property
+    def stream_postings(self):
+        """
+        If the cursors release the pages of the lists behind them. See QueryProcessor.stream_postings
+        """
+        return self._stream_postings
+
+    @stream_postings.setter
+    def stream_postings(self, new_stream_postings:bool):
+        if type(new_stream_postings) != bool:
+            raise TypeError("new_stream_postings should be a bool!")
+
+        self._stream_postings = new_stream_postings
+
+    @property
+    def query_timings(self):
+        """
+        The QueryTimings of the query being ranked, where the docs scored are counted. None if timings are not collected
+        """
+        return self._query_timings
+
+    @query_timings.setter
+    def query_timings(self, new_query_timings:QueryTimings):
+        if new_query_timings != None and not isinstance(new_query_timings, QueryTimings):
+            raise TypeError("new_query_timings should be a QueryTimings or None")
+
+        self._query_timings = new_query_timings
+
+    def rank(self, inverted_lists_of_interest:list) -> list:
+        raise NotImplementedError("rank should be implemented by each evaluator")
+
+    def _add_doc_to_ranking(self, top_scored_docs:list, doc_id, final_doc_score):
+        """
+        top_scored_docs is a min heap of at most TOP_N_DOCS (score, doc_id)
+        """
+        self._count_docs_scored(1)
+        if len(top_scored_docs) < Evaluator.TOP_N_DOCS:
+            heappush(top_scored_docs, (final_doc_score, doc_id))
+        elif (final_doc_score, doc_id) > top_scored_docs[0]:
+            heapreplace(top_scored_docs, (final_doc_score, doc_id))
+
+        return top_scored_docs
+
+    def _select_top_docs(self, candidate_doc_ids, candidate_scores) -> list:
+        """
+        argpartition finds the TOP_N_DOCS-th highest score. Ties with it are broken by the highest doc id, like
+        in _add_doc_to_ranking
+        """
+        self._count_docs_scored(len(candidate_scores))
+        num_top_docs = min(Evaluator.TOP_N_DOCS, len(candidate_scores))
+        kth_position = len(candidate_scores) - num_top_docs
+        kth_score = candidate_scores[np.argpartition(candidate_scores, kth_position)[kth_position]]
+
+        top_positions = np.flatnonzero(candidate_scores >= kth_score)
+        top_positions = top_positions[np.lexsort((candidate_doc_ids[top_positions], candidate_scores[top_positions]))]
+        top_positions = top_positions[::-1][:num_top_docs]
+
+        return [(float(candidate_scores[position]), int(candidate_doc_ids[position])) for position in top_positions]
+
+    def _count_docs_scored(self, num_docs:int):
+        if self._query_timings != None:
+            self._query_timings.add_docs_scored(num_docs)
+
+    def _cant_reach_threshold(self, upper_bound:float, threshold:float) -> bool:
+        """
+        Upper bounds are summed in a different order of the real scores, so a tiny slack is given to them
+        """
+        if threshold == None:
+            return False
+        return upper_bound * (1 + Evaluator.UPPER_BOUND_SLACK) < threshold
+
+    def _get_cursors(self, inverted_lists_of_interest:list) -> list:
+        return [PostingCursor(inverted_list, self._stream_postings) for inverted_list in inverted_lists_of_interest]
+
+    def _get_next_doc_ids_heap(self, cursors:list, inv_lists_idx:list) -> list:
+        next_doc_ids_heap = [(cursors[inv_list_idx].doc, inv_list_idx)
+                                for inv_list_idx in inv_lists_idx if not cursors[inv_list_idx].is_exhausted()]
+        heapify(next_doc_ids_heap)
+        return next_doc_ids_heap
+
+    def _find_frequency_of(self, inverted_list:PostingList, doc_id:int) -> int:
+        cursor = PostingCursor(inverted_list)
+        if cursor.next_geq(doc_id) == doc_id:
+            return cursor.freq
+        return None
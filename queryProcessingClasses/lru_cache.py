@@ -0,0 +1,112 @@
+from collections import OrderedDict
+from threading import Lock
+
+class LRUCache():
+    """
+    A thread safe cache that evicts the least recently used items once their total size goes past capacity.
+    The size of each item is given by size_function, so capacity may be a number of items or of bytes.
+    Items bigger than the whole capacity are not cached
+    """
+
+    def __init__(self, capacity:int, size_function = None):
+        if type(capacity) != int:
+            raise TypeError("capacity should be an int")
+        if capacity < 0:
+            raise ValueError("capacity should not be negative")
+
+        self._capacity = capacity
+        self._size_function = size_function if size_function != None else lambda value: 1
+        self._items = OrderedDict()
+        self._sizes = dict()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = Lock()
+
+    @property
+    def capacity(self):
+        """
+        The highest total size of the cached items
+        """
+        return self._capacity
+
+    @capacity.setter
+    def capacity(self, new_capacity):
+        raise AttributeError("capacity is not writable")
+
+    @property
+    def size(self):
+        """
+        The total size of the cached items
+        """
+        return self._size
+
+    @size.setter
+    def size(self, new_size):
+        raise AttributeError("size is not writable")
+
+    @property
+    def hits(self):
+        """
+        How many times get found the key
+        """
+        return self._hits
+
+    @hits.setter
+    def hits(self, new_hits):
+        raise AttributeError("hits is not writable")
+
+    @property
+    def misses(self):
+        """
+        How many times get did not find the key
+        """
+        return self._misses
+
+    @misses.setter
+    def misses(self, new_misses):
+        raise AttributeError("misses is not writable")
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key, default = None):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self._hits += 1
+                return self._items[key]
+
+            self._misses += 1
+            return default
+
+    def put(self, key, value):
+        item_size = self._size_function(value)
+        if item_size > self._capacity:
+            return
+
+        with self._lock:
+            if key in self._items:
+                self._remove(key)
+
+            self._items[key] = value
+            self._sizes[key] = item_size
+            self._size += item_size
+            while self._size > self._capacity:
+                self._remove(next(iter(self._items)))
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._sizes.clear()
+            self._size = 0
+
+    def get_stats(self) -> dict:
+        return {'Hits': self._hits, 'Misses': self._misses, 'Items': len(self._items), 'Size': self._size}
+
+    def _remove(self, key):
+        del self._items[key]
+        self._size -= self._sizes.pop(key)
@@ -0,0 +1,94 @@
+from queryProcessingClasses.evaluator import Evaluator
+from indexClasses.binary_index import PostingCursor
+from heapq import heappush, heappop
+
+class MaxScoreEvaluator(Evaluator):
+    """
+    Document at a time evaluation with MaxScore dynamic pruning. Gives the same ranking of DAATEvaluator.
+    Lists are sorted by their score upper bound. The lists whose upper bounds summed can not beat the current
+    top TOP_N_DOCS threshold are non essential: they never start a candidate and are only searched for
+    candidates of the essential lists, while their remaining upper bound can still take the candidate to the top.
+    demoted_inverted_lists are always non essential, so the ranking is the same of DemotedEvaluator
+    """
+
+    def __init__(self, scoring_function, upper_bound_function, demoted_inverted_lists:list = None):
+        super().__init__()
+        self._scoring_function = scoring_function
+        self._upper_bound_function = upper_bound_function
+        self._demoted_inverted_lists = demoted_inverted_lists if demoted_inverted_lists != None else list()
+
+    def rank(self, inverted_lists_of_interest:list) -> list:
+        scoring_function = self._scoring_function
+        upper_bound_function = self._upper_bound_function
+        top_scored_docs = list()
+        num_kept_inv_lists = len(inverted_lists_of_interest)
+        inverted_lists_of_interest = list(inverted_lists_of_interest) + list(self._demoted_inverted_lists)
+        num_inv_lists = len(inverted_lists_of_interest)
+
+        upper_bounds = [upper_bound_function(inverted_list, inverted_list.max_frequency) 
+                            for inverted_list in inverted_lists_of_interest]
+        upper_bound_of = lambda inv_list_idx: upper_bounds[inv_list_idx]
+        lists_by_upper_bound = (sorted(range(num_kept_inv_lists, num_inv_lists), key=upper_bound_of) 
+                                + sorted(range(num_kept_inv_lists), key=upper_bound_of))
+        
+        accumulated_upper_bounds = list()
+        accumulated_upper_bound = 0
+        for inv_list_idx in lists_by_upper_bound:
+            accumulated_upper_bound += upper_bounds[inv_list_idx]
+            accumulated_upper_bounds.append(accumulated_upper_bound)
+
+        cursors = self._get_cursors(inverted_lists_of_interest)
+        threshold = None
+        first_essential = num_inv_lists - num_kept_inv_lists
+        next_doc_ids_heap = self._get_next_doc_ids_heap(cursors, lists_by_upper_bound[first_essential:])
+
+        while len(next_doc_ids_heap) > 0:
+            candidate_doc_id = next_doc_ids_heap[0][0]
+
+            doc_scores = dict()
+            while len(next_doc_ids_heap) > 0 and next_doc_ids_heap[0][0] == candidate_doc_id:
+                inv_list_idx = heappop(next_doc_ids_heap)[1]
+                cursor = cursors[inv_list_idx]
+                doc_scores[inv_list_idx] = scoring_function(cursor.posting_list, cursor.freq, candidate_doc_id)
+
+                next_doc_id = cursor.next()
+                if next_doc_id != PostingCursor.END_OF_LIST:
+                    heappush(next_doc_ids_heap, (next_doc_id, inv_list_idx))
+            
+            candidate_upper_bound = sum(doc_scores.values())
+            if first_essential > 0:
+                candidate_upper_bound += accumulated_upper_bounds[first_essential-1]
+
+            for non_essential_idx in range(first_essential-1, -1, -1):
+                if self._cant_reach_threshold(candidate_upper_bound, threshold):
+                    break
+                
+                inv_list_idx = lists_by_upper_bound[non_essential_idx]
+                candidate_upper_bound -= upper_bounds[inv_list_idx]
+                
+                cursor = cursors[inv_list_idx]
+                if cursor.next_geq(candidate_doc_id) == candidate_doc_id:
+                    doc_score = scoring_function(cursor.posting_list, cursor.freq, candidate_doc_id)
+                    doc_scores[inv_list_idx] = doc_score
+                    candidate_upper_bound += doc_score
+            
+            if self._cant_reach_threshold(candidate_upper_bound, threshold):
+                continue
+
+            final_doc_score = 0
+            for inv_list_idx in sorted(doc_scores.keys()):
+                final_doc_score += doc_scores[inv_list_idx]
+            self._add_doc_to_ranking(top_scored_docs, candidate_doc_id, final_doc_score)
+
+            if len(top_scored_docs) == Evaluator.TOP_N_DOCS:
+                threshold = top_scored_docs[0][0]
+                new_first_essential = first_essential
+                while (new_first_essential < num_inv_lists and 
+                        self._cant_reach_threshold(accumulated_upper_bounds[new_first_essential], threshold)):
+                    new_first_essential += 1
+                
+                if new_first_essential != first_essential:
+                    first_essential = new_first_essential
+                    next_doc_ids_heap = self._get_next_doc_ids_heap(cursors, lists_by_upper_bound[first_essential:])
+
+        return sorted(top_scored_docs, reverse=True)
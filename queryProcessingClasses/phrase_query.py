@@ -0,0 +1,95 @@
+from parserClasses.myparser import TextParser
+from queryProcessingClasses.boolean_query import intersect, DOC_ID_TYPE
+from indexClasses.binary_index import PostingCursor
+from array import array
+
+class PhraseQuery():
+    """
+    A query whose tokens should happen one right after the other in a doc. Quotes around it are optional.
+    Positions only count the tokens kept by TextParser, so stopwords inside the phrase are skipped on both sides.
+    The inverted lists are intersected first and the positions are only decoded for the docs with every token
+    """
+
+    def __init__(self, query:str):
+        if type(query) != str:
+            raise TypeError("query should be a str")
+
+        self._tokens = list(TextParser.pre_proccess(query.replace('"', ' ')))
+
+    @property
+    def tokens(self):
+        """
+        The tokens of the phrase in order, repeated tokens included
+        """
+        return self._tokens
+
+    @tokens.setter
+    def tokens(self, new_tokens):
+        raise AttributeError("tokens is not writable")
+
+    @property
+    def distinct_tokens(self):
+        """
+        The sorted distinct tokens of the phrase
+        """
+        return sorted(set(self._tokens))
+
+    @distinct_tokens.setter
+    def distinct_tokens(self, new_distinct_tokens):
+        raise AttributeError("distinct_tokens is not writable")
+
+    def matching_doc_ids(self, inverted_lists_by_token:dict):
+        """
+        Returns the sorted doc ids with the phrase. inverted_lists_by_token maps each token to its positional PostingList
+        """
+        if len(self._tokens) == 0 or any(token not in inverted_lists_by_token for token in self._tokens):
+            return array(DOC_ID_TYPE)
+
+        inverted_lists = [inverted_lists_by_token[token] for token in self.distinct_tokens]
+        if not all(inverted_list.has_positions for inverted_list in inverted_lists):
+            raise ValueError("phrase queries need an index with positions")
+
+        candidate_doc_ids = self._intersect_all(inverted_lists)
+        if len(self._tokens) == 1:
+            return candidate_doc_ids
+
+        cursors = {token: PostingCursor(inverted_lists_by_token[token]) for token in self.distinct_tokens}
+        matching_doc_ids = array(DOC_ID_TYPE)
+        for doc_id in candidate_doc_ids:
+            positions_by_token = dict()
+            for token, cursor in cursors.items():
+                cursor.next_geq(doc_id)
+                positions_by_token[token] = cursor.positions
+
+            if self._has_phrase(positions_by_token):
+                matching_doc_ids.append(doc_id)
+
+        return matching_doc_ids
+
+    def _intersect_all(self, inverted_lists:list):
+        """
+        Intersects the shortest lists first
+        """
+        doc_ids_lists = sorted((inverted_list.doc_ids for inverted_list in inverted_lists), key=len)
+        candidate_doc_ids = doc_ids_lists[0]
+        for doc_ids in doc_ids_lists[1:]:
+            if len(candidate_doc_ids) == 0:
+                break
+            candidate_doc_ids = intersect(candidate_doc_ids, doc_ids)
+
+        return candidate_doc_ids
+
+    def _has_phrase(self, positions_by_token:dict) -> bool:
+        """
+        Keeps the positions where the phrase may start, checking the rarest tokens of the phrase first
+        """
+        phrase_offsets = sorted(range(len(self._tokens)), key=lambda offset: len(positions_by_token[self._tokens[offset]]))
+
+        first_offset = phrase_offsets[0]
+        phrase_starts = {position - first_offset for position in positions_by_token[self._tokens[first_offset]]}
+        for offset in phrase_offsets[1:]:
+            phrase_starts.intersection_update(position - offset for position in positions_by_token[self._tokens[offset]])
+            if len(phrase_starts) == 0:
+                return False
+
+        return True
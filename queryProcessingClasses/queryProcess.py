@@ -1,19 +1,92 @@
 from parserClasses.myparser import TextParser
-from math import log
+from indexClasses.lexicon import Lexicon
+from indexClasses.binary_index import BinaryIndexReader, PostingList
+from indexClasses.doc_table import DocTable
+from indexClasses.doc_lengths import DocLengthTable
+from indexClasses.impact_index import ImpactIndexWriter, ImpactIndexReader
+from indexClasses.manifest import IndexManifest
+from indexClasses.bloom_filter import BloomFilter
+from queryProcessingClasses.boolean_query import BooleanQuery
+from queryProcessingClasses.phrase_query import PhraseQuery
+from queryProcessingClasses.lru_cache import LRUCache
+from queryProcessingClasses.query_timings import QueryTimings
+from queryProcessingClasses.scorer import Scorer
+from queryProcessingClasses.evaluator import Evaluator
+from queryProcessingClasses.daat_evaluator import DAATEvaluator
+from queryProcessingClasses.max_score_evaluator import MaxScoreEvaluator
+from queryProcessingClasses.block_max_wand_evaluator import BlockMaxWANDEvaluator
+from queryProcessingClasses.taat_evaluator import TAATEvaluator
+from queryProcessingClasses.saat_evaluator import SAATEvaluator
+from queryProcessingClasses.champion_evaluator import ChampionEvaluator
+from queryProcessingClasses.boolean_evaluator import BooleanEvaluator
+from queryProcessingClasses.demoted_evaluator import DemotedEvaluator
+import numpy as np
+from heapq import nlargest
+from collections import namedtuple
+from bisect import bisect_left
+from threading import Lock, local
+from contextlib import nullcontext
 import pathlib
 import pickle
-from concurrent.futures import ThreadPoolExecutor as Executor, as_completed
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor as Executor, ProcessPoolExecutor, as_completed
+
+IndexShard = namedtuple('IndexShard', 'index_file_path bloom_filter executor')
+QueryPlan = namedtuple('QueryPlan', 'tokens inverted_lists demoted_inverted_lists estimated_postings')
 
 class QueryProcessor():
     
-    TOP_N_DOCS = 10
-    SCORING_METHODS = ('TFIDF', 'BM25')
+    TOP_N_DOCS = Evaluator.TOP_N_DOCS
+    SCORING_METHODS = Scorer.SCORING_METHODS
+    EVALUATORS = ('DAAT', 'MAXSCORE', 'BMW', 'TAAT', 'SAAT')
+    STREAMING_EVALUATORS = ('DAAT', 'MAXSCORE', 'BMW')
+    QUERY_MODES = ('DISJUNCTIVE', 'BOOLEAN', 'PHRASE')
+    PLANNER_ACTIONS = ('DEMOTE', 'DROP')
+    POSTING_LIST_CACHE_BYTES = 64 * 2**20
+    RESULT_CACHE_SIZE = 10000
+    DEFAULT_NUM_DOCS = 960000
+    MAX_WILDCARD_EXPANSIONS = 50
+    WILDCARD_PATTERN = re.compile(r'(\w+)\*')
 
     def __init__(self):
         self._index_file_path = None
+        self._lexicon_file_path = None
+        self._lexicon = None
+        self._index_reader = None
+        self._lexicon_lock = Lock()
+        self._impact_index_file_path = None
+        self._impact_lexicon = None
+        self._impact_index_reader = None
+        self._postings_budget = 0
+        self._use_champion_lists = False
+        self._champion_lexicon = None
+        self._champion_lists_reader = None
         self._scoring_method = 'TFIDF'
-        self._number_of_documents_in_index = 960000
+        self._evaluator = 'MAXSCORE'
+        self._query_mode = 'DISJUNCTIVE'
+        self._number_of_documents_in_index = QueryProcessor.DEFAULT_NUM_DOCS
+        self._num_docs_was_set = False
+        self._manifest = None
         self._doc_id_to_url_file_path = pathlib.Path('id_to_doc/id_to_doc_map.pickle')
+        self._doc_table_file_path = None
+        self._doc_table = None
+        self._doc_lengths_file_path = None
+        self._doc_lengths = None
+        self._urls_mapping = None
+        self._docs_info_lock = Lock()
+        self._num_processes = 0
+        self._posting_list_cache = self._make_posting_list_cache(QueryProcessor.POSTING_LIST_CACHE_BYTES)
+        self._result_cache = LRUCache(QueryProcessor.RESULT_CACHE_SIZE)
+        self._collect_timings = False
+        self._thread_state = local()
+        self._use_shards = False
+        self._shards = None
+        self._shards_lock = Lock()
+        self._max_wildcard_expansions = QueryProcessor.MAX_WILDCARD_EXPANSIONS
+        self._planner_tolerance = 0
+        self._planner_action = 'DEMOTE'
+        self._stream_postings = False
     
     @property
     def index_file_path(self):
@@ -30,11 +103,68 @@ class QueryProcessor():
             self._index_file_path = new_index_file_path
         else:
             raise TypeError("new_index_file_path should be a str or a pathlib.Path!")
+        
+        self._close_index_readers()
+        self._manifest = None
+        if self._doc_table_file_path == None:
+            self._close_doc_table()
+        if self._doc_lengths_file_path == None:
+            self._doc_lengths = None
+        if not self._num_docs_was_set:
+            self._number_of_documents_in_index = QueryProcessor.DEFAULT_NUM_DOCS
+        self._close_shards(wait=False)
+        self._result_cache.clear()
+    
+    @property
+    def lexicon_file_path(self):
+        """
+        The lexicon of the index file. Defaults to the index file path with the .lexicon suffix
+        """
+        if self._lexicon_file_path == None and self._index_file_path != None:
+            return self._index_file_path.with_suffix('.lexicon')
+        
+        return self._lexicon_file_path
+    
+    @lexicon_file_path.setter
+    def lexicon_file_path(self, new_lexicon_file_path):
+        if type(new_lexicon_file_path) == str:
+            self._lexicon_file_path = pathlib.Path(new_lexicon_file_path)
+        elif isinstance(new_lexicon_file_path, pathlib.Path):
+            self._lexicon_file_path = new_lexicon_file_path
+        else:
+            raise TypeError("new_lexicon_file_path should be a str or a pathlib.Path!")
+        
+        self._close_index_readers()
+        self._result_cache.clear()
     
+    @property
+    def impact_index_file_path(self):
+        """
+        The impact ordered index used by the SAAT evaluator. Defaults to the index file path with the .impact suffix.
+        Its lexicon is the same path with .lexicon appended
+        """
+        if self._impact_index_file_path == None and self._index_file_path != None:
+            return self._index_file_path.with_suffix('.impact')
+        
+        return self._impact_index_file_path
+    
+    @impact_index_file_path.setter
+    def impact_index_file_path(self, new_impact_index_file_path):
+        if type(new_impact_index_file_path) == str:
+            self._impact_index_file_path = pathlib.Path(new_impact_index_file_path)
+        elif isinstance(new_impact_index_file_path, pathlib.Path):
+            self._impact_index_file_path = new_impact_index_file_path
+        else:
+            raise TypeError("new_impact_index_file_path should be a str or a pathlib.Path!")
+        
+        self._close_impact_index_reader()
+        self._result_cache.clear()
+
     @property
     def scoring_method(self):
         """
-        The documents scoring method. Should be one of: {TFIDF, BM25}
+        The documents scoring method. Should be one of: {TFIDF, TFIDF_NORM, BM25}. TFIDF_NORM is TFIDF with pivoted
+        doc length normalization
         """
         return self._scoring_method
     
@@ -45,19 +175,318 @@ class QueryProcessor():
         else:
             raise ValueError(f"new_scoring_method should be one of {QueryProcessor.SCORING_METHODS}")
     
+    @property
+    def evaluator(self):
+        """
+        How the documents are evaluated. Should be one of: {DAAT, MAXSCORE, BMW, TAAT, SAAT}. DAAT scores every document and
+        is kept to compare against the pruned evaluators. TAAT scores every document too, a whole list at a time with NumPy.
+        SAAT reads the impact index from the highest impacts down and may stop early, see postings_budget
+        """
+        return self._evaluator
+    
+    @evaluator.setter
+    def evaluator(self, new_evaluator:str):
+        if new_evaluator in QueryProcessor.EVALUATORS:
+            self._evaluator = new_evaluator
+        else:
+            raise ValueError(f"new_evaluator should be one of {QueryProcessor.EVALUATORS}")
+    
+    @property
+    def query_mode(self):
+        """
+        How queries are read. Should be one of: {DISJUNCTIVE, BOOLEAN, PHRASE}. DISJUNCTIVE ranks every document with any
+        query token. BOOLEAN and PHRASE read the query as a BooleanQuery or a PhraseQuery and only rank the documents
+        matching it. PHRASE needs an index with positions
+        """
+        return self._query_mode
+    
+    @query_mode.setter
+    def query_mode(self, new_query_mode:str):
+        if new_query_mode in QueryProcessor.QUERY_MODES:
+            self._query_mode = new_query_mode
+        else:
+            raise ValueError(f"new_query_mode should be one of {QueryProcessor.QUERY_MODES}")
+
+    @property
+    def postings_budget(self):
+        """
+        How many postings the SAAT evaluator reads per query before stopping. 0 reads all of them
+        """
+        return self._postings_budget
+    
+    @postings_budget.setter
+    def postings_budget(self, new_postings_budget:int):
+        if type(new_postings_budget) != int:
+            raise TypeError("new_postings_budget should be an int!")
+        if new_postings_budget < 0:
+            raise ValueError("new_postings_budget should not be negative")
+        
+        self._postings_budget = new_postings_budget
+        self._result_cache.clear()
+
+    @property
+    def planner_tolerance(self):
+        """
+        The query planner finds the most a term of a DISJUNCTIVE query can add to a doc score from its df and
+        highest frequency. Terms that can add less than planner_tolerance times the most of the strongest term are
+        handled by planner_action. 0 turns the planner off, so every term is evaluated. Not used by SAAT
+        """
+        return self._planner_tolerance
+    
+    @planner_tolerance.setter
+    def planner_tolerance(self, new_planner_tolerance:float):
+        if type(new_planner_tolerance) not in (int, float):
+            raise TypeError("new_planner_tolerance should be a float!")
+        if new_planner_tolerance < 0 or new_planner_tolerance > 1:
+            raise ValueError("new_planner_tolerance should be between 0 and 1")
+        
+        self._planner_tolerance = new_planner_tolerance
+        self._result_cache.clear()
+
+    @property
+    def planner_action(self):
+        """
+        What the planner does with the terms under its tolerance. DEMOTE only scores the docs of the other terms with
+        them, so their long lists are probed instead of walked. The evaluator and the champion lists still rank the
+        other terms, with the demoted ones only adding to their docs. DROP leaves them out of the query
+        """
+        return self._planner_action
+    
+    @planner_action.setter
+    def planner_action(self, new_planner_action:str):
+        if type(new_planner_action) != str:
+            raise TypeError("new_planner_action should be a str!")
+        if new_planner_action not in QueryProcessor.PLANNER_ACTIONS:
+            raise ValueError(f"new_planner_action should be one of {QueryProcessor.PLANNER_ACTIONS}")
+        
+        self._planner_action = new_planner_action
+        self._result_cache.clear()
+
+    @property
+    def stream_postings(self):
+        """
+        The inverted lists of the binary index are memory mapped, so their pages come in as they are read and stay in
+        the process until the index is closed. With stream_postings the cursors of the STREAMING_EVALUATORS and of
+        the boolean and demoted scoring release the pages behind them, so a query keeps about
+        PostingCursor.RELEASE_CHUNK_SIZE postings of each term in memory, however long the lists are.
+        It does not bound TAAT and SAAT, whose accumulators take whole lists, nor the matching of PHRASE queries
+        and the indexes in the pickle format, which are read whole
+        """
+        return self._stream_postings
+    
+    @stream_postings.setter
+    def stream_postings(self, new_stream_postings:bool):
+        if type(new_stream_postings) != bool:
+            raise TypeError("new_stream_postings should be a bool!")
+        
+        self._stream_postings = new_stream_postings
+
+    @property
+    def use_champion_lists(self):
+        """
+        If DISJUNCTIVE queries are first answered from the champion lists written by IndexMerger next to the index.
+        The full lists are only read for the docs found in them, or for the whole query when the champion lists
+        can not assure the top docs. The ranking is the same either way
+        """
+        return self._use_champion_lists
+    
+    @use_champion_lists.setter
+    def use_champion_lists(self, new_use_champion_lists:bool):
+        if type(new_use_champion_lists) != bool:
+            raise TypeError("new_use_champion_lists should be a bool!")
+        
+        self._use_champion_lists = new_use_champion_lists
+
+    @property
+    def champion_lists_file_path(self):
+        """
+        The champion lists of the index. The index file path with the .champions suffix
+        """
+        if self._index_file_path == None:
+            return None
+        return self._index_file_path.with_suffix('.champions')
+    
+    @champion_lists_file_path.setter
+    def champion_lists_file_path(self, new_champion_lists_file_path):
+        raise AttributeError("champion_lists_file_path is not writable. Set index_file_path")
+
+    @property
+    def use_shards(self):
+        """
+        If queries are answered by the shards written by IndexSharder next to the index, each one in its own process.
+        Shards whose BloomFilter has none of the query tokens are skipped. The ranking is the same of the whole index.
+        Not used by SAAT, as the impact index is not sharded
+        """
+        return self._use_shards
+    
+    @use_shards.setter
+    def use_shards(self, new_use_shards:bool):
+        if type(new_use_shards) != bool:
+            raise TypeError("new_use_shards should be a bool!")
+        
+        self._use_shards = new_use_shards
+        if not new_use_shards:
+            self._close_shards(wait=False)
+
+    @property
+    def shards_file_path(self):
+        """
+        The list of shards of the index. The index file path with the .shards suffix
+        """
+        if self._index_file_path == None:
+            return None
+        return self._index_file_path.with_suffix('.shards')
+    
+    @shards_file_path.setter
+    def shards_file_path(self, new_shards_file_path):
+        raise AttributeError("shards_file_path is not writable. Set index_file_path")
+
+    @property
+    def num_processes(self):
+        """
+        The number of worker processes used by process_queries. Each one memory maps the same index and doc table,
+        so they share them through the page cache. 0 uses threads of this process. Not used with shards, as each
+        shard already has its own process
+        """
+        return self._num_processes
+    
+    @num_processes.setter
+    def num_processes(self, new_num_processes:int):
+        if type(new_num_processes) != int:
+            raise TypeError("new_num_processes should be an int!")
+        if new_num_processes < 0:
+            raise ValueError("new_num_processes should not be negative")
+        
+        self._num_processes = new_num_processes
+
+    @property
+    def posting_list_cache_bytes(self):
+        """
+        The memory budget of the decoded inverted lists kept between queries. Only the lists of an index without
+        a lexicon, read by scanning it, are kept: the ones of a binary index are memory mapped. 0 disables the cache
+        """
+        return self._posting_list_cache.capacity
+    
+    @posting_list_cache_bytes.setter
+    def posting_list_cache_bytes(self, new_posting_list_cache_bytes:int):
+        if type(new_posting_list_cache_bytes) != int:
+            raise TypeError("new_posting_list_cache_bytes should be an int!")
+        if new_posting_list_cache_bytes < 0:
+            raise ValueError("new_posting_list_cache_bytes should not be negative")
+        
+        self._posting_list_cache = self._make_posting_list_cache(new_posting_list_cache_bytes)
+
+    @property
+    def posting_list_cache(self):
+        """
+        The LRUCache of inverted lists by token shared by all queries, with its hit and miss counters
+        """
+        return self._posting_list_cache
+    
+    @posting_list_cache.setter
+    def posting_list_cache(self, new_posting_list_cache):
+        raise AttributeError("posting_list_cache is not writable. Use posting_list_cache_bytes")
+
+    @property
+    def result_cache_size(self):
+        """
+        How many query results are kept. Queries with the same stemmed tokens share a result. 0 disables the cache
+        """
+        return self._result_cache.capacity
+    
+    @result_cache_size.setter
+    def result_cache_size(self, new_result_cache_size:int):
+        if type(new_result_cache_size) != int:
+            raise TypeError("new_result_cache_size should be an int!")
+        if new_result_cache_size < 0:
+            raise ValueError("new_result_cache_size should not be negative")
+        
+        self._result_cache = LRUCache(new_result_cache_size)
+
+    @property
+    def result_cache(self):
+        """
+        The LRUCache of query results. It is emptied whenever the index or the documents info change
+        """
+        return self._result_cache
+    
+    @result_cache.setter
+    def result_cache(self, new_result_cache):
+        raise AttributeError("result_cache is not writable. Use result_cache_size")
+
+    @property
+    def max_wildcard_expansions(self):
+        """
+        How many index tokens a wildcard term like inform* stands for at most. When more tokens start with its prefix,
+        the ones in the most docs are kept, so a short prefix does not turn into a query of thousands of lists
+        """
+        return self._max_wildcard_expansions
+    
+    @max_wildcard_expansions.setter
+    def max_wildcard_expansions(self, new_max_wildcard_expansions:int):
+        if type(new_max_wildcard_expansions) != int:
+            raise TypeError("new_max_wildcard_expansions should be an int!")
+        if new_max_wildcard_expansions < 1:
+            raise ValueError("new_max_wildcard_expansions should be at least 1")
+        
+        self._max_wildcard_expansions = new_max_wildcard_expansions
+
+    @property
+    def collect_timings(self):
+        """
+        If process_query adds the QueryTimings of each query to its result, under 'Timings'
+        """
+        return self._collect_timings
+    
+    @collect_timings.setter
+    def collect_timings(self, new_collect_timings:bool):
+        if type(new_collect_timings) != bool:
+            raise TypeError("new_collect_timings should be a bool!")
+        
+        self._collect_timings = new_collect_timings
+
+    @property
+    def manifest_file_path(self):
+        """
+        The IndexManifest written next to the index. The index file path with the .manifest suffix
+        """
+        if self._index_file_path == None:
+            return None
+        return self._index_file_path.with_suffix('.manifest')
+    
+    @manifest_file_path.setter
+    def manifest_file_path(self, new_manifest_file_path):
+        raise AttributeError("manifest_file_path is not writable. Set index_file_path")
+
+    @property
+    def manifest(self):
+        """
+        The IndexManifest of the index, or None if it has none
+        """
+        return self._get_manifest()
+    
+    @manifest.setter
+    def manifest(self, new_manifest):
+        raise AttributeError("manifest is not writable")
+
     @property
     def num_docs_in_index(self):
         """
-        The number of documents in the index.
+        The number of documents in the index, the N of the idf. Unless set, it is read from the index manifest,
+        or is DEFAULT_NUM_DOCS for indexes without one
         """
+        self._get_manifest()
         return self._number_of_documents_in_index
     
     @num_docs_in_index.setter
     def num_docs_in_index(self, new_num:int):
         if type(new_num) == int:
             self._number_of_documents_in_index = new_num
+            self._num_docs_was_set = True
         else:
             raise TypeError("new_num should be an int!")
+        
+        self._result_cache.clear()
     
     @property
     def doc_id_to_url_file_path(self):
@@ -74,8 +503,159 @@ class QueryProcessor():
             self._doc_id_to_url_file_path = new_doc_to_url_map
         else:
             raise TypeError("new_doc_to_url_map should be a str or pathlib.Path")
+        
+        self._urls_mapping = None
+        self._result_cache.clear()
+    
+    @property
+    def doc_table_file_path(self):
+        """
+        The doc id to url table written by the Indexer. Used instead of doc_id_to_url_file_path when it exists.
+        Defaults to the index file path with the .doc_table suffix, so each index generation has its own doc table
+        """
+        if self._doc_table_file_path == None and self._index_file_path != None:
+            return self._index_file_path.with_suffix('.doc_table')
+        
+        return self._doc_table_file_path
+    
+    @doc_table_file_path.setter
+    def doc_table_file_path(self, new_doc_table_file_path):
+        if type(new_doc_table_file_path) == str:
+            self._doc_table_file_path = pathlib.Path(new_doc_table_file_path)
+        elif isinstance(new_doc_table_file_path, pathlib.Path):
+            self._doc_table_file_path = new_doc_table_file_path
+        else:
+            raise TypeError("new_doc_table_file_path should be a str or pathlib.Path")
+        
+        self._close_doc_table()
+        self._result_cache.clear()
+    
+    @property
+    def doc_lengths_file_path(self):
+        """
+        The DocLengthTable written by the Indexer. Needed by BM25. Defaults to the index file path with the .doc_lengths suffix
+        """
+        if self._doc_lengths_file_path == None and self._index_file_path != None:
+            return self._index_file_path.with_suffix('.doc_lengths')
+        
+        return self._doc_lengths_file_path
+    
+    @doc_lengths_file_path.setter
+    def doc_lengths_file_path(self, new_doc_lengths_file_path):
+        if type(new_doc_lengths_file_path) == str:
+            self._doc_lengths_file_path = pathlib.Path(new_doc_lengths_file_path)
+        elif isinstance(new_doc_lengths_file_path, pathlib.Path):
+            self._doc_lengths_file_path = new_doc_lengths_file_path
+        else:
+            raise TypeError("new_doc_lengths_file_path should be a str or pathlib.Path")
+        
+        self._doc_lengths = None
+        self._result_cache.clear()
+
+    def load(self):
+        """
+        Loads everything a query needs up front: the index lexicon, the doc id to url mapping and the parser resources.
+        Useful for long running processes, where the first query should not pay for it
+        """
+        self._load_ranking()
+        if self._get_doc_table() == None:
+            self._get_urls_mapping()
+        if self._uses_shards():
+            self._get_shards()
+
+    def _load_ranking(self):
+        """
+        What rank_queries needs, which is all a shard process loads
+        """
+        self._get_lexicon()
+        self._get_manifest()
+        self._get_doc_lengths()
+        list(TextParser.pre_proccess("load"))
+
+    def close(self):
+        """
+        Stops the processes of the shards and unmaps the index files and the doc table.
+        They are started and mapped again if another query needs them
+        """
+        self._close_shards(wait=True)
+        self._close_index_readers()
+        self._close_doc_table()
+
+    def _close_index_readers(self):
+        """
+        The posting list cache is cleared first, so the cached lists do not keep the mapping of the old index.
+        Lists still used by a query keep it until they are dropped, see BinaryIndexReader.close
+        """
+        with self._lexicon_lock:
+            readers = [self._index_reader, self._champion_lists_reader]
+            self._lexicon = None
+            self._index_reader = None
+            self._champion_lexicon = None
+            self._champion_lists_reader = None
+        
+        self._posting_list_cache.clear()
+        for reader in readers:
+            if reader != None:
+                reader.close()
+        self._close_impact_index_reader()
+
+    def _close_impact_index_reader(self):
+        with self._lexicon_lock:
+            impact_index_reader = self._impact_index_reader
+            self._impact_lexicon = None
+            self._impact_index_reader = None
+        
+        if impact_index_reader != None:
+            impact_index_reader.close()
+
+    def _close_doc_table(self):
+        with self._docs_info_lock:
+            doc_table = self._doc_table
+            self._doc_table = None
+        
+        if doc_table != None:
+            doc_table.close()
+
+    def get_settings(self) -> dict:
+        """
+        What is needed to build an equivalent QueryProcessor, for instance in another process
+        """
+        return {
+            'index_file_path': self._index_file_path,
+            'lexicon_file_path': self._lexicon_file_path,
+            'impact_index_file_path': self._impact_index_file_path,
+            'scoring_method': self._scoring_method,
+            'evaluator': self._evaluator,
+            'query_mode': self._query_mode,
+            'postings_budget': self._postings_budget,
+            'use_champion_lists': self._use_champion_lists,
+            'planner_tolerance': self._planner_tolerance,
+            'planner_action': self._planner_action,
+            'stream_postings': self._stream_postings,
+            'num_docs_in_index': self._number_of_documents_in_index if self._num_docs_was_set else None,
+            'doc_id_to_url_file_path': self._doc_id_to_url_file_path,
+            'doc_table_file_path': self._doc_table_file_path,
+            'doc_lengths_file_path': self._doc_lengths_file_path,
+            'posting_list_cache_bytes': self.posting_list_cache_bytes,
+            'result_cache_size': self.result_cache_size,
+            'collect_timings': self._collect_timings,
+            'use_shards': self._use_shards,
+            'max_wildcard_expansions': self._max_wildcard_expansions
+        }
+
+    @classmethod
+    def from_settings(cls, settings:dict):
+        query_processor = QueryProcessor()
+        for setting, value in settings.items():
+            if value != None:
+                setattr(query_processor, setting, value)
+        
+        return query_processor
 
     def process_queries(self, queries_list:list):
+        if self._num_processes > 0 and not self._uses_shards():
+            return self._process_queries_in_processes(queries_list)
+
         queries_results = list()
         with Executor() as executor:
             futures = []
@@ -86,11 +666,77 @@ class QueryProcessor():
         
         return queries_results
 
+    def _process_queries_in_processes(self, queries_list:list) -> list:
+        """
+        Scoring is pure Python, so threads wait on each other for the GIL. Each worker process builds its own
+        QueryProcessor from get_settings and receives the queries in chunks
+        """
+        chunksize = max(1, len(queries_list) // (self._num_processes * 4))
+        with self.make_process_pool() as executor:
+            return list(executor.map(process_query_in_worker, queries_list, chunksize=chunksize))
+
+    def make_process_pool(self) -> ProcessPoolExecutor:
+        """
+        A pool of num_processes workers, each with a QueryProcessor built from get_settings. Its workers answer
+        process_query_in_worker and process_queries_in_batch_in_worker
+        """
+        return ProcessPoolExecutor(max(1, self._num_processes), initializer=_init_query_worker, 
+                                    initargs=(self.get_settings(),))
+
+    def process_queries_in_batch(self, queries_list:list) -> list:
+        """
+        Answers all queries sharing the work between them. The distinct tokens of all queries are fetched only once,
+        in the order they are in the index, and the urls of all results are found in a single pass sorted by doc id.
+        The results are in the same order of queries_list
+        """
+        parsed_queries = [self._parse_query(query) for query in queries_list]
+        result_cache_keys = [self._get_result_cache_key(parsed_query) for parsed_query, _ in parsed_queries]
+        cached_results = [self._result_cache.get(result_cache_key) for result_cache_key in result_cache_keys]
+
+        if self._uses_shards():
+            rankings = self._rank_uncached_in_shards(queries_list, parsed_queries, cached_results)
+        else:
+            all_query_tokens = set()
+            for (_, query_tokens), query_results in zip(parsed_queries, cached_results):
+                if query_results == None:
+                    all_query_tokens.update(query_tokens)
+            inverted_lists_by_token = self._find_inverted_lists_by_token(sorted(all_query_tokens))
+
+            rankings = [self._rank_parsed_query(parsed_query, inverted_lists_by_token) if query_results == None else None
+                            for (parsed_query, _), query_results in zip(parsed_queries, cached_results)]
+            inverted_lists_by_token = None
+
+        urls_by_doc_id = self._get_urls_of(set(doc_id for ranking in rankings if ranking != None for _, doc_id in ranking))
+
+        queries_results = list()
+        for query, result_cache_key, query_results, ranking in zip(queries_list, result_cache_keys, cached_results, rankings):
+            if query_results == None:
+                query_results = [(doc_score, urls_by_doc_id[doc_id]) for doc_score, doc_id in ranking]
+                self._result_cache.put(result_cache_key, query_results)
+            queries_results.append(self._structure_result(query, query_results))
+        
+        return queries_results
+
     def process_query(self, query:str) -> dict:
+        
+        if not self._collect_timings:
+            return self._structure_result(query, self._query(query))
+
+        query_timings = QueryTimings()
+        self._thread_state.query_timings = query_timings
+        try:
+            query_results = self._query(query)
+        finally:
+            self._thread_state.query_timings = None
+        
+        structured_result = self._structure_result(query, query_results)
+        structured_result['Timings'] = query_timings.as_dict()
+        return structured_result
+
+    def _structure_result(self, query:str, query_results:list) -> dict:
         structured_result = dict()
         structured_result['Query'] = query
         
-        query_results = self._query(query)
         structured_query_results = [{'URL': url, 'Score': score} for score, url in query_results]
         structured_result['Results'] = structured_query_results
 
@@ -98,18 +744,481 @@ class QueryProcessor():
 
     def _query(self, query:str) -> list:
 
-        ordered_query_tokens = sorted(list(TextParser.pre_proccess(query)))
+        with self._time_stage('parse'):
+            parsed_query, query_tokens = self._parse_query(query)
+
+        result_cache_key = self._get_result_cache_key(parsed_query)
+        query_results = self._result_cache.get(result_cache_key)
+        if query_results != None:
+            return query_results
+
+        if self._uses_shards():
+            with self._time_stage('score'):
+                top_n_scored_docs = self._rank_in_shards([(parsed_query, query_tokens)])[0]
+        else:
+            with self._time_stage('lists'):
+                inverted_lists_by_token = self._find_inverted_lists_by_token(query_tokens)
+            query_timings = self._get_query_timings()
+            if query_timings != None:
+                query_timings.add_postings_read(sum(len(inverted_list) for inverted_list in inverted_lists_by_token.values()))
+
+            with self._time_stage('score'):
+                top_n_scored_docs = self._rank_parsed_query(parsed_query, inverted_lists_by_token)
+            inverted_lists_by_token = None
+
+        with self._time_stage('urls'):
+            query_results = self.convert_ranking_doc_ids_to_urls(top_n_scored_docs)
+        self._result_cache.put(result_cache_key, query_results)
+        return query_results
+
+    def _get_query_timings(self) -> QueryTimings:
+        """
+        The QueryTimings of the query being answered by this thread, or None if timings are not collected
+        """
+        if not self._collect_timings:
+            return None
+        return getattr(self._thread_state, 'query_timings', None)
+
+    def _time_stage(self, stage:str):
+        query_timings = self._get_query_timings()
+        if query_timings == None:
+            return nullcontext()
+        return query_timings.stage(stage)
+
+    def rank_queries(self, queries_list:list, doc_freqs:dict = None) -> list:
+        """
+        The top (score, doc_id) of each query, without urls or caching. The lists of the tokens in doc_freqs are
+        scored with that df, which is how a shard scores with the df of the whole index
+        """
+        return self._rank_parsed_queries([self._parse_query(query) for query in queries_list], doc_freqs)
+
+    def _rank_parsed_queries(self, parsed_queries:list, doc_freqs:dict = None) -> list:
+        all_query_tokens = set(token for _, query_tokens in parsed_queries for token in query_tokens)
+        inverted_lists_by_token = self._find_inverted_lists_by_token(sorted(all_query_tokens))
+        if doc_freqs != None:
+            for token, inverted_list in inverted_lists_by_token.items():
+                if token in doc_freqs:
+                    inverted_list.collection_df = doc_freqs[token]
+
+        return [self._rank_parsed_query(parsed_query, inverted_lists_by_token) for parsed_query, _ in parsed_queries]
+
+    def _uses_shards(self) -> bool:
+        return self._use_shards and not self._uses_impact_index()
+
+    def _rank_uncached_in_shards(self, queries_list:list, parsed_queries:list, cached_results:list) -> list:
+        uncached_queries_idx = [query_idx for query_idx, query_results in enumerate(cached_results) if query_results == None]
+        shards_rankings = self._rank_in_shards([parsed_queries[query_idx] for query_idx in uncached_queries_idx])
+
+        rankings = [None for _ in queries_list]
+        for query_idx, ranking in zip(uncached_queries_idx, shards_rankings):
+            rankings[query_idx] = ranking
+        
+        return rankings
+
+    def _rank_in_shards(self, parsed_queries:list) -> list:
+        """
+        Scatter-gather: each shard whose BloomFilter may have a token of a query ranks it in the shard process, with
+        the df of the whole index from this lexicon, and the top docs of all shards are merged.
+        Queries are sent parsed, so wildcard terms are expanded once with the lexicon of the whole index.
+        Shards without any token of a query never read its lists
+        """
+        lexicon = self._get_lexicon()
+        if lexicon == None:
+            raise ValueError("shards need the lexicon of the whole index for the df of the tokens")
+        
+        ranking_settings = self._get_ranking_settings()
+        shard_futures = list()
+        for shard in self._get_shards():
+            shard_queries_idx = [query_idx for query_idx, (_, query_tokens) in enumerate(parsed_queries)
+                                    if any(token in shard.bloom_filter for token in query_tokens)]
+            if len(shard_queries_idx) == 0:
+                continue
+
+            doc_freqs = dict()
+            for query_idx in shard_queries_idx:
+                for token in parsed_queries[query_idx][1]:
+                    lexicon_entry = lexicon.get(token)
+                    if lexicon_entry != None:
+                        doc_freqs[token] = lexicon_entry.df
+            
+            shard_queries = [parsed_queries[query_idx] for query_idx in shard_queries_idx]
+            shard_futures.append((shard_queries_idx, shard.executor.submit(_rank_queries_in_worker, ranking_settings, 
+                                                                            shard_queries, doc_freqs)))
+        
+        shards_rankings = [list() for _ in parsed_queries]
+        for shard_queries_idx, shard_future in shard_futures:
+            for query_idx, ranking in zip(shard_queries_idx, shard_future.result()):
+                shards_rankings[query_idx].extend(ranking)
+        
+        return [nlargest(QueryProcessor.TOP_N_DOCS, ranking) for ranking in shards_rankings]
+
+    def _get_ranking_settings(self) -> dict:
+        """
+        The settings sent with each query to the shards, so they rank like this QueryProcessor even after a change
+        """
+        return {
+            'scoring_method': self._scoring_method,
+            'evaluator': self._evaluator,
+            'query_mode': self._query_mode,
+            'planner_tolerance': self._planner_tolerance,
+            'planner_action': self._planner_action,
+            'stream_postings': self._stream_postings,
+            'num_docs_in_index': self._number_of_documents_in_index if self._num_docs_was_set else None
+        }
+
+    def _get_shards(self) -> list:
+        """
+        Reads the shards file and the BloomFilter of each shard and starts a process for each one, only once
+        """
+        with self._shards_lock:
+            if self._shards == None:
+                shards_file_path = self.shards_file_path
+                if shards_file_path == None or not shards_file_path.exists():
+                    raise ValueError(f"there are no shards at {shards_file_path}. See IndexSharder")
+                
+                with open(shards_file_path, 'r') as shards_file:
+                    shards_info = json.load(shards_file)['shards']
+                
+                shards = list()
+                for shard_info in shards_info:
+                    shard_file_path = shards_file_path.with_name(shard_info['index_file'])
+                    bloom_filter = BloomFilter()
+                    bloom_filter.load_from(shard_file_path.with_suffix('.bloom'))
+                    executor = ProcessPoolExecutor(1, initializer=_init_shard_worker, 
+                                                    initargs=(self._get_shard_settings(shard_file_path, len(shards_info)),))
+                    shards.append(IndexShard(shard_file_path, bloom_filter, executor))
+                self._shards = shards
+        
+        return self._shards
+
+    def _get_shard_settings(self, shard_file_path:pathlib.Path, num_shards:int) -> dict:
+        """
+        The shard gets its share of the posting list cache. Its lexicon, manifest and bloom filter are next to it
+        """
+        shard_settings = self.get_settings()
+        shard_settings.update({
+            'index_file_path': shard_file_path,
+            'lexicon_file_path': None,
+            'impact_index_file_path': None,
+            'use_champion_lists': False,
+            'use_shards': False,
+            'posting_list_cache_bytes': self.posting_list_cache_bytes // num_shards,
+            'result_cache_size': 0,
+            'collect_timings': False
+        })
+        return shard_settings
+
+    def _close_shards(self, wait:bool):
+        with self._shards_lock:
+            shards = self._shards
+            self._shards = None
+        
+        if shards != None:
+            for shard in shards:
+                shard.executor.shutdown(wait=wait)
+
+    def _get_result_cache_key(self, parsed_query) -> tuple:
+        """
+        Queries differing only in stopwords, casing or the order of the tokens share a key.
+        Boolean queries are keyed by their parsed tree and phrase queries by their tokens in order.
+        The repr of the tree is used because an AndNode and an OrNode with the same children are equal tuples
+        """
+        if self._query_mode == 'BOOLEAN':
+            normalized_query = repr(parsed_query.root)
+        elif self._query_mode == 'PHRASE':
+            normalized_query = tuple(parsed_query.tokens)
+        else:
+            normalized_query = tuple(parsed_query)
+        
+        return (self._query_mode, self._scoring_method, self._evaluator, normalized_query)
+
+    def _parse_query(self, query:str) -> tuple:
+        """
+        Returns the (parsed query, sorted distinct tokens it needs) for the current query_mode.
+        Wildcard terms of DISJUNCTIVE and BOOLEAN queries are replaced by the index tokens they stand for
+        """
+        if self._query_mode == 'BOOLEAN':
+            boolean_query = BooleanQuery(query, self._expand_wildcard)
+            return boolean_query, boolean_query.tokens
+        elif self._query_mode == 'PHRASE':
+            phrase_query = PhraseQuery(query)
+            return phrase_query, phrase_query.distinct_tokens
+        
+        query_words = query.split()
+        wildcard_words = [word for word in query_words if QueryProcessor.WILDCARD_PATTERN.fullmatch(word)]
+        if len(wildcard_words) == 0:
+            ordered_query_tokens = sorted(set(TextParser.pre_proccess(query)))
+            return ordered_query_tokens, ordered_query_tokens
 
-        inverted_lists_of_interest = self._find_inverted_lists_of(ordered_query_tokens)
+        query_tokens = set(TextParser.pre_proccess(' '.join(word for word in query_words if word not in wildcard_words)))
+        for wildcard_word in wildcard_words:
+            query_tokens.update(self._expand_wildcard(wildcard_word))
+        ordered_query_tokens = sorted(query_tokens)
+        return ordered_query_tokens, ordered_query_tokens
+
+    def _expand_wildcard(self, query_word:str) -> list:
+        """
+        Returns None if query_word is not a wildcard term. Otherwise the sorted index tokens starting with its
+        lower case prefix, at most max_wildcard_expansions of them. The prefix is not stemmed, as a stem of it could
+        drop letters the user typed. Indexes without a lexicon can not be searched by prefix, so nothing matches
+        """
+        wildcard_match = QueryProcessor.WILDCARD_PATTERN.fullmatch(query_word)
+        if wildcard_match == None:
+            return None
+
+        lexicon = self._get_lexicon()
+        if lexicon == None:
+            return list()
+
+        matching_items = lexicon.items_with_prefix(wildcard_match.group(1).lower())
+        top_items = nlargest(self._max_wildcard_expansions, matching_items, key=lambda item: item[1].df)
+        return sorted(token for token, _ in top_items)
+
+    def _rank_parsed_query(self, parsed_query, inverted_lists_by_token:dict) -> list:
+        """
+        Returns the top (score, doc_id) of a query parsed by _parse_query. inverted_lists_by_token may have
+        the lists of tokens of other queries
+        """
+        self._get_manifest()
+        if self._query_mode == 'BOOLEAN':
+            return self._rank_boolean_query(parsed_query, inverted_lists_by_token)
+        elif self._query_mode == 'PHRASE':
+            return self._rank_phrase_query(parsed_query, inverted_lists_by_token)
+        
+        tokens_of_interest = [token for token in parsed_query if token in inverted_lists_by_token]
+        inverted_lists_of_interest = [inverted_lists_by_token[token] for token in tokens_of_interest]
+        demoted_inverted_lists = list()
+        if self._planner_tolerance > 0 and self._evaluator != 'SAAT':
+            query_plan = self._plan_query(tokens_of_interest, inverted_lists_of_interest)
+            tokens_of_interest, inverted_lists_of_interest = query_plan.tokens, query_plan.inverted_lists
+            demoted_inverted_lists = query_plan.demoted_inverted_lists
+
+        if self._use_champion_lists and self._evaluator != 'SAAT' and self._get_champion_lexicon() != None:
+            champion_lists = self._find_champion_lists_of(tokens_of_interest)
+            champion_evaluator = ChampionEvaluator(champion_lists, self._get_scoring_function(self._scoring_method), 
+                                                    self._get_upper_bound_function(self._scoring_method),
+                                                    demoted_inverted_lists)
+            top_n_docs = self._make_evaluator(champion_evaluator).rank(inverted_lists_of_interest)
+            if top_n_docs != None:
+                return top_n_docs
+        
+        return self._rank_docs_for_query(inverted_lists_of_interest, demoted_inverted_lists)
+
+    def _plan_query(self, tokens_of_interest:list, inverted_lists_of_interest:list) -> QueryPlan:
+        """
+        The cost of a term is its df, the postings its list has. Its most is the upper bound of its score, which
+        comes from its df and the highest frequency in its list. Terms whose most is under planner_tolerance times
+        the highest one are demoted or dropped, so the strongest term is always kept.
+        The estimated postings are the ones of the kept lists plus, for each demoted list, one probe per candidate
+        """
+        upper_bound_function = self._get_upper_bound_function(self._scoring_method)
+        upper_bounds = [upper_bound_function(inverted_list, inverted_list.max_frequency) 
+                            for inverted_list in inverted_lists_of_interest]
+        min_upper_bound = self._planner_tolerance * max(upper_bounds, default=0)
+
+        kept_tokens = list()
+        kept_inverted_lists = list()
+        demoted_inverted_lists = list()
+        for token, inverted_list, upper_bound in zip(tokens_of_interest, inverted_lists_of_interest, upper_bounds):
+            if upper_bound >= min_upper_bound:
+                kept_tokens.append(token)
+                kept_inverted_lists.append(inverted_list)
+            elif self._planner_action == 'DEMOTE':
+                demoted_inverted_lists.append(inverted_list)
+
+        kept_postings = sum(len(inverted_list) for inverted_list in kept_inverted_lists)
+        estimated_postings = kept_postings + sum(min(len(inverted_list), kept_postings) 
+                                                    for inverted_list in demoted_inverted_lists)
+        query_timings = self._get_query_timings()
+        if query_timings != None:
+            query_timings.add_estimated_postings(estimated_postings)
+            if len(demoted_inverted_lists) == 0:
+                query_timings.add_postings_touched(kept_postings)
+
+        return QueryPlan(kept_tokens, kept_inverted_lists, demoted_inverted_lists, estimated_postings)
+
+    def _rank_boolean_query(self, boolean_query:BooleanQuery, inverted_lists_by_token:dict) -> list:
+
+        matching_doc_ids = boolean_query.matching_doc_ids(inverted_lists_by_token)
+
+        scoring_function = self._get_scoring_function(self._scoring_method)
+        positive_inverted_lists = [inverted_lists_by_token[token] for token in boolean_query.positive_tokens 
+                                    if token in inverted_lists_by_token]
+        return self._make_evaluator(BooleanEvaluator(matching_doc_ids, scoring_function)).rank(positive_inverted_lists)
+
+    def _rank_phrase_query(self, phrase_query:PhraseQuery, inverted_lists_by_token:dict) -> list:
+
+        matching_doc_ids = phrase_query.matching_doc_ids(inverted_lists_by_token)
+
+        scoring_function = self._get_scoring_function(self._scoring_method)
+        phrase_inverted_lists = [inverted_lists_by_token[token] for token in phrase_query.distinct_tokens 
+                                    if token in inverted_lists_by_token]
+        return self._make_evaluator(BooleanEvaluator(matching_doc_ids, scoring_function)).rank(phrase_inverted_lists)
+
+    def _get_lexicon(self) -> Lexicon:
+        """
+        Loads the lexicon and memory maps the binary index only once. Returns None if the index has no lexicon file
+        """
+        with self._lexicon_lock:
+            if self._lexicon == None and self.lexicon_file_path != None and self.lexicon_file_path.exists():
+                lexicon = Lexicon()
+                lexicon.load_from(self.lexicon_file_path)
+                self._index_reader = BinaryIndexReader(self._index_file_path)
+                self._lexicon = lexicon
+        
+        return self._lexicon
+
+    def _get_impact_lexicon(self) -> Lexicon:
+        """
+        Loads the lexicon of the impact index and memory maps it only once
+        """
+        with self._lexicon_lock:
+            if self._impact_lexicon == None:
+                impact_lexicon_file_path = self._get_lexicon_file_path_of(self.impact_index_file_path)
+                if not impact_lexicon_file_path.exists():
+                    raise ValueError(f"SAAT needs an impact index at {self.impact_index_file_path}. See write_impact_index")
+                
+                impact_lexicon = Lexicon()
+                impact_lexicon.load_from(impact_lexicon_file_path)
+                self._impact_index_reader = ImpactIndexReader(self.impact_index_file_path)
+                self._impact_lexicon = impact_lexicon
+        
+        return self._impact_lexicon
 
-        top_n_scored_docs = self._score_docs_for_query(inverted_lists_of_interest, ordered_query_tokens)
-        inverted_lists_of_interest = None
+    def _get_lexicon_file_path_of(self, index_file_path:pathlib.Path) -> pathlib.Path:
+        return index_file_path.with_name(index_file_path.name + '.lexicon')
 
-        return top_n_scored_docs
+    def _uses_impact_index(self) -> bool:
+        return self._evaluator == 'SAAT' and self._query_mode == 'DISJUNCTIVE'
+
+    def _find_impact_lists_by_token(self, ordered_query_tokens:list) -> dict:
+        
+        impact_lexicon = self._get_impact_lexicon()
+
+        impact_lists_of_interest = dict()
+        for token in sorted(set(ordered_query_tokens)):
+            lexicon_entry = impact_lexicon.get(token)
+            if lexicon_entry != None:
+                impact_lists_of_interest[token] = self._impact_index_reader.get_postings(lexicon_entry.offset, 
+                                                                                            lexicon_entry.length)
+        
+        return impact_lists_of_interest
+
+    def write_impact_index(self, impact_index_file_path = None):
+        """
+        Writes the impact index of the current scoring_method with ImpactIndexWriter.write_index.
+        The impacts hold the settings used to write them, like num_docs_in_index, so the index should be written again
+        when they change
+        """
+        if impact_index_file_path == None:
+            impact_index_file_path = self.impact_index_file_path
+        impact_index_file_path = pathlib.Path(impact_index_file_path)
+
+        lexicon = self._get_lexicon()
+        if lexicon == None:
+            raise ValueError("the impact index is written from a binary index with a lexicon")
+        self._get_manifest()
+        
+        scorer = self._get_scorer(self._scoring_method)
+        with open(impact_index_file_path, 'wb') as impact_index_file:
+            impact_lexicon = ImpactIndexWriter().write_index(impact_index_file, self._index_reader, lexicon,
+                                                            scorer.get_vectorized_scoring_function(self._scoring_method),
+                                                            scorer.get_upper_bound_function(self._scoring_method))
+        impact_lexicon.save_to_pickle(self._get_lexicon_file_path_of(impact_index_file_path))
+
+        if impact_index_file_path == self.impact_index_file_path:
+            self._close_impact_index_reader()
+            self._result_cache.clear()
+
+    def _get_champion_lexicon(self) -> Lexicon:
+        """
+        Loads the lexicon of the champion lists and memory maps them only once. Returns None if the index has none
+        """
+        with self._lexicon_lock:
+            champion_lexicon_file_path = self._get_lexicon_file_path_of(self.champion_lists_file_path)
+            if self._champion_lexicon == None and champion_lexicon_file_path.exists():
+                champion_lexicon = Lexicon()
+                champion_lexicon.load_from(champion_lexicon_file_path)
+                self._champion_lists_reader = BinaryIndexReader(self.champion_lists_file_path)
+                self._champion_lexicon = champion_lexicon
+        
+        return self._champion_lexicon
+
+    def _find_champion_lists_of(self, ordered_query_tokens:list) -> list:
+        """
+        The champion list of each token, or None for the tokens whose full list is small enough to have none
+        """
+        champion_lexicon = self._get_champion_lexicon()
+
+        champion_lists = list()
+        for token in ordered_query_tokens:
+            lexicon_entry = champion_lexicon.get(token)
+            if lexicon_entry != None:
+                champion_lists.append(self._champion_lists_reader.get_postings(lexicon_entry.offset, lexicon_entry.df, 
+                                                                                lexicon_entry.length))
+            else:
+                champion_lists.append(None)
+        
+        return champion_lists
 
     def _find_inverted_lists_of(self, ordered_query_tokens:list) -> list:
         
-        inverted_lists_of_interest = list()
+        return list(self._find_inverted_lists_by_token(ordered_query_tokens).values())
+
+    def _find_inverted_lists_by_token(self, ordered_query_tokens:list) -> dict:
+        """
+        Maps each query token found in the index to its inverted list, in token order.
+        The lists of a binary index are memory mapped, so only the page cache keeps them between queries.
+        The lists of an index without a lexicon are decoded by scanning it, so only the ones not in the posting list
+        cache are read. The SAAT evaluator gets the ImpactList of each token instead
+        """
+        if self._uses_impact_index():
+            return self._find_impact_lists_by_token(ordered_query_tokens)
+
+        lexicon = self._get_lexicon()
+        if lexicon != None:
+            return self._find_inverted_lists_with_lexicon(ordered_query_tokens, lexicon)
+
+        inverted_lists_by_token = dict()
+        missing_tokens = list()
+        for token in sorted(set(ordered_query_tokens)):
+            inverted_list = self._posting_list_cache.get(token)
+            if inverted_list != None:
+                inverted_lists_by_token[token] = inverted_list
+            else:
+                missing_tokens.append(token)
+        
+        if len(missing_tokens) == 0:
+            return inverted_lists_by_token
+        
+        read_inverted_lists = self._scan_inverted_lists_of(missing_tokens)
+        for token, inverted_list in read_inverted_lists.items():
+            self._posting_list_cache.put(token, inverted_list)
+            inverted_lists_by_token[token] = inverted_list
+        
+        return {token: inverted_lists_by_token[token] for token in sorted(inverted_lists_by_token)}
+
+    def _make_posting_list_cache(self, max_bytes:int) -> LRUCache:
+        return LRUCache(max_bytes, lambda inverted_list: inverted_list.num_bytes)
+    
+    def _find_inverted_lists_with_lexicon(self, ordered_query_tokens:list, lexicon:Lexicon) -> dict:
+        
+        inverted_lists_of_interest = dict()
+
+        for token in sorted(set(ordered_query_tokens)):
+            lexicon_entry = lexicon.get(token)
+            if lexicon_entry != None:
+                curr_token_postings = self._index_reader.get_postings(lexicon_entry.offset, lexicon_entry.df, 
+                                                                        lexicon_entry.length)
+                inverted_lists_of_interest[token] = curr_token_postings
+        
+        return inverted_lists_of_interest
+
+    def _scan_inverted_lists_of(self, ordered_query_tokens:list) -> dict:
+        """
+        Sequentially scans the whole index. Only used for indexes without a lexicon
+        """
+        inverted_lists_of_interest = dict()
 
         with open(self._index_file_path, 'rb') as index_file:
             searched_token_idx = 0
@@ -132,8 +1241,8 @@ class QueryProcessor():
                         break
 
                 if curr_line_token == curr_token_searched:
-                    curr_token_postings = curr_index_line[1]
-                    inverted_lists_of_interest.append(curr_token_postings)
+                    curr_token_postings = PostingList.from_tuples(curr_index_line[1])
+                    inverted_lists_of_interest[curr_line_token] = curr_token_postings
                     searched_token_idx += 1
                     if searched_token_idx < total_query_tokens:
                         curr_token_searched = ordered_query_tokens[searched_token_idx]
@@ -144,126 +1253,178 @@ class QueryProcessor():
         
     def _score_docs_for_query(self, inverted_lists_of_interest:list, ordered_query_tokens:list) -> list:
         
-        scoring_function = self._get_scoring_function(self._scoring_method)
-
-        top_n_docs = self.DAAT_score(inverted_lists_of_interest, scoring_function)
+        top_n_docs = self._rank_docs_for_query(inverted_lists_of_interest)
 
         top_n_docs_converted = self.convert_ranking_doc_ids_to_urls(top_n_docs)
 
         return top_n_docs_converted
 
-    def convert_ranking_doc_ids_to_urls(self, top_n_docs:list):
-        
-        converted_ranking = list()
-        urls_mapping = []
-        with open(self._doc_id_to_url_file_path, 'rb') as doc_id_to_urls_file:
-            while True:
-                try:
-                    urls_mapping.extend(list(pickle.load(doc_id_to_urls_file)))
-                except EOFError:
-                    break
-        
-        for doc_score, doc_id in top_n_docs:
-            doc_url = self._find_url_of_doc_id(doc_id, urls_mapping)
-            converted_ranking.append((doc_score, doc_url))
-        
-        return converted_ranking
-    
-    def _find_url_of_doc_id(self, doc_id:int, urls_mapping:list) -> str :
+    def _rank_docs_for_query(self, inverted_lists_of_interest:list, demoted_inverted_lists:list = None) -> list:
+        """
+        demoted_inverted_lists only add their scores to the docs of inverted_lists_of_interest, see _plan_query.
+        SAAT is never planned, so it has none
+        """
+        if self._evaluator == 'SAAT':
+            saat_evaluator = SAATEvaluator(self._impact_index_reader.impact_scale, self._postings_budget)
+            return self._make_evaluator(saat_evaluator).rank(inverted_lists_of_interest)
+        elif self._evaluator == 'TAAT':
+            vectorized_scoring_function = self._get_vectorized_scoring_function(self._scoring_method)
+            taat_evaluator = TAATEvaluator(vectorized_scoring_function, demoted_inverted_lists)
+            return self._make_evaluator(taat_evaluator).rank(inverted_lists_of_interest)
 
-        for mapping in urls_mapping:
-            mapped_doc_id, mapped_doc_url = mapping
+        scoring_function = self._get_scoring_function(self._scoring_method)
 
-            if mapped_doc_id == doc_id:
-                return mapped_doc_url
+        if self._evaluator == 'MAXSCORE':
+            upper_bound_function = self._get_upper_bound_function(self._scoring_method)
+            evaluator = MaxScoreEvaluator(scoring_function, upper_bound_function, demoted_inverted_lists)
+        elif self._evaluator == 'BMW':
+            upper_bound_function = self._get_upper_bound_function(self._scoring_method)
+            evaluator = BlockMaxWANDEvaluator(scoring_function, upper_bound_function, demoted_inverted_lists)
+        elif demoted_inverted_lists != None and len(demoted_inverted_lists) > 0:
+            evaluator = DemotedEvaluator(demoted_inverted_lists, scoring_function)
+        else:
+            evaluator = DAATEvaluator(scoring_function)
 
-        return ""
-    
-    def DAAT_score(self, inverted_lists_of_interest:list, scoring_function):
+        return self._make_evaluator(evaluator).rank(inverted_lists_of_interest)
 
-        top_scored_docs = list()
+    def _make_evaluator(self, evaluator:Evaluator) -> Evaluator:
+        """
+        Gives the evaluator of a query the settings shared by all of them
+        """
+        evaluator.stream_postings = self._stream_postings
+        evaluator.query_timings = self._get_query_timings()
+        return evaluator
 
-        inverted_lists_pos = [0 for _ in range(len(inverted_lists_of_interest))]
-        inverted_lists_lens = [len(inverted_list) for inverted_list in inverted_lists_of_interest]
+    def convert_ranking_doc_ids_to_urls(self, top_n_docs:list):
+        
+        urls_by_doc_id = self._get_urls_of(set(doc_id for _, doc_id in top_n_docs))
 
-        inv_lists_ended = set()
-        curr_doc_id_in_inv_lists = dict()
-        curr_inv_lists_associated_with_docs = set()
+        return [(doc_score, urls_by_doc_id[doc_id]) for doc_score, doc_id in top_n_docs]
 
-        while True:
+    def _get_urls_of(self, doc_ids:set) -> dict:
+        """
+        Maps each doc id to its url, or to an empty str if it is not known. The doc table is read in doc id order
+        and the legacy mapping is scanned only once for all doc ids
+        """
+        doc_table = self._get_doc_table()
+        if doc_table != None:
+            return {doc_id: doc_table.get_url(doc_id) for doc_id in sorted(doc_ids)}
 
-            self._get_curr_doc_ids_from_inv_lists(inverted_lists_pos, inverted_lists_lens, curr_inv_lists_associated_with_docs, 
-                                                    inverted_lists_of_interest, curr_doc_id_in_inv_lists, inv_lists_ended)
+        urls_by_doc_id = {doc_id: "" for doc_id in doc_ids}
+        for mapped_doc_id, mapped_doc_url in self._get_urls_mapping():
+            if mapped_doc_id in urls_by_doc_id:
+                urls_by_doc_id[mapped_doc_id] = mapped_doc_url
         
-            if len(inv_lists_ended) == len(inverted_lists_of_interest):
-                break
-
-            smallest_doc_id, associated_inv_lists_idx = sorted(curr_doc_id_in_inv_lists.items())[0]
-
-            final_doc_score = self._get_score_for_doc(inverted_lists_of_interest, scoring_function, inverted_lists_pos,
-                                                         associated_inv_lists_idx)
+        return urls_by_doc_id
+    
+    def _get_doc_table(self) -> DocTable:
+        """
+        Memory maps the doc table only once. Returns None if there is no doc table
+        """
+        with self._docs_info_lock:
+            doc_table_file_path = self.doc_table_file_path
+            if self._doc_table == None and doc_table_file_path != None and doc_table_file_path.with_suffix('.offsets').exists():
+                self._doc_table = DocTable(doc_table_file_path)
         
-            top_scored_docs = self._add_doc_to_ranking(top_scored_docs, smallest_doc_id, final_doc_score)
-
-            for associated_inv_list_idx in associated_inv_lists_idx:
-                curr_inv_lists_associated_with_docs.remove(associated_inv_list_idx)
-            
-            del curr_doc_id_in_inv_lists[smallest_doc_id]
+        return self._doc_table
+    
+    def _get_manifest(self) -> IndexManifest:
+        """
+        Loads the index manifest only once and takes num_docs_in_index from it, unless it was set.
+        Returns None if the index has no manifest
+        """
+        with self._docs_info_lock:
+            if self._manifest == None and self._index_file_path != None and self.manifest_file_path.exists():
+                manifest = IndexManifest()
+                manifest.load_from(self.manifest_file_path)
+                if not self._num_docs_was_set and manifest.num_docs > 0:
+                    self._number_of_documents_in_index = manifest.num_docs
+                self._manifest = manifest
         
-        top_scored_docs.reverse()
+        return self._manifest
 
-        return top_scored_docs
-
-    def _add_doc_to_ranking(self, top_scored_docs:list, smallest_doc_id, final_doc_score):
+    def _get_doc_lengths(self) -> DocLengthTable:
+        """
+        Loads the doc lengths only once. Returns None if there is no doc lengths file
+        """
+        with self._docs_info_lock:
+            doc_lengths_file_path = self.doc_lengths_file_path
+            if self._doc_lengths == None and doc_lengths_file_path != None and doc_lengths_file_path.exists():
+                doc_lengths = DocLengthTable()
+                doc_lengths.load_from(doc_lengths_file_path)
+                self._doc_lengths = doc_lengths
+        
+        return self._doc_lengths
 
-        top_scored_docs.append((final_doc_score, smallest_doc_id))
-        top_scored_docs.sort()
-        if len(top_scored_docs) > QueryProcessor.TOP_N_DOCS:
-            top_scored_docs.pop(0)
+    def _get_urls_mapping(self) -> list:
+        """
+        Reads the legacy doc id to url mapping file only once
+        """
+        with self._docs_info_lock:
+            if self._urls_mapping == None:
+                urls_mapping = []
+                with open(self._doc_id_to_url_file_path, 'rb') as doc_id_to_urls_file:
+                    while True:
+                        try:
+                            urls_mapping.extend(list(pickle.load(doc_id_to_urls_file)))
+                        except EOFError:
+                            break
+                self._urls_mapping = urls_mapping
+        
+        return self._urls_mapping
+    
+    def _get_scorer(self, scoring_method:str) -> Scorer:
+        """
+        Only the length normalized scoring methods load the doc lengths
+        """
+        doc_lengths = None
+        if scoring_method in Scorer.LENGTH_NORMALIZED_METHODS:
+            doc_lengths = self._get_doc_lengths()
+        return Scorer(self._number_of_documents_in_index, doc_lengths)
 
-        return top_scored_docs
+    def _get_scoring_function(self, scoring_method:str):
+        return self._get_scorer(scoring_method).get_scoring_function(scoring_method)
 
-    def _get_score_for_doc(self, inverted_lists_of_interest, scoring_function, inverted_lists_pos, associated_inv_lists_idx):
+    def _get_upper_bound_function(self, scoring_method:str):
+        """
+        The upper bound function gives the maximum score any doc can get from an inverted list
+        given the highest frequency of the list or of one of its blocks
+        """
+        return self._get_scorer(scoring_method).get_upper_bound_function(scoring_method)
 
-        doc_inv_lists = list()
-        doc_frequencies = list()
-        for inv_list_idx in associated_inv_lists_idx:
-            curr_inv_list = inverted_lists_of_interest[inv_list_idx]
-            doc_inv_lists.append(curr_inv_list)
-            curr_inv_list_pos = inverted_lists_pos[inv_list_idx] - 1
-            posting = curr_inv_list[curr_inv_list_pos]
-            frequency = posting[1]
-            doc_frequencies.append(frequency)
+    def _get_vectorized_scoring_function(self, scoring_method:str):
+        """
+        Same as _get_scoring_function, but the returned function takes NumPy arrays of frequencies and doc ids
+        """
+        return self._get_scorer(scoring_method).get_vectorized_scoring_function(scoring_method)
 
-        inv_list_and_doc_freqs = zip(doc_inv_lists, doc_frequencies)
+_worker_query_processor = None
 
-        doc_scores = [scoring_function(inv_list, doc_freq) for (inv_list, doc_freq) in inv_list_and_doc_freqs]
-        final_doc_score = 0
-        if len(doc_scores) > 0:
-            final_doc_score = sum(doc_scores)
-        return final_doc_score
+def _init_query_worker(settings:dict):
+    global _worker_query_processor
+    _worker_query_processor = QueryProcessor.from_settings(settings)
+    _worker_query_processor.load()
 
-    def _get_curr_doc_ids_from_inv_lists(self, inverted_lists_pos, inverted_lists_lens, curr_inv_lists_associated_with_docs, 
-                                            inverted_lists_of_interest, curr_doc_id_in_inv_lists, inv_lists_ended):
+def _init_shard_worker(settings:dict):
+    global _worker_query_processor
+    _worker_query_processor = QueryProcessor.from_settings(settings)
+    _worker_query_processor._load_ranking()
 
-        for inv_list_idx, inv_list_curr_pos in enumerate(inverted_lists_pos):
-            if inv_list_curr_pos < inverted_lists_lens[inv_list_idx]:
-                if inv_list_idx not in curr_inv_lists_associated_with_docs:
-                    curr_inv_list_doc_id = inverted_lists_of_interest[inv_list_idx][inv_list_curr_pos][0]
-                    inverted_lists_pos[inv_list_idx] += 1
-                    curr_doc_id_in_inv_lists.setdefault(curr_inv_list_doc_id, []).append(inv_list_idx)
-                    curr_inv_lists_associated_with_docs.add(inv_list_idx)
-            else:
-                inv_lists_ended.add(inv_list_idx)
-        
-    def _get_scoring_function(self, scoring_method:str):
-        if self._scoring_method == 'TFIDF':
-            return self._tfidf
-        elif self._scoring_method == 'BM25':
-            return self._bm25
+def process_query_in_worker(query:str) -> dict:
+    """
+    Answers query with process_query in a worker of QueryProcessor.make_process_pool
+    """
+    return _worker_query_processor.process_query(query)
 
-    def _tfidf(self, inv_list:list, doc_freq:int):
-        return doc_freq*log(self._number_of_documents_in_index/len(inv_list))
+def process_queries_in_batch_in_worker(queries_list:list) -> list:
+    """
+    Answers queries_list with process_queries_in_batch in a worker of QueryProcessor.make_process_pool
+    """
+    return _worker_query_processor.process_queries_in_batch(queries_list)
 
-    def _bm25(self, inv_list:list, doc_freq:int):
-        return self._tfidf(inv_list, doc_freq)
\ No newline at end of file
+def _rank_queries_in_worker(ranking_settings:dict, parsed_queries:list, doc_freqs:dict) -> list:
+    for setting, value in ranking_settings.items():
+        if value != None and getattr(_worker_query_processor, setting) != value:
+            setattr(_worker_query_processor, setting, value)
+    
+    return _worker_query_processor._rank_parsed_queries(parsed_queries, doc_freqs)
@@ -0,0 +1,193 @@
+from queryProcessingClasses.queryProcess import QueryProcessor
+from contextlib import contextmanager
+from threading import Lock
+import socketserver
+import pathlib
+import json
+
+class QueryServer():
+    """
+    Serves queries over a local socket using a JSON lines protocol. Each request line is one of:
+        {"query": "..."}                   -> the same dict as QueryProcessor.process_query plus the Generation
+        {"command": "swap", "index_path": "...", "lexicon_path": "...", "doc_table_path": "...", "doc_lengths_path": "..."}
+                                           -> loads the new index generation and switches to it
+        {"command": "generation"}          -> the generation currently being served
+
+    Queries hold the generation they started with, so swapping never drops in flight queries.
+    The query processor of an old generation is closed once its last query is answered.
+    """
+
+    def __init__(self, query_processor:QueryProcessor):
+        self._query_processor = query_processor
+        self._generation = 0
+        self._swap_lock = Lock()
+        self._queries_in_flight = dict() #generation -> number of queries being answered with it
+        self._retired_query_processors = dict() #generation -> swapped out query processor with queries in flight
+        self._server = None
+
+    @property
+    def generation(self):
+        """
+        The number of index swaps done so far
+        """
+        return self._generation
+
+    @generation.setter
+    def generation(self, new_generation):
+        raise AttributeError("generation is not writable")
+
+    @property
+    def query_processor(self):
+        """
+        The query processor of the current generation
+        """
+        return self._query_processor
+
+    @query_processor.setter
+    def query_processor(self, new_query_processor):
+        raise AttributeError("query_processor is not writable. Use swap_index")
+
+    def get_current(self) -> tuple:
+        """
+        Returns the (generation, query_processor) pair being served
+        """
+        with self._swap_lock:
+            return self._generation, self._query_processor
+
+    @contextmanager
+    def serving(self):
+        """
+        Yields the (generation, query_processor) pair being served. A swap does not close the query processor while
+        a with block using it is not left
+        """
+        with self._swap_lock:
+            generation, query_processor = self._generation, self._query_processor
+            self._queries_in_flight[generation] = self._queries_in_flight.get(generation, 0) + 1
+        
+        try:
+            yield generation, query_processor
+        finally:
+            self._release_generation(generation)
+
+    def _release_generation(self, generation:int):
+        retired_query_processor = None
+        with self._swap_lock:
+            self._queries_in_flight[generation] -= 1
+            if self._queries_in_flight[generation] == 0:
+                del self._queries_in_flight[generation]
+                retired_query_processor = self._retired_query_processors.pop(generation, None)
+        
+        if retired_query_processor != None:
+            retired_query_processor.close()
+
+    def swap_index(self, index_path:str, lexicon_path:str = None, doc_table_path:str = None,
+                    doc_lengths_path:str = None) -> int:
+        """
+        Loads a new index generation with the same settings of the current one and atomically switches to it.
+        The lexicon, doc table and doc lengths paths not given are derived from index_path, so a generation never
+        reads the files of another one. The new generation starts with empty caches, so no result of the old index
+        is served after the swap.
+        The old generation is closed, stopping its shard processes and unmapping its files, once its queries are answered
+        """
+        _, curr_query_processor = self.get_current()
+
+        settings = curr_query_processor.get_settings()
+        settings['index_file_path'] = index_path
+        settings['lexicon_file_path'] = lexicon_path
+        settings['doc_table_file_path'] = doc_table_path
+        settings['doc_lengths_file_path'] = doc_lengths_path
+        new_query_processor = QueryProcessor.from_settings(settings)
+        new_query_processor.num_processes = curr_query_processor.num_processes
+
+        new_query_processor.load()
+
+        with self._swap_lock:
+            old_generation, old_query_processor = self._generation, self._query_processor
+            self._query_processor = new_query_processor
+            self._generation += 1
+            new_generation = self._generation
+            if old_generation in self._queries_in_flight:
+                self._retired_query_processors[old_generation] = old_query_processor
+                old_query_processor = None
+
+        if old_query_processor != None:
+            old_query_processor.close()
+        return new_generation
+
+    def close(self):
+        """
+        Closes the query processors of the current generation and of the old ones still answering queries
+        """
+        with self._swap_lock:
+            query_processors = [self._query_processor] + list(self._retired_query_processors.values())
+            self._retired_query_processors.clear()
+        
+        for query_processor in query_processors:
+            query_processor.close()
+
+    def handle_request(self, request:dict) -> dict:
+        if 'query' in request:
+            with self.serving() as (generation, query_processor):
+                response = query_processor.process_query(request['query'])
+            response['Generation'] = generation
+            return response
+
+        command = request.get('command', None)
+        if command == 'swap':
+            generation = self.swap_index(request['index_path'], request.get('lexicon_path', None),
+                                            request.get('doc_table_path', None), request.get('doc_lengths_path', None))
+            return {'Generation': generation}
+        elif command == 'generation':
+            return {'Generation': self.get_current()[0]}
+        else:
+            raise ValueError(f"unknown request: {request}")
+
+    def handle_line(self, line:str) -> str:
+        try:
+            response = self.handle_request(json.loads(line))
+        except Exception as e:
+            response = {'Error': f"{type(e).__name__}: {e}"}
+
+        return json.dumps(response, ensure_ascii=False)
+
+    def serve_forever(self, address:str):
+        """
+        address is either HOST:PORT for a TCP socket or the path of a Unix socket
+        """
+        self._server = self._make_server(address)
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def shutdown(self):
+        if self._server != None:
+            self._server.shutdown()
+
+    def _make_server(self, address:str):
+        query_server = self
+
+        class JSONLinesHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if len(line.strip()) == 0:
+                        continue
+                    response = query_server.handle_line(line.decode())
+                    self.wfile.write((response + '\n').encode())
+                    self.wfile.flush()
+
+        host, _, port = address.rpartition(':')
+        if port.isdigit():
+            return ThreadingTCPServer((host, int(port)), JSONLinesHandler)
+
+        socket_path = pathlib.Path(address)
+        if socket_path.exists():
+            socket_path.unlink()
+        return ThreadingUnixStreamServer(address, JSONLinesHandler)
+
+class ThreadingTCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class ThreadingUnixStreamServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
@@ -0,0 +1,161 @@
+from contextlib import contextmanager
+from math import ceil
+from time import perf_counter
+
+class QueryTimings():
+    """
+    How long each stage of one query took and how much work it did:
+        parse, the query tokens found by the parser
+        lists, the inverted lists found in the cache or read from the index
+        score, the evaluator ranking the docs
+        urls, the urls of the top docs
+    Stages not run, like the ones after a result cache hit, are left out.
+    When the query planner runs, the postings it estimated the query would touch are kept next to the ones touched
+    """
+
+    STAGES = ('parse', 'lists', 'score', 'urls')
+
+    def __init__(self):
+        self._stage_seconds = dict()
+        self._postings_read = 0
+        self._docs_scored = 0
+        self._estimated_postings = None
+        self._postings_touched = None
+
+    @property
+    def stage_seconds(self):
+        """
+        The seconds spent in each stage run
+        """
+        return self._stage_seconds
+
+    @stage_seconds.setter
+    def stage_seconds(self, new_stage_seconds):
+        raise AttributeError("stage_seconds is not writable")
+
+    @property
+    def postings_read(self):
+        """
+        The number of postings in the inverted lists the query needed
+        """
+        return self._postings_read
+
+    @postings_read.setter
+    def postings_read(self, new_postings_read):
+        raise AttributeError("postings_read is not writable")
+
+    @property
+    def docs_scored(self):
+        """
+        The number of documents whose final score was computed
+        """
+        return self._docs_scored
+
+    @docs_scored.setter
+    def docs_scored(self, new_docs_scored):
+        raise AttributeError("docs_scored is not writable")
+
+    @property
+    def estimated_postings(self):
+        """
+        The postings the query planner estimated the evaluation would touch. None if the planner did not run
+        """
+        return self._estimated_postings
+
+    @estimated_postings.setter
+    def estimated_postings(self, new_estimated_postings):
+        raise AttributeError("estimated_postings is not writable")
+
+    @property
+    def postings_touched(self):
+        """
+        The postings of the lists evaluated in full plus the ones the demoted lists were probed at.
+        None if the planner did not run
+        """
+        return self._postings_touched
+
+    @postings_touched.setter
+    def postings_touched(self, new_postings_touched):
+        raise AttributeError("postings_touched is not writable")
+
+    @contextmanager
+    def stage(self, stage:str):
+        if stage not in QueryTimings.STAGES:
+            raise ValueError(f"stage should be one of {QueryTimings.STAGES}")
+
+        stage_start = perf_counter()
+        try:
+            yield self
+        finally:
+            self._stage_seconds[stage] = self._stage_seconds.get(stage, 0) + perf_counter() - stage_start
+
+    def add_postings_read(self, num_postings:int):
+        self._postings_read += num_postings
+
+    def add_docs_scored(self, num_docs:int):
+        self._docs_scored += num_docs
+
+    def add_estimated_postings(self, num_postings:int):
+        self._estimated_postings = (self._estimated_postings or 0) + num_postings
+
+    def add_postings_touched(self, num_postings:int):
+        self._postings_touched = (self._postings_touched or 0) + num_postings
+
+    def as_dict(self) -> dict:
+        """
+        The milliseconds of each stage run and the counters, as found in the 'Timings' of a query result
+        """
+        timings = {f"{stage}_ms": seconds * 1000 for stage, seconds in self._stage_seconds.items()}
+        timings['postings_read'] = self._postings_read
+        timings['docs_scored'] = self._docs_scored
+        if self._estimated_postings != None:
+            timings['estimated_postings'] = self._estimated_postings
+            timings['postings_touched'] = self._postings_touched or 0
+        return timings
+
+class TimingsSummary():
+    """
+    Gathers the 'Timings' of many query results, grouped by ranker, and reports percentiles of each of its keys
+    """
+
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(self):
+        self._values_by_ranker = dict()
+
+    def add(self, ranker:str, timings:dict):
+        values_by_key = self._values_by_ranker.setdefault(ranker, dict())
+        for key, value in timings.items():
+            values_by_key.setdefault(key, []).append(value)
+
+    def add_results(self, ranker:str, queries_results:list):
+        """
+        Adds the 'Timings' of the results that have them
+        """
+        for query_result in queries_results:
+            if 'Timings' in query_result:
+                self.add(ranker, query_result['Timings'])
+
+    def get_summary(self) -> dict:
+        """
+        {ranker: {key: {'p50': ..., 'p95': ..., 'p99': ..., 'count': ...}}}
+        """
+        summary = dict()
+        for ranker, values_by_key in self._values_by_ranker.items():
+            summary[ranker] = dict()
+            for key, values in values_by_key.items():
+                key_summary = {f"p{percentile}": value
+                                for percentile, value in zip(TimingsSummary.PERCENTILES,
+                                                            self.get_percentiles(values, TimingsSummary.PERCENTILES))}
+                key_summary['count'] = len(values)
+                summary[ranker][key] = key_summary
+
+        return summary
+
+    @classmethod
+    def get_percentiles(cls, values:list, percentiles:tuple) -> list:
+        """
+        Nearest rank percentiles: the smallest value with at least percentile% of the values up to it
+        """
+        sorted_values = sorted(values)
+        return [sorted_values[max(0, ceil(percentile / 100 * len(sorted_values)) - 1)] for percentile in percentiles]
@@ -0,0 +1,49 @@
+from queryProcessingClasses.evaluator import Evaluator
+import numpy as np
+
+class SAATEvaluator(Evaluator):
+    """
+    Score at a time evaluation over ImpactLists. The segments of all lists are read from the highest impact down,
+    so the postings adding the most to the scores come first and the evaluation can stop after postings_budget
+    postings. Reading all of them ranks by the quantized scores, each at most impact_scale per token above the real one
+    """
+
+    def __init__(self, impact_scale:float, postings_budget:int = 0):
+        super().__init__()
+        self._impact_scale = impact_scale
+        self._postings_budget = postings_budget
+
+    def rank(self, impact_lists_of_interest:list) -> list:
+        segments = [impact_list.get_segment(segment) for impact_list in impact_lists_of_interest 
+                        for segment in range(impact_list.num_segments)]
+        segments.sort(key=lambda segment: segment[0], reverse=True)
+
+        read_doc_ids = list()
+        read_impacts = list()
+        remaining_postings = self._postings_budget if self._postings_budget > 0 else None
+        for impact, doc_ids in segments:
+            if remaining_postings != None:
+                if remaining_postings == 0:
+                    break
+                doc_ids = doc_ids[:remaining_postings]
+                remaining_postings -= len(doc_ids)
+            
+            read_doc_ids.append(np.asarray(doc_ids))
+            read_impacts.append(impact)
+        
+        if len(read_doc_ids) == 0:
+            return list()
+        
+        max_doc_id = max(int(doc_ids[-1]) for doc_ids in read_doc_ids)
+        postings_impacts = np.repeat(read_impacts, [len(doc_ids) for doc_ids in read_doc_ids])
+        read_doc_ids = np.concatenate(read_doc_ids)
+
+        if len(read_doc_ids) >= (max_doc_id + 1) * Evaluator.DENSE_ACCUMULATOR_MIN_FILL:
+            accumulator = np.bincount(read_doc_ids, weights=postings_impacts)
+            candidate_doc_ids = np.flatnonzero(accumulator)
+            candidate_impacts = accumulator[candidate_doc_ids]
+        else:
+            candidate_doc_ids, candidate_positions = np.unique(read_doc_ids, return_inverse=True)
+            candidate_impacts = np.bincount(candidate_positions, weights=postings_impacts)
+
+        return self._select_top_docs(candidate_doc_ids, candidate_impacts * self._impact_scale)
@@ -0,0 +1,159 @@
+from indexClasses.binary_index import PostingList
+from indexClasses.doc_lengths import DocLengthTable
+from math import log
+import numpy as np
+
+class Scorer():
+    """
+    The scoring functions of each scoring method for an index of num_docs_in_index docs.
+    The length normalized methods use the DocLengthTable of the index, docs count as average ones without it
+    """
+
+    SCORING_METHODS = ('TFIDF', 'TFIDF_NORM', 'BM25')
+    LENGTH_NORMALIZED_METHODS = ('TFIDF_NORM', 'BM25')
+    BM25_K1 = 1.2
+    BM25_B = 0.75
+    TFIDF_NORM_SLOPE = 0.2
+
+    def __init__(self, num_docs_in_index:int, doc_lengths:DocLengthTable = None):
+        self._number_of_documents_in_index = num_docs_in_index
+        self._doc_lengths = doc_lengths
+
+    @property
+    def num_docs_in_index(self):
+        """
+        The number of docs of the collection, used by the idf
+        """
+        return self._number_of_documents_in_index
+
+    @num_docs_in_index.setter
+    def num_docs_in_index(self, new_num):
+        raise AttributeError("num_docs_in_index is not writable")
+
+    @property
+    def doc_lengths(self):
+        """
+        The DocLengthTable used by the length normalized methods. None if the index has none
+        """
+        return self._doc_lengths
+
+    @doc_lengths.setter
+    def doc_lengths(self, new_doc_lengths):
+        raise AttributeError("doc_lengths is not writable")
+
+    def get_scoring_function(self, scoring_method:str):
+        """
+        The scoring function gives the score of a doc given the inverted list, the frequency in the doc and its id
+        """
+        if scoring_method == 'TFIDF':
+            return self._tfidf
+        elif scoring_method == 'TFIDF_NORM':
+            return self._tfidf_norm
+        elif scoring_method == 'BM25':
+            return self._bm25
+
+    def get_upper_bound_function(self, scoring_method:str):
+        """
+        The upper bound function gives the maximum score any doc can get from an inverted list
+        given the highest frequency of the list or of one of its blocks
+        """
+        if scoring_method == 'TFIDF':
+            return self._tfidf_upper_bound
+        elif scoring_method == 'TFIDF_NORM':
+            return self._tfidf_norm_upper_bound
+        elif scoring_method == 'BM25':
+            return self._bm25_upper_bound
+
+    def get_vectorized_scoring_function(self, scoring_method:str):
+        """
+        Same as get_scoring_function, but the returned function takes NumPy arrays of frequencies and doc ids
+        """
+        if scoring_method == 'TFIDF':
+            return self._tfidf
+        elif scoring_method == 'TFIDF_NORM':
+            return self._tfidf_norm_vectorized
+        elif scoring_method == 'BM25':
+            return self._bm25_vectorized
+
+    def _get_collection_df_of(self, inv_list) -> int:
+        """
+        A list read from a shard knows the df of the whole index. Any other list is all docs with its token
+        """
+        if isinstance(inv_list, PostingList):
+            return inv_list.collection_df
+        return len(inv_list)
+
+    def _tfidf(self, inv_list:list, doc_freq:int, doc_id:int):
+        return doc_freq*log(self._number_of_documents_in_index/self._get_collection_df_of(inv_list))
+
+    def _tfidf_upper_bound(self, inv_list:PostingList, max_frequency:int):
+        return max_frequency*log(self._number_of_documents_in_index/self._get_collection_df_of(inv_list))
+
+    def _tfidf_norm(self, inv_list:list, doc_freq:int, doc_id:int):
+        return self._tfidf_with_norm(self._get_collection_df_of(inv_list), doc_freq, self._doc_length_norm_of(doc_id))
+
+    def _tfidf_norm_vectorized(self, inv_list:PostingList, doc_freqs, doc_ids):
+        return self._tfidf_with_norm(self._get_collection_df_of(inv_list), doc_freqs, self._doc_length_norms_of(doc_ids))
+
+    def _tfidf_norm_upper_bound(self, inv_list:PostingList, max_frequency:int):
+        """
+        Like BM25, the normalized TFIDF decreases with the doc length, so the bound uses the smallest doc length
+        """
+        return self._tfidf_with_norm(self._get_collection_df_of(inv_list), max_frequency, self._min_doc_length_norm())
+
+    def _tfidf_with_norm(self, num_docs_with_token:int, doc_freq:int, doc_length_norm:float):
+        """
+        Pivoted length normalization: docs of average length keep their TFIDF score, longer docs score less
+        """
+        slope = Scorer.TFIDF_NORM_SLOPE
+        return doc_freq*log(self._number_of_documents_in_index/num_docs_with_token)/(1 - slope + slope * doc_length_norm)
+
+    def _bm25(self, inv_list:list, doc_freq:int, doc_id:int):
+        return self._bm25_with_norm(self._get_collection_df_of(inv_list), doc_freq, self._doc_length_norm_of(doc_id))
+
+    def _bm25_vectorized(self, inv_list:PostingList, doc_freqs, doc_ids):
+        return self._bm25_with_norm(self._get_collection_df_of(inv_list), doc_freqs, self._doc_length_norms_of(doc_ids))
+
+    def _bm25_upper_bound(self, inv_list:PostingList, max_frequency:int):
+        """
+        BM25 grows with the frequency and decreases with the doc length, so the bound uses the smallest doc length
+        """
+        return self._bm25_with_norm(self._get_collection_df_of(inv_list), max_frequency, self._min_doc_length_norm())
+
+    def _doc_length_norm_of(self, doc_id:int) -> float:
+        """
+        The doc length over the average doc length. A doc missing from the doc lengths counts as an average doc,
+        so its norm is never below _min_doc_length_norm and the upper bounds still hold. 1 if there are no doc lengths
+        """
+        doc_lengths = self._doc_lengths
+        if doc_lengths != None and doc_lengths.average_length > 0:
+            doc_length = doc_lengths.length_of(doc_id)
+            if doc_length > 0:
+                return doc_length/doc_lengths.average_length
+        return 1
+
+    def _doc_length_norms_of(self, doc_ids):
+        """
+        Same as _doc_length_norm_of for a NumPy array of doc ids
+        """
+        doc_lengths = self._doc_lengths
+        if doc_lengths != None and doc_lengths.average_length > 0:
+            lengths = np.asarray(doc_lengths.lengths)
+            docs_lengths = np.zeros(len(doc_ids), dtype=lengths.dtype)
+            docs_with_length = doc_ids < len(lengths)
+            docs_lengths[docs_with_length] = lengths[doc_ids[docs_with_length]]
+            return np.where(docs_lengths > 0, docs_lengths/doc_lengths.average_length, 1)
+        return 1
+
+    def _min_doc_length_norm(self) -> float:
+        doc_lengths = self._doc_lengths
+        if doc_lengths != None and doc_lengths.average_length > 0:
+            return doc_lengths.min_length/doc_lengths.average_length
+        return 1
+
+    def _bm25_with_norm(self, num_docs_with_token:int, doc_freq:int, doc_length_norm:float):
+        idf = log(1 + (self._number_of_documents_in_index - num_docs_with_token + 0.5)/(num_docs_with_token + 0.5))
+
+        k1 = Scorer.BM25_K1
+        b = Scorer.BM25_B
+        return idf * (doc_freq * (k1 + 1))/(doc_freq + k1 * (1 - b + b * doc_length_norm))
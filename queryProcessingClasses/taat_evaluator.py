@@ -0,0 +1,58 @@
+from queryProcessingClasses.evaluator import Evaluator
+import numpy as np
+
+class TAATEvaluator(Evaluator):
+    """
+    Term at a time evaluation. Gives the same ranking of DAATEvaluator.
+    Each list is read as NumPy arrays and all of its scores are added to an accumulator at once, in list order,
+    so each doc score is summed in the same order of DAATEvaluator. The accumulator is indexed by doc id when the
+    postings fill enough of the doc id range, otherwise it only holds the docs in the lists.
+    demoted_inverted_lists are added last and only to the docs already in the accumulator, like in DemotedEvaluator
+    """
+
+    def __init__(self, vectorized_scoring_function, demoted_inverted_lists:list = None):
+        super().__init__()
+        self._vectorized_scoring_function = vectorized_scoring_function
+        self._demoted_inverted_lists = demoted_inverted_lists if demoted_inverted_lists != None else list()
+
+    def rank(self, inverted_lists_of_interest:list) -> list:
+        vectorized_scoring_function = self._vectorized_scoring_function
+        inverted_lists_of_interest = [inverted_list for inverted_list in inverted_lists_of_interest if len(inverted_list) > 0]
+        if len(inverted_lists_of_interest) == 0:
+            return list()
+
+        doc_ids_lists = [np.asarray(inverted_list.doc_ids) for inverted_list in inverted_lists_of_interest]
+        max_doc_id = max(int(doc_ids[-1]) for doc_ids in doc_ids_lists)
+        total_postings = sum(len(doc_ids) for doc_ids in doc_ids_lists)
+
+        if total_postings >= (max_doc_id + 1) * Evaluator.DENSE_ACCUMULATOR_MIN_FILL:
+            accumulator = np.zeros(max_doc_id + 1)
+            scored_docs = np.zeros(max_doc_id + 1, dtype=bool)
+            for inverted_list, doc_ids in zip(inverted_lists_of_interest, doc_ids_lists):
+                accumulator[doc_ids] += vectorized_scoring_function(inverted_list, np.asarray(inverted_list.frequencies), doc_ids)
+                scored_docs[doc_ids] = True
+            for inverted_list in self._demoted_inverted_lists:
+                doc_ids = np.asarray(inverted_list.doc_ids)
+                in_accumulator = np.flatnonzero(doc_ids <= max_doc_id)
+                in_accumulator = in_accumulator[scored_docs[doc_ids[in_accumulator]]]
+                doc_ids = doc_ids[in_accumulator]
+                accumulator[doc_ids] += vectorized_scoring_function(inverted_list, 
+                                                        np.asarray(inverted_list.frequencies)[in_accumulator], doc_ids)
+            
+            candidate_doc_ids = np.flatnonzero(scored_docs)
+            candidate_scores = accumulator[candidate_doc_ids]
+        else:
+            candidate_doc_ids = np.unique(np.concatenate(doc_ids_lists))
+            candidate_scores = np.zeros(len(candidate_doc_ids))
+            for inverted_list, doc_ids in zip(inverted_lists_of_interest, doc_ids_lists):
+                candidate_scores[np.searchsorted(candidate_doc_ids, doc_ids)] += vectorized_scoring_function(
+                                                        inverted_list, np.asarray(inverted_list.frequencies), doc_ids)
+            for inverted_list in self._demoted_inverted_lists:
+                doc_ids = np.asarray(inverted_list.doc_ids)
+                candidate_positions = np.searchsorted(candidate_doc_ids, doc_ids)
+                in_candidates = np.flatnonzero(candidate_positions < len(candidate_doc_ids))
+                in_candidates = in_candidates[candidate_doc_ids[candidate_positions[in_candidates]] == doc_ids[in_candidates]]
+                candidate_scores[candidate_positions[in_candidates]] += vectorized_scoring_function(inverted_list,
+                                    np.asarray(inverted_list.frequencies)[in_candidates], doc_ids[in_candidates])
+
+        return self._select_top_docs(candidate_doc_ids, candidate_scores)
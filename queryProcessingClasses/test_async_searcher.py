@@ -0,0 +1,99 @@
+from unittest import TestCase, main
+from queryProcessingClasses.queryProcess import QueryProcessor
+from queryProcessingClasses.async_searcher import AsyncSearcher
+from parserClasses.myparser import TextParser
+from indexClasses.lexicon import Lexicon
+from indexClasses.binary_index import BinaryIndexWriter
+import asyncio
+import pathlib
+import pickle
+
+class TestAsyncSearcher(TestCase):
+
+    def setUp(self):
+        self.test_dir = pathlib.Path('queryProcessingClasses/fake_async_index')
+        self.test_dir.mkdir(parents=True, exist_ok=True)
+
+        self.index_path = self.test_dir / 'index.bin'
+        postings_per_word = {'Clube': [(1, 2), (4, 1)], 'Cruzeiro': [(1, 3), (2, 5)], 'Esporte': [(2, 1), (3, 4)]}
+        lexicon = Lexicon()
+        index_writer = BinaryIndexWriter()
+        with open(self.index_path, 'wb') as index_file:
+            for word, postings in postings_per_word.items():
+                token = list(TextParser.pre_proccess(word))[0]
+                postings_offset, postings_length = index_writer.write_postings(index_file, postings)
+                lexicon.add(token, postings_offset, postings_length, len(postings))
+        lexicon.save_to_pickle(self.index_path.with_suffix('.lexicon'))
+
+        self.doc_id_to_url_path = self.test_dir / 'doc_to_url.map.pickle'
+        with open(self.doc_id_to_url_path, 'wb') as doc_id_to_url_file:
+            pickle.dump({(doc_id, f'url{doc_id}') for doc_id in range(5)}, doc_id_to_url_file)
+
+        self.query_processor = QueryProcessor()
+        self.query_processor.index_file_path = self.index_path
+        self.query_processor.doc_id_to_url_file_path = self.doc_id_to_url_path
+        self.query_processor.doc_table_file_path = self.test_dir / 'doc_table'
+        self.query_processor.result_cache_size = 0
+        self.queries_list = ["Cruzeiro", "Esporte Clube", "Cruzeiro Esporte", "Clube", "nada"]
+
+    def tearDown(self):
+        for file in self.test_dir.glob('*'):
+            file.unlink()
+
+    def count_batches(self) -> list:
+        batch_sizes = list()
+        process_queries_in_batch = self.query_processor.process_queries_in_batch
+        def counted_process_queries_in_batch(queries_list:list) -> list:
+            batch_sizes.append(len(queries_list))
+            return process_queries_in_batch(queries_list)
+        
+        self.query_processor.process_queries_in_batch = counted_process_queries_in_batch
+        return batch_sizes
+
+    def test_search(self):
+        async_searcher = AsyncSearcher(self.query_processor)
+        result = asyncio.run(async_searcher.search("Cruzeiro"))
+        self.assertDictEqual(result, self.query_processor.process_query("Cruzeiro"))
+
+    def test_concurrent_searches_are_batched(self):
+        batch_sizes = self.count_batches()
+        async_searcher = AsyncSearcher(self.query_processor)
+        results = asyncio.run(async_searcher.search_many(self.queries_list))
+
+        self.assertListEqual(results, [self.query_processor.process_query(query) for query in self.queries_list])
+        self.assertListEqual(batch_sizes, [len(self.queries_list)])
+
+    def test_max_batch_size(self):
+        batch_sizes = self.count_batches()
+        async_searcher = AsyncSearcher(self.query_processor, max_batch_size=2)
+        asyncio.run(async_searcher.search_many(self.queries_list))
+
+        self.assertListEqual(sorted(batch_sizes), [1, 2, 2])
+
+        with self.assertRaises(ValueError):
+            AsyncSearcher(self.query_processor, max_batch_size=0)
+
+    def test_failed_query_does_not_fail_batch(self):
+        self.query_processor.query_mode = 'BOOLEAN'
+        async_searcher = AsyncSearcher(self.query_processor)
+
+        async def search_all():
+            return await asyncio.gather(async_searcher.search("Cruzeiro OR Clube"), async_searcher.search("Cruzeiro AND"),
+                                        return_exceptions=True)
+        
+        results = asyncio.run(search_all())
+        self.assertListEqual([result['URL'] for result in results[0]['Results']], ['url2', 'url1', 'url4'])
+        self.assertIsInstance(results[1], ValueError)
+
+    def test_process_pool(self):
+        self.query_processor.num_processes = 2
+
+        async def search_all():
+            with self.query_processor.make_process_pool() as process_pool:
+                return await AsyncSearcher(self.query_processor, process_pool).search_many(self.queries_list)
+        
+        results = asyncio.run(search_all())
+        self.assertListEqual(results, [self.query_processor.process_query(query) for query in self.queries_list])
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+from unittest import TestCase, main
+from queryProcessingClasses.boolean_query import BooleanQuery, TermNode, AndNode, OrNode, NotNode
+from queryProcessingClasses.boolean_query import galloping_search, intersect, difference, union
+from parserClasses.myparser import TextParser
+from indexClasses.binary_index import PostingList
+import random
+
+class TestBooleanQuery(TestCase):
+
+    def token_of(self, word:str) -> str:
+        return list(TextParser.pre_proccess(word))[0]
+
+    def test_parse_precedence(self):
+        boolean_query = BooleanQuery("animes 2022 OR (Cruzeiro AND NOT Clube)")
+
+        expected_root = OrNode((
+            AndNode((TermNode(self.token_of('animes')), TermNode(self.token_of('2022')))),
+            AndNode((TermNode(self.token_of('Cruzeiro')), NotNode(TermNode(self.token_of('Clube')))))
+        ))
+        self.assertEqual(boolean_query.root, expected_root)
+        self.assertListEqual(boolean_query.positive_tokens, sorted([self.token_of(word) for word in ['animes', '2022', 'Cruzeiro']]))
+        self.assertListEqual(boolean_query.tokens, sorted([self.token_of(word) for word in ['animes', '2022', 'Cruzeiro', 'Clube']]))
+
+    def test_parse_ignores_stopwords(self):
+        boolean_query = BooleanQuery("de OR Cruzeiro")
+
+        self.assertEqual(boolean_query.root, TermNode(self.token_of('Cruzeiro')))
+        self.assertEqual(BooleanQuery("de").root, None)
+
+    def test_parse_wildcard_terms(self):
+        expansions = {'anim*': ['anim', 'animal'], 'xyz*': []}
+        boolean_query = BooleanQuery("anim* AND NOT xyz* Cruzeiro", expansions.get)
+
+        expected_root = AndNode((
+            OrNode((TermNode('anim'), TermNode('animal'))),
+            NotNode(TermNode('xyz*')),
+            TermNode(self.token_of('Cruzeiro'))
+        ))
+        self.assertEqual(boolean_query.root, expected_root)
+        self.assertListEqual(boolean_query.positive_tokens, sorted(['anim', 'animal', self.token_of('Cruzeiro')]))
+
+    def test_invalid_queries(self):
+        for query in ["Cruzeiro AND", "(Cruzeiro", "Cruzeiro)", "NOT Cruzeiro", "Cruzeiro OR NOT Clube", "OR Clube"]:
+            self.assertRaises(ValueError, BooleanQuery, query)
+
+    def test_galloping_search(self):
+        doc_ids = list(range(0, 1000, 3))
+        for doc_id in range(-1, 1002):
+            for lo in [0, 7, 100]:
+                expected_pos = max(lo, min(pos for pos in range(len(doc_ids) + 1) 
+                                            if pos == len(doc_ids) or doc_ids[pos] >= doc_id))
+                self.assertEqual(galloping_search(doc_ids, doc_id, lo), expected_pos)
+
+    def test_set_operations(self):
+        random_generator = random.Random(7)
+        for _ in range(20):
+            first_doc_ids = sorted(random_generator.sample(range(500), random_generator.randint(0, 100)))
+            second_doc_ids = sorted(random_generator.sample(range(500), random_generator.randint(0, 300)))
+
+            self.assertListEqual(list(intersect(first_doc_ids, second_doc_ids)), sorted(set(first_doc_ids) & set(second_doc_ids)))
+            self.assertListEqual(list(difference(first_doc_ids, second_doc_ids)), sorted(set(first_doc_ids) - set(second_doc_ids)))
+            self.assertListEqual(list(union([first_doc_ids, second_doc_ids])), sorted(set(first_doc_ids) | set(second_doc_ids)))
+
+    def test_matching_doc_ids(self):
+        inverted_lists_by_token = {
+            self.token_of('animes'): PostingList.from_tuples([(1, 1), (3, 1), (7, 1), (9, 1)]),
+            self.token_of('2022'): PostingList.from_tuples([(3, 1), (7, 1), (8, 1)]),
+            self.token_of('Cruzeiro'): PostingList.from_tuples([(2, 1), (4, 1), (7, 1)]),
+            self.token_of('Clube'): PostingList.from_tuples([(4, 1)]),
+        }
+
+        boolean_query = BooleanQuery("(animes 2022 OR Cruzeiro) AND NOT Clube")
+        self.assertListEqual(list(boolean_query.matching_doc_ids(inverted_lists_by_token)), [2, 3, 7])
+
+        boolean_query = BooleanQuery("animes AND Esporte")
+        self.assertListEqual(list(boolean_query.matching_doc_ids(inverted_lists_by_token)), [])
+
+if __name__ == '__main__':
+    main()
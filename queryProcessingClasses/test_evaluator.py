@@ -0,0 +1,49 @@
+from unittest import TestCase, main
+from queryProcessingClasses.evaluator import Evaluator
+from queryProcessingClasses.query_timings import QueryTimings
+from indexClasses.binary_index import PostingList
+import numpy as np
+
+class TestEvaluator(TestCase):
+
+    def setUp(self):
+        self.evaluator = Evaluator()
+
+    def test_add_doc_to_ranking_keeps_top_n(self):
+        top_scored_docs = list()
+        for doc_id in range(30):
+            self.evaluator._add_doc_to_ranking(top_scored_docs, doc_id, doc_id % 15)
+        
+        self.assertEqual(len(top_scored_docs), Evaluator.TOP_N_DOCS)
+        self.assertEqual(min(top_scored_docs), (10, 10))
+
+    def test_select_top_docs_same_as_add_doc_to_ranking(self):
+        doc_ids = np.arange(30)
+        scores = np.asarray(doc_ids % 15, dtype=float)
+
+        top_scored_docs = list()
+        for doc_id, score in zip(doc_ids, scores):
+            self.evaluator._add_doc_to_ranking(top_scored_docs, int(doc_id), float(score))
+        
+        self.assertListEqual(self.evaluator._select_top_docs(doc_ids, scores), sorted(top_scored_docs, reverse=True))
+
+    def test_find_frequency_of(self):
+        inv_list = PostingList.from_tuples([(1, 3), (4, 2), (9, 7)])
+
+        self.assertEqual(self.evaluator._find_frequency_of(inv_list, 4), 2)
+        self.assertEqual(self.evaluator._find_frequency_of(inv_list, 5), None)
+
+    def test_counts_docs_scored(self):
+        self.evaluator.query_timings = QueryTimings()
+        self.evaluator._add_doc_to_ranking(list(), 1, 1.0)
+        self.evaluator._select_top_docs(np.arange(5), np.ones(5))
+
+        self.assertEqual(self.evaluator.query_timings.docs_scored, 6)
+
+    def test_setters(self):
+        self.assertRaises(TypeError, setattr, self.evaluator, 'stream_postings', 1)
+        self.assertRaises(TypeError, setattr, self.evaluator, 'query_timings', 'timings')
+        self.assertRaises(NotImplementedError, self.evaluator.rank, list())
+
+if __name__ == '__main__':
+    main()
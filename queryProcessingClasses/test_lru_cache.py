@@ -0,0 +1,54 @@
+from unittest import TestCase, main
+from queryProcessingClasses.lru_cache import LRUCache
+
+class TestLRUCache(TestCase):
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)
+
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertIn('c', cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_evicts_by_size(self):
+        cache = LRUCache(10, len)
+        cache.put('a', 'x' * 4)
+        cache.put('b', 'x' * 4)
+        cache.put('c', 'x' * 4)
+        self.assertEqual(cache.size, 8)
+        self.assertListEqual([key for key in 'abc' if key in cache], ['b', 'c'])
+
+        cache.put('b', 'x')
+        self.assertEqual(cache.size, 5)
+
+        cache.put('d', 'x' * 11)
+        self.assertNotIn('d', cache)
+        self.assertEqual(cache.size, 5)
+
+    def test_hits_and_misses(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.get('a')
+        cache.get('a')
+        self.assertEqual(cache.get('b', 0), 0)
+        self.assertEqual(cache.hits, 2)
+        self.assertEqual(cache.misses, 1)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.size, 0)
+        self.assertEqual(cache.hits, 2)
+
+    def test_capacity_validation(self):
+        with self.assertRaises(TypeError):
+            LRUCache('2')
+        with self.assertRaises(ValueError):
+            LRUCache(-1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+from unittest import TestCase, main
+from queryProcessingClasses.phrase_query import PhraseQuery
+from parserClasses.myparser import TextParser
+from indexClasses.binary_index import PostingList, encode_positions
+
+class TestPhraseQuery(TestCase):
+
+    def create_positional_lists(self, docs:dict) -> dict:
+        postings_per_token = dict()
+        for doc_id, text in sorted(docs.items()):
+            for token, positions in TextParser.get_positions_of(text).items():
+                postings_per_token.setdefault(token, []).append((doc_id, len(positions), encode_positions(positions)))
+        
+        return {token: PostingList.from_tuples(postings) for token, postings in postings_per_token.items()}
+
+    def test_matching_doc_ids(self):
+        inverted_lists_by_token = self.create_positional_lists({
+            1: "Cruzeiro Esporte Clube",
+            2: "Esporte Cruzeiro Clube",
+            3: "clube do Cruzeiro Esporte",
+            4: "Cruzeiro campeão. Esporte Clube"
+        })
+
+        self.assertListEqual(list(PhraseQuery('"Cruzeiro Esporte"').matching_doc_ids(inverted_lists_by_token)), [1, 3])
+        self.assertListEqual(list(PhraseQuery('Esporte Clube').matching_doc_ids(inverted_lists_by_token)), [1, 4])
+        self.assertListEqual(list(PhraseQuery('Clube').matching_doc_ids(inverted_lists_by_token)), [1, 2, 3, 4])
+        self.assertListEqual(list(PhraseQuery('Cruzeiro Atlético').matching_doc_ids(inverted_lists_by_token)), [])
+
+    def test_repeated_tokens(self):
+        inverted_lists_by_token = self.create_positional_lists({
+            1: "rico rico rico",
+            2: "rico pobre rico"
+        })
+
+        self.assertListEqual(list(PhraseQuery('rico rico').matching_doc_ids(inverted_lists_by_token)), [1])
+
+    def test_raise_without_positions(self):
+        inverted_lists_by_token = {
+            token: PostingList.from_tuples([(1, 1)]) for token in TextParser.pre_proccess("Cruzeiro Esporte")
+        }
+
+        self.assertRaises(ValueError, PhraseQuery("Cruzeiro Esporte").matching_doc_ids, inverted_lists_by_token)
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,22 @@
 from math import log
 from unittest import TestCase, main
 from queryProcessingClasses.queryProcess import QueryProcessor
+from queryProcessingClasses.daat_evaluator import DAATEvaluator
+from queryProcessingClasses.max_score_evaluator import MaxScoreEvaluator
+from queryProcessingClasses.block_max_wand_evaluator import BlockMaxWANDEvaluator
+from queryProcessingClasses.taat_evaluator import TAATEvaluator
+from queryProcessingClasses.champion_evaluator import ChampionEvaluator
 from parserClasses.myparser import TextParser
+from indexClasses.lexicon import Lexicon
+from indexClasses.binary_index import BinaryIndexWriter, PostingList
+from indexClasses.doc_table import DocTableWriter
+from indexClasses.doc_lengths import DocLengthTable
+from indexClasses.manifest import IndexManifest
+from mergerClasses.index_merger import IndexMerger
+from mergerClasses.index_sharder import IndexSharder
 import pathlib
 import pickle
+import random
 import json
 
 class TestQueryProcessor(TestCase):
@@ -17,6 +30,7 @@ class TestQueryProcessor(TestCase):
 
         self.query_processor = QueryProcessor()
         self.query_processor.index_file_path = self.index_file_path
+        self.addCleanup(self.query_processor.close)
 
     def create_queries_file(self, queries_file_path:pathlib.Path):
         queries_file_dir = queries_file_path.parent
@@ -82,6 +96,41 @@ class TestQueryProcessor(TestCase):
                 
                 raise e
     
+    def remove_on_cleanup(self, *files):
+        """
+        The files are removed after the test even if it fails
+        """
+        for file in files:
+            self.addCleanup(pathlib.Path(file).unlink, missing_ok=True)
+
+    def create_binary_index_file(self, postings_by_token:dict) -> pathlib.Path:
+        """
+        Writes the postings of each token to a binary index with its lexicon next to the fake index.
+        Both are removed after the test
+        """
+        binary_index_file_path = self.index_file_path.with_name('fake_binary_index.bin')
+        lexicon = Lexicon()
+        index_writer = BinaryIndexWriter()
+        with open(binary_index_file_path, 'wb') as binary_index_file:
+            for token, postings in sorted(postings_by_token.items()):
+                postings_offset, postings_length = index_writer.write_postings(binary_index_file, postings)
+                lexicon.add(token, postings_offset, postings_length, len(postings))
+        lexicon.save_to_pickle(binary_index_file_path.with_suffix('.lexicon'))
+        self.remove_on_cleanup(binary_index_file_path, binary_index_file_path.with_suffix('.lexicon'))
+
+        return binary_index_file_path
+
+    def create_doc_to_url_map_file(self, doc_ids) -> pathlib.Path:
+        """
+        Pickles a doc id to url map like the one written by the Indexer. It is removed after the test
+        """
+        fake_doc_to_url_map_file_path = pathlib.Path('queryProcessingClasses/queries/doc_to_url.map.pickle')
+        with open(fake_doc_to_url_map_file_path, 'wb') as fake_doc_to_url_map_file:
+            pickle.dump({(doc_id, f'url{doc_id}') for doc_id in doc_ids}, fake_doc_to_url_map_file)
+        self.remove_on_cleanup(fake_doc_to_url_map_file_path)
+
+        return fake_doc_to_url_map_file_path
+
     def test_can_tokenize_query(self):
         doc_id_to_url_map = set()
         
@@ -103,6 +152,205 @@ class TestQueryProcessor(TestCase):
 
         #NO ASSERT :/
 
+    def test_batch_same_results_as_single_queries(self):
+        self.query_processor.doc_id_to_url_file_path = self.create_doc_to_url_map_file(range(30))
+
+        with open(self.queries_file_path, 'r') as queries_file:
+            query_list = [query for query in queries_file] + ["ficar rico", "Cruzeiro Cruzeiro", "nada"]
+
+        for query_mode, batch_query_list in [('DISJUNCTIVE', query_list), ('BOOLEAN', ["ficar AND rico", "Clube OR Esporte"])]:
+            self.query_processor.query_mode = query_mode
+            batch_results = self.query_processor.process_queries_in_batch(batch_query_list)
+            single_results = [self.query_processor.process_query(query) for query in batch_query_list]
+            self.assertListEqual(batch_results, single_results)
+
+
+    def test_processes_same_results_as_threads(self):
+        self.query_processor.doc_id_to_url_file_path = self.create_doc_to_url_map_file(range(30))
+
+        query_list = ["ficar rico", "Cruzeiro Cruzeiro", "nada", "Clube Esporte", "rico rápido"]
+        thread_results = sorted(self.query_processor.process_queries(query_list), key=lambda result: result['Query'])
+
+        self.query_processor.num_processes = 2
+        process_results = sorted(self.query_processor.process_queries(query_list), key=lambda result: result['Query'])
+        self.assertListEqual(process_results, thread_results)
+
+
+    def test_num_processes_validation(self):
+        with self.assertRaises(TypeError):
+            self.query_processor.num_processes = '2'
+        with self.assertRaises(ValueError):
+            self.query_processor.num_processes = -1
+
+    def test_find_inverted_lists_with_lexicon(self):
+        query_tokens = sorted(TextParser.pre_proccess("Como ficar rico rápido"))
+        scanned_inverted_lists = self.query_processor._find_inverted_lists_of(query_tokens)
+
+        index = dict()
+        with open(self.index_file_path, 'rb') as index_file:
+            while True:
+                try:
+                    token, postings = pickle.load(index_file)
+                except EOFError:
+                    break
+                index[token] = postings
+        
+        binary_index_file_path = self.create_binary_index_file(index)
+
+        self.query_processor.index_file_path = binary_index_file_path
+        found_inverted_lists = self.query_processor._find_inverted_lists_of(query_tokens)
+
+        self.assertListEqual([inv_list.as_tuples() for inv_list in scanned_inverted_lists], 
+                                [inv_list.as_tuples() for inv_list in found_inverted_lists])
+
+        index_reader = self.query_processor._index_reader
+        self.query_processor.index_file_path = self.index_file_path
+        self.assertTrue(index_reader._file.closed)
+        self.assertListEqual([inv_list.as_tuples() for inv_list in scanned_inverted_lists], 
+                                [inv_list.as_tuples() for inv_list in found_inverted_lists])
+        found_inverted_lists = None
+
+        self.query_processor.index_file_path = binary_index_file_path
+        self.query_processor._get_lexicon()
+        index_reader = self.query_processor._index_reader
+        self.query_processor.close()
+        self.assertTrue(index_reader._file.closed)
+        self.assertEqual(len(self.query_processor._find_inverted_lists_of(query_tokens)), len(scanned_inverted_lists))
+
+    def test_wildcard_queries(self):
+        index = [
+            ('infla', [(1, 2), (4, 1)]),
+            ('inform', [(1, 1), (2, 3), (3, 1), (5, 2)]),
+            ('informa', [(2, 1), (6, 4)]),
+            ('informz', [(4, 2)]),
+            ('informát', [(3, 2), (4, 1), (7, 1)]),
+            ('ingl', [(8, 1)])
+        ]
+        binary_index_file_path = self.create_binary_index_file(dict(index))
+        self.query_processor.index_file_path = binary_index_file_path
+        self.query_processor.num_docs_in_index = 10
+
+        expanded_tokens = ['inform', 'informa', 'informz', 'informát']
+        parsed_query, query_tokens = self.query_processor._parse_query("Inform*")
+        self.assertListEqual(query_tokens, expanded_tokens)
+        inverted_lists_by_token = self.query_processor._find_inverted_lists_by_token(expanded_tokens)
+        self.assertListEqual(self.query_processor._rank_parsed_query(parsed_query, inverted_lists_by_token),
+                                self.query_processor._rank_parsed_query(expanded_tokens, inverted_lists_by_token))
+        self.assertListEqual(self.query_processor._parse_query("zzz*")[1], [])
+        self.assertIsNone(self.query_processor._expand_wildcard("inform"))
+
+        self.query_processor.max_wildcard_expansions = 2
+        self.assertListEqual(self.query_processor._parse_query("inform*")[1], ['inform', 'informát'])
+        with self.assertRaises(ValueError):
+            self.query_processor.max_wildcard_expansions = 0
+
+        self.query_processor.query_mode = 'BOOLEAN'
+        self.query_processor.max_wildcard_expansions = QueryProcessor.MAX_WILDCARD_EXPANSIONS
+        boolean_query, query_tokens = self.query_processor._parse_query("inform* AND NOT infla*")
+        self.assertListEqual(query_tokens, ['infla'] + expanded_tokens)
+        inverted_lists_by_token = self.query_processor._find_inverted_lists_by_token(query_tokens)
+        self.assertListEqual(list(boolean_query.matching_doc_ids(inverted_lists_by_token)), [2, 3, 5, 6, 7])
+        self.assertListEqual(list(self.query_processor._parse_query("zzz* OR inform*")[0].matching_doc_ids(
+                                inverted_lists_by_token)), [1, 2, 3, 4, 5, 6, 7])
+
+    def test_num_docs_from_manifest(self):
+        self.assertEqual(self.query_processor.num_docs_in_index, QueryProcessor.DEFAULT_NUM_DOCS)
+        self.assertIsNone(self.query_processor.get_settings()['num_docs_in_index'])
+
+        manifest = IndexManifest()
+        manifest.set_doc_stats(30, 300)
+        manifest.save_to(self.query_processor.manifest_file_path)
+
+        query_processor = QueryProcessor()
+        query_processor.index_file_path = self.index_file_path
+        self.assertEqual(query_processor.num_docs_in_index, 30)
+        self.assertEqual(query_processor.manifest.average_doc_length, 10)
+        self.assertIsNone(query_processor.get_settings()['num_docs_in_index'])
+
+        query_processor.num_docs_in_index = 50
+        query_processor.index_file_path = self.index_file_path
+        self.assertEqual(query_processor.num_docs_in_index, 50)
+        self.assertEqual(query_processor.get_settings()['num_docs_in_index'], 50)
+
+        self.query_processor.manifest_file_path.unlink()
+
+    def test_posting_list_cache(self):
+        query_tokens = sorted(TextParser.pre_proccess("Como ficar rico rápido"))
+        first_inverted_lists = self.query_processor._find_inverted_lists_of(query_tokens)
+        posting_list_cache = self.query_processor.posting_list_cache
+        self.assertEqual(posting_list_cache.hits, 0)
+        self.assertEqual(posting_list_cache.misses, len(query_tokens))
+        self.assertEqual(posting_list_cache.size, sum(inv_list.num_bytes for inv_list in first_inverted_lists))
+
+        second_inverted_lists = self.query_processor._find_inverted_lists_of(query_tokens[1:] + query_tokens[:1])
+        self.assertEqual(posting_list_cache.hits, len(first_inverted_lists))
+        self.assertListEqual([inv_list.as_tuples() for inv_list in first_inverted_lists], 
+                                [inv_list.as_tuples() for inv_list in second_inverted_lists])
+
+        self.query_processor.posting_list_cache_bytes = 0
+        self.query_processor._find_inverted_lists_of(query_tokens)
+        self.query_processor._find_inverted_lists_of(query_tokens)
+        self.assertEqual(self.query_processor.posting_list_cache.hits, 0)
+
+    def test_posting_list_cache_skips_binary_index(self):
+        self.query_processor.index_file_path = self.create_binary_index_file({'ficar': [(1, 2), (3, 1)], 'rico': [(3, 4)]})
+        inverted_lists = self.query_processor._find_inverted_lists_of(['ficar', 'rico'])
+        self.query_processor._find_inverted_lists_of(['ficar', 'rico'])
+
+        self.assertListEqual([inv_list.as_tuples() for inv_list in inverted_lists], [[(1, 2), (3, 1)], [(3, 4)]])
+        posting_list_cache = self.query_processor.posting_list_cache
+        self.assertEqual((posting_list_cache.hits, posting_list_cache.misses, posting_list_cache.size), (0, 0, 0))
+
+    def test_result_cache(self):
+        self.query_processor.doc_id_to_url_file_path = self.create_doc_to_url_map_file(range(30))
+
+        first_result = self.query_processor.process_query("Como ficar rico")
+        posting_list_cache_misses = self.query_processor.posting_list_cache.misses
+        second_result = self.query_processor.process_query("rico, ficar")
+        self.assertListEqual(first_result['Results'], second_result['Results'])
+        self.assertEqual(self.query_processor.result_cache.hits, 1)
+        self.assertEqual(self.query_processor.posting_list_cache.misses, posting_list_cache_misses)
+        self.assertEqual(self.query_processor.posting_list_cache.hits, 0)
+
+        self.query_processor.scoring_method = 'BM25'
+        self.query_processor.process_query("ficar rico")
+        self.assertEqual(self.query_processor.result_cache.hits, 1)
+
+        self.query_processor.query_mode = 'BOOLEAN'
+        self.query_processor.process_query("ficar OR rico")
+        self.query_processor.process_query("ficar AND rico")
+        self.assertEqual(self.query_processor.result_cache.hits, 1)
+        self.assertEqual(len(self.query_processor.result_cache), 4)
+
+        self.query_processor.num_docs_in_index = 100
+        self.assertEqual(len(self.query_processor.result_cache), 0)
+
+
+    def test_collect_timings(self):
+        self.query_processor.doc_id_to_url_file_path = self.create_doc_to_url_map_file(range(30))
+        self.assertNotIn('Timings', self.query_processor.process_query("Como ficar rico"))
+
+        self.query_processor.collect_timings = True
+        self.query_processor.result_cache_size = 0
+        query_tokens = sorted(set(TextParser.pre_proccess("Como ficar rico")))
+        inverted_lists = self.query_processor._find_inverted_lists_of(query_tokens)
+        for evaluator in QueryProcessor.EVALUATORS[:-1]:
+            self.query_processor.evaluator = evaluator
+            timings = self.query_processor.process_query("Como ficar rico")['Timings']
+            self.assertCountEqual(timings.keys(), ['parse_ms', 'lists_ms', 'score_ms', 'urls_ms', 
+                                                    'postings_read', 'docs_scored'])
+            self.assertEqual(timings['postings_read'], sum(len(inv_list) for inv_list in inverted_lists))
+            self.assertGreater(timings['docs_scored'], 0)
+        
+        self.query_processor.evaluator = 'DAAT'
+        timings = self.query_processor.process_query("Como ficar rico")['Timings']
+        all_doc_ids = set(doc_id for inv_list in inverted_lists for doc_id in inv_list.doc_ids)
+        self.assertEqual(timings['docs_scored'], len(all_doc_ids))
+
+        with self.assertRaises(TypeError):
+            self.query_processor.collect_timings = 1
+
+
     def test_convert_doc_id_to_url(self):
         doc_id_to_url_map = set()
         
@@ -126,5 +374,451 @@ class TestQueryProcessor(TestCase):
         if fake_doc_to_url_map_file_path.exists():
             fake_doc_to_url_map_file_path.unlink()
 
+    def test_convert_doc_id_to_url_with_doc_table(self):
+        doc_table_file_path = pathlib.Path('queryProcessingClasses/queries/doc_table')
+        with DocTableWriter(doc_table_file_path) as doc_table_writer:
+            for doc_id in range(1, 10):
+                doc_table_writer.add(doc_id, f'url{doc_id}')
+        
+        self.query_processor.doc_table_file_path = doc_table_file_path
+
+        my_fake_ranking = [(10, 4), (9, 2), (8, 1)]
+
+        converted_ranking = self.query_processor.convert_ranking_doc_ids_to_urls(my_fake_ranking)
+
+        expected_converted_ranking = [(10, 'url4'), (9, 'url2'), (8, 'url1')]
+        self.assertListEqual(expected_converted_ranking, converted_ranking)
+
+        doc_table = self.query_processor._doc_table
+        self.query_processor.close()
+        self.assertTrue(doc_table._urls_file.closed)
+        self.assertListEqual(self.query_processor.convert_ranking_doc_ids_to_urls(my_fake_ranking), converted_ranking)
+        self.query_processor.close()
+
+        for suffix in ['.urls', '.offsets']:
+            if doc_table_file_path.with_suffix(suffix).exists():
+                doc_table_file_path.with_suffix(suffix).unlink()
+
+    def test_boolean_query_mode(self):
+        doc_table_file_path = pathlib.Path('queryProcessingClasses/queries/doc_table')
+        with DocTableWriter(doc_table_file_path) as doc_table_writer:
+            for doc_id in range(1, 30):
+                doc_table_writer.add(doc_id, f'url{doc_id}')
+        
+        self.query_processor.doc_table_file_path = doc_table_file_path
+        self.query_processor.query_mode = 'BOOLEAN'
+
+        response = self.query_processor.process_query("ficar AND rico")
+        self.assertListEqual([result['URL'] for result in response['Results']], ['url13', 'url1'])
+
+        response = self.query_processor.process_query("ficar AND NOT (rico OR Clube)")
+        self.assertListEqual(sorted(result['URL'] for result in response['Results']), ['url21', 'url7'])
+
+        self.assertRaises(ValueError, self.query_processor.process_query, "NOT rico")
+
+        for suffix in ['.urls', '.offsets']:
+            if doc_table_file_path.with_suffix(suffix).exists():
+                doc_table_file_path.with_suffix(suffix).unlink()
+
+    def test_bm25_prefers_shorter_docs(self):
+        doc_lengths = DocLengthTable()
+        doc_lengths.add(1, 10)
+        doc_lengths.add(2, 100)
+        doc_lengths_file_path = pathlib.Path('queryProcessingClasses/queries/doc_lengths')
+        doc_lengths.save_to(doc_lengths_file_path)
+
+        self.query_processor.doc_lengths_file_path = doc_lengths_file_path
+        self.query_processor.scoring_method = 'BM25'
+        bm25 = self.query_processor._get_scoring_function(self.query_processor.scoring_method)
+
+        inv_list = [(1, 3), (2, 3)]
+        self.assertGreater(bm25(inv_list, 3, 1), bm25(inv_list, 3, 2))
+        self.assertGreater(bm25(inv_list, 4, 2), bm25(inv_list, 3, 2))
+
+        if doc_lengths_file_path.exists():
+            doc_lengths_file_path.unlink()
+
+    def test_tfidf_norm_prefers_shorter_docs(self):
+        doc_lengths = DocLengthTable()
+        doc_lengths.add(1, 10)
+        doc_lengths.add(2, 100)
+        doc_lengths_file_path = pathlib.Path('queryProcessingClasses/queries/doc_lengths')
+        doc_lengths.save_to(doc_lengths_file_path)
+
+        self.query_processor.doc_lengths_file_path = doc_lengths_file_path
+        self.query_processor.scoring_method = 'TFIDF'
+        tfidf = self.query_processor._get_scoring_function(self.query_processor.scoring_method)
+        self.query_processor.scoring_method = 'TFIDF_NORM'
+        tfidf_norm = self.query_processor._get_scoring_function(self.query_processor.scoring_method)
+
+        inv_list = [(1, 3), (2, 3)]
+        self.assertGreater(tfidf_norm(inv_list, 3, 1), tfidf_norm(inv_list, 3, 2))
+        self.assertGreater(tfidf_norm(inv_list, 3, 1), tfidf(inv_list, 3, 1))
+        self.assertLess(tfidf_norm(inv_list, 3, 2), tfidf(inv_list, 3, 2))
+
+        if doc_lengths_file_path.exists():
+            doc_lengths_file_path.unlink()
+
+    def create_random_inverted_lists(self, num_lists:int, num_docs:int, seed:int) -> list:
+        random_generator = random.Random(seed)
+        inverted_lists = list()
+        for _ in range(num_lists):
+            doc_ids = sorted(random_generator.sample(range(1, num_docs), random_generator.randint(1, num_docs//2)))
+            inverted_lists.append(PostingList.from_tuples([(doc_id, random_generator.randint(1, 20)) for doc_id in doc_ids]))
+        
+        return inverted_lists
+
+    def test_max_score_same_ranking_as_daat(self):
+        self.query_processor.num_docs_in_index = 3000
+        for scoring_method in QueryProcessor.SCORING_METHODS:
+            self.query_processor.scoring_method = scoring_method
+            scoring_function = self.query_processor._get_scoring_function(scoring_method)
+            upper_bound_function = self.query_processor._get_upper_bound_function(scoring_method)
+
+            for seed in range(20):
+                inverted_lists = self.create_random_inverted_lists(seed % 4 + 1, 3000, seed)
+
+                exhaustive_ranking = DAATEvaluator(scoring_function).rank(inverted_lists)
+                max_score_ranking = MaxScoreEvaluator(scoring_function, upper_bound_function).rank(inverted_lists)
+
+                self.assertEqual(len(exhaustive_ranking), QueryProcessor.TOP_N_DOCS)
+                self.assertListEqual(exhaustive_ranking, max_score_ranking)
+
+    def test_block_max_wand_same_ranking_as_daat(self):
+        self.query_processor.num_docs_in_index = 3000
+        for scoring_method in QueryProcessor.SCORING_METHODS:
+            self.query_processor.scoring_method = scoring_method
+            scoring_function = self.query_processor._get_scoring_function(scoring_method)
+            upper_bound_function = self.query_processor._get_upper_bound_function(scoring_method)
+
+            for seed in range(20):
+                inverted_lists = self.create_random_inverted_lists(seed % 4 + 1, 3000, seed)
+
+                exhaustive_ranking = DAATEvaluator(scoring_function).rank(inverted_lists)
+                block_max_wand_ranking = BlockMaxWANDEvaluator(scoring_function, upper_bound_function).rank(inverted_lists)
+
+                self.assertEqual(len(exhaustive_ranking), QueryProcessor.TOP_N_DOCS)
+                self.assertListEqual(exhaustive_ranking, block_max_wand_ranking)
+
+    def test_pruning_with_missing_doc_lengths(self):
+        num_docs = 3000
+        self.query_processor.num_docs_in_index = num_docs
+        random_generator = random.Random(13)
+        doc_lengths = DocLengthTable()
+        for doc_id in range(1, num_docs):
+            if random_generator.random() < 0.7:
+                doc_lengths.add(doc_id, random_generator.randint(1, 500))
+        doc_lengths_file_path = pathlib.Path('queryProcessingClasses/queries/doc_lengths')
+        doc_lengths.save_to(doc_lengths_file_path)
+        self.remove_on_cleanup(doc_lengths_file_path)
+        self.query_processor.doc_lengths_file_path = doc_lengths_file_path
+
+        for scoring_method in ['TFIDF_NORM', 'BM25']:
+            self.query_processor.scoring_method = scoring_method
+            scoring_function = self.query_processor._get_scoring_function(scoring_method)
+            upper_bound_function = self.query_processor._get_upper_bound_function(scoring_method)
+            vectorized_scoring_function = self.query_processor._get_vectorized_scoring_function(scoring_method)
+
+            for seed in range(20):
+                inverted_lists = self.create_random_inverted_lists(seed % 4 + 1, num_docs, seed)
+
+                exhaustive_ranking = DAATEvaluator(scoring_function).rank(inverted_lists)
+                self.assertListEqual(exhaustive_ranking, 
+                                        MaxScoreEvaluator(scoring_function, upper_bound_function).rank(inverted_lists))
+                self.assertListEqual(exhaustive_ranking, 
+                                        BlockMaxWANDEvaluator(scoring_function, upper_bound_function).rank(inverted_lists))
+                taat_ranking = TAATEvaluator(vectorized_scoring_function).rank(inverted_lists)
+                self.assertListEqual([doc_id for _, doc_id in exhaustive_ranking], [doc_id for _, doc_id in taat_ranking])
+
+    def test_taat_same_ranking_as_daat(self):
+        self.query_processor.num_docs_in_index = 3000
+        for scoring_method in QueryProcessor.SCORING_METHODS:
+            self.query_processor.scoring_method = scoring_method
+            scoring_function = self.query_processor._get_scoring_function(scoring_method)
+            vectorized_scoring_function = self.query_processor._get_vectorized_scoring_function(scoring_method)
+
+            for seed in range(20):
+                inverted_lists = self.create_random_inverted_lists(seed % 4 + 1, 3000, seed)
+                if seed % 2 == 1:
+                    inverted_lists = [PostingList.from_tuples([(doc_id * 1000, frequency) for doc_id, frequency in inv_list]) 
+                                        for inv_list in inverted_lists]
+
+                exhaustive_ranking = DAATEvaluator(scoring_function).rank(inverted_lists)
+                taat_ranking = TAATEvaluator(vectorized_scoring_function).rank(inverted_lists)
+
+                self.assertListEqual(exhaustive_ranking, taat_ranking)
+
+    def test_saat_close_to_daat(self):
+        num_docs = 3000
+        self.query_processor.num_docs_in_index = num_docs
+        inverted_lists_by_token = {f'token{idx}': inv_list 
+                                    for idx, inv_list in enumerate(self.create_random_inverted_lists(4, num_docs, 7))}
+
+        binary_index_file_path = self.create_binary_index_file({token: inv_list.as_tuples() 
+                                                                    for token, inv_list in inverted_lists_by_token.items()})
+        self.remove_on_cleanup(binary_index_file_path.with_suffix('.impact'), binary_index_file_path.with_suffix('.impact.lexicon'))
+        self.query_processor.index_file_path = binary_index_file_path
+
+        queries_tokens = [['token0'], ['token1', 'token3'], ['token0', 'token1', 'token2', 'token3']]
+        for scoring_method in QueryProcessor.SCORING_METHODS:
+            self.query_processor.scoring_method = scoring_method
+            self.query_processor.write_impact_index()
+            scoring_function = self.query_processor._get_scoring_function(scoring_method)
+
+            for query_tokens in queries_tokens:
+                self.query_processor.evaluator = 'DAAT'
+                inverted_lists = self.query_processor._find_inverted_lists_of(query_tokens)
+                exhaustive_ranking = DAATEvaluator(scoring_function).rank(inverted_lists)
+                exact_scores = dict()
+                for inv_list in inverted_lists:
+                    for doc_id, frequency in inv_list:
+                        exact_scores[doc_id] = exact_scores.get(doc_id, 0) + scoring_function(inv_list, frequency, doc_id)
+                inverted_lists = None
+
+                self.query_processor.evaluator = 'SAAT'
+                impact_lists = self.query_processor._find_inverted_lists_of(query_tokens)
+                saat_ranking = self.query_processor._rank_docs_for_query(impact_lists)
+                impact_scale = self.query_processor._impact_index_reader.impact_scale
+
+                self.assertEqual(len(saat_ranking), QueryProcessor.TOP_N_DOCS)
+                for saat_score, doc_id in saat_ranking:
+                    self.assertGreaterEqual(saat_score + 1e-9, exact_scores[doc_id])
+                    self.assertGreater(exact_scores[doc_id], exhaustive_ranking[-1][0] - len(query_tokens) * impact_scale)
+
+                self.query_processor.postings_budget = sum(len(impact_list) for impact_list in impact_lists)
+                self.assertListEqual(self.query_processor._rank_docs_for_query(impact_lists), saat_ranking)
+                
+                self.query_processor.postings_budget = 1
+                budget_ranking = self.query_processor._rank_docs_for_query(impact_lists)
+                self.assertEqual(len(budget_ranking), 1)
+                self.assertEqual(budget_ranking[0][0], max(impact_list.impacts[0] for impact_list in impact_lists) * impact_scale)
+                self.query_processor.postings_budget = 0
+                impact_lists = None
+
+    def test_champion_lists_same_ranking_as_daat(self):
+        num_docs = 3000
+        self.query_processor.num_docs_in_index = num_docs
+        random_generator = random.Random(3)
+        index = dict()
+        for token_idx in range(6):
+            doc_ids = sorted(random_generator.sample(range(1, num_docs), random_generator.randint(100, 1500)))
+            index[f'token{token_idx}'] = [(doc_id, 1 if random_generator.random() < 0.97 else random_generator.randint(5, 30)) 
+                                            for doc_id in doc_ids]
+        index['token6'] = [(doc_id, random_generator.randint(1, 3)) for doc_id in range(1, 40)]
+
+        binary_index_file_path = self.create_binary_index_file(index)
+
+        index_merger = IndexMerger()
+        index_merger.merge_index_file = binary_index_file_path
+        index_merger.champion_list_size = 50
+        self.remove_on_cleanup(index_merger.champion_lists_file, index_merger.champion_lexicon_file)
+        champion_lexicon = Lexicon()
+        index_merger._save_champion_lists(index, champion_lexicon)
+        champion_lexicon.save_to_pickle(index_merger.champion_lexicon_file)
+        self.assertNotIn('token6', champion_lexicon)
+
+        self.query_processor.index_file_path = binary_index_file_path
+        self.assertEqual(self.query_processor.champion_lists_file_path, index_merger.champion_lists_file)
+        self.query_processor.evaluator = 'MAXSCORE'
+        num_answered_from_champion_lists = 0
+        for scoring_method in QueryProcessor.SCORING_METHODS:
+            self.query_processor.scoring_method = scoring_method
+            scoring_function = self.query_processor._get_scoring_function(scoring_method)
+            upper_bound_function = self.query_processor._get_upper_bound_function(scoring_method)
+
+            for seed in range(10):
+                query_tokens = sorted(random.Random(seed).sample(list(index), seed % 3 + 1))
+                inverted_lists = self.query_processor._find_inverted_lists_of(query_tokens)
+                champion_lists = self.query_processor._find_champion_lists_of(query_tokens)
+                exhaustive_ranking = DAATEvaluator(scoring_function).rank(inverted_lists)
+
+                champion_ranking = ChampionEvaluator(champion_lists, scoring_function, 
+                                                        upper_bound_function).rank(inverted_lists)
+                if champion_ranking != None:
+                    num_answered_from_champion_lists += 1
+                    self.assertListEqual(exhaustive_ranking, champion_ranking)
+
+                self.query_processor.use_champion_lists = True
+                inverted_lists_by_token = self.query_processor._find_inverted_lists_by_token(query_tokens)
+                self.assertListEqual(self.query_processor._rank_parsed_query(query_tokens, inverted_lists_by_token), 
+                                        exhaustive_ranking)
+                self.query_processor.use_champion_lists = False
+                inverted_lists = champion_lists = inverted_lists_by_token = None
+        
+        self.assertGreater(num_answered_from_champion_lists, 10)
+
+    def test_query_planner(self):
+        num_docs = 3000
+        self.query_processor.num_docs_in_index = num_docs
+        random_generator = random.Random(11)
+        words = ['Melhores', 'animes', 'Cruzeiro', 'Clube']
+        tokens = [list(TextParser.pre_proccess(word))[0] for word in words]
+        index = dict()
+        for token in tokens[:-1]:
+            doc_ids = sorted(random_generator.sample(range(1, num_docs), random_generator.randint(100, 400)))
+            index[token] = [(doc_id, random_generator.randint(1, 10)) for doc_id in doc_ids]
+        common_doc_ids = sorted(random_generator.sample(range(1, num_docs), 2900))
+        index[tokens[-1]] = [(doc_id, random_generator.randint(1, 3)) for doc_id in common_doc_ids]
+
+        binary_index_file_path = self.create_binary_index_file(index)
+
+        index_merger = IndexMerger()
+        index_merger.merge_index_file = binary_index_file_path
+        index_merger.champion_list_size = 200
+        self.remove_on_cleanup(index_merger.champion_lists_file, index_merger.champion_lexicon_file)
+        champion_lexicon = Lexicon()
+        index_merger._save_champion_lists(dict(sorted(index.items())), champion_lexicon)
+        champion_lexicon.save_to_pickle(index_merger.champion_lexicon_file)
+        self.query_processor.index_file_path = binary_index_file_path
+
+        query_tokens = sorted(tokens)
+        inverted_lists_by_token = self.query_processor._find_inverted_lists_by_token(query_tokens)
+        kept_tokens = sorted(tokens[:-1])
+        kept_doc_ids = set(doc_id for token in kept_tokens for doc_id in inverted_lists_by_token[token].doc_ids)
+        for scoring_method in QueryProcessor.SCORING_METHODS:
+            self.query_processor.scoring_method = scoring_method
+            scoring_function = self.query_processor._get_scoring_function(scoring_method)
+            self.query_processor.planner_tolerance = 0
+            exhaustive_ranking = self.query_processor._rank_parsed_query(query_tokens, inverted_lists_by_token)
+
+            self.query_processor.planner_tolerance = 0.05
+            query_plan = self.query_processor._plan_query(query_tokens, list(inverted_lists_by_token.values()))
+            self.assertListEqual(query_plan.tokens, kept_tokens)
+            self.assertListEqual(query_plan.demoted_inverted_lists, [inverted_lists_by_token[tokens[-1]]])
+            self.assertLess(query_plan.estimated_postings, sum(len(inv_list) for inv_list in inverted_lists_by_token.values()))
+
+            exact_scores = dict()
+            for inv_list in inverted_lists_by_token.values():
+                for doc_id, frequency in inv_list:
+                    if doc_id in kept_doc_ids:
+                        exact_scores[doc_id] = exact_scores.get(doc_id, 0) + scoring_function(inv_list, frequency, doc_id)
+            expected_ranking = sorted(((score, doc_id) for doc_id, score in exact_scores.items()), reverse=True)
+            for evaluator in ['DAAT', 'MAXSCORE', 'BMW', 'TAAT']:
+                self.query_processor.evaluator = evaluator
+                for use_champion_lists in [False, True]:
+                    self.query_processor.use_champion_lists = use_champion_lists
+                    demoted_ranking = self.query_processor._rank_parsed_query(query_tokens, inverted_lists_by_token)
+                    self.assertListEqual([doc_id for _, doc_id in demoted_ranking], 
+                                            [doc_id for _, doc_id in expected_ranking[:QueryProcessor.TOP_N_DOCS]])
+                    self.assertListEqual([doc_id for _, doc_id in demoted_ranking[:3]], 
+                                            [doc_id for _, doc_id in exhaustive_ranking[:3]])
+                self.query_processor.use_champion_lists = False
+
+                self.query_processor.planner_action = 'DROP'
+                dropped_ranking = self.query_processor._rank_parsed_query(query_tokens, inverted_lists_by_token)
+                self.assertListEqual(dropped_ranking, self.query_processor._rank_parsed_query(kept_tokens, inverted_lists_by_token))
+                self.query_processor.planner_action = 'DEMOTE'
+
+            champion_lists = self.query_processor._find_champion_lists_of(query_plan.tokens)
+            champion_ranking = ChampionEvaluator(champion_lists, scoring_function, 
+                                    self.query_processor._get_upper_bound_function(scoring_method), 
+                                    query_plan.demoted_inverted_lists).rank(query_plan.inverted_lists)
+            self.assertListEqual([doc_id for _, doc_id in champion_ranking], 
+                                    [doc_id for _, doc_id in expected_ranking[:QueryProcessor.TOP_N_DOCS]])
+            champion_lists = None
+
+            self.query_processor.planner_tolerance = 1
+            self.assertEqual(len(self.query_processor._plan_query(query_tokens, 
+                                    list(inverted_lists_by_token.values())).tokens), 1)
+        inverted_lists_by_token = None
+
+        self.query_processor.doc_id_to_url_file_path = self.create_doc_to_url_map_file(range(num_docs))
+        self.query_processor.collect_timings = True
+        self.query_processor.evaluator = 'DAAT'
+        self.query_processor.planner_tolerance = 0.05
+        timings = self.query_processor.process_query(' '.join(words))['Timings']
+        self.assertLess(timings['postings_touched'], timings['postings_read'])
+        self.assertGreaterEqual(timings['estimated_postings'], timings['postings_touched'])
+
+        with self.assertRaises(ValueError):
+            self.query_processor.planner_tolerance = 1.5
+        with self.assertRaises(ValueError):
+            self.query_processor.planner_action = 'SKIP'
+
+    def test_stream_postings_same_ranking(self):
+        num_docs = 60000
+        self.query_processor.num_docs_in_index = num_docs
+        random_generator = random.Random(3)
+        words = ['Melhores', 'animes', 'Cruzeiro']
+        tokens = [list(TextParser.pre_proccess(word))[0] for word in words]
+
+        index = dict()
+        for token in sorted(tokens):
+            doc_ids = sorted(random_generator.sample(range(1, num_docs), random_generator.randint(20000, 40000)))
+            index[token] = [(doc_id, random_generator.randint(1, 10)) for doc_id in doc_ids]
+        binary_index_file_path = self.create_binary_index_file(index)
+        self.query_processor.index_file_path = binary_index_file_path
+
+        query_tokens = sorted(tokens)
+        inverted_lists_by_token = self.query_processor._find_inverted_lists_by_token(query_tokens)
+        for evaluator in QueryProcessor.STREAMING_EVALUATORS:
+            self.query_processor.evaluator = evaluator
+            self.query_processor.stream_postings = False
+            ranking = self.query_processor._rank_parsed_query(query_tokens, inverted_lists_by_token)
+            self.query_processor.stream_postings = True
+            self.assertListEqual(self.query_processor._rank_parsed_query(query_tokens, inverted_lists_by_token), ranking)
+        self.assertTrue(self.query_processor.get_settings()['stream_postings'])
+        inverted_lists_by_token = None
+
+        with self.assertRaises(TypeError):
+            self.query_processor.stream_postings = 1
+
+    def test_shards_same_ranking_as_whole_index(self):
+        num_docs = 3000
+        self.query_processor.num_docs_in_index = num_docs
+        random_generator = random.Random(5)
+        words = ['Melhores', 'animes', 'Cruzeiro', 'Esporte', 'Clube', 'ficar', 'rico']
+        tokens = [list(TextParser.pre_proccess(word))[0] for word in words]
+        index = dict()
+        for token in tokens[:-1]:
+            doc_ids = sorted(random_generator.sample(range(1, num_docs), random_generator.randint(100, 1500)))
+            index[token] = [(doc_id, random_generator.randint(1, 10)) for doc_id in doc_ids]
+        index[tokens[-1]] = [(doc_id, random_generator.randint(1, 3)) for doc_id in range(1, 40)]
+
+        binary_index_file_path = self.create_binary_index_file(index)
+
+        index_sharder = IndexSharder()
+        index_sharder.index_file = binary_index_file_path
+        index_sharder.num_shards = 3
+        shard_files = index_sharder.split()
+        for shard_file in shard_files:
+            self.remove_on_cleanup(*[shard_file.with_suffix(suffix) for suffix in ['.bin', '.lexicon', '.bloom', '.manifest']])
+        self.remove_on_cleanup(index_sharder.shards_file)
+
+        self.query_processor.index_file_path = binary_index_file_path
+        self.assertEqual(self.query_processor.shards_file_path, index_sharder.shards_file)
+        queries_list = [' '.join(random.Random(seed).sample(words, seed % 3 + 1)) for seed in range(8)]
+        queries_list.append(words[-1])
+        for scoring_method in QueryProcessor.SCORING_METHODS:
+            self.query_processor.scoring_method = scoring_method
+            for evaluator in ['DAAT', 'MAXSCORE', 'TAAT']:
+                self.query_processor.evaluator = evaluator
+                self.query_processor.use_shards = False
+                whole_index_rankings = self.query_processor.rank_queries(queries_list)
+
+                self.query_processor.use_shards = True
+                parsed_queries = [self.query_processor._parse_query(query) for query in queries_list]
+                shards_rankings = self.query_processor._rank_in_shards(parsed_queries)
+                for whole_index_ranking, shards_ranking in zip(whole_index_rankings, shards_rankings):
+                    self.assertEqual(len(shards_ranking), QueryProcessor.TOP_N_DOCS)
+                    self.assertListEqual([doc_id for _, doc_id in whole_index_ranking], 
+                                            [doc_id for _, doc_id in shards_ranking])
+                    for (whole_index_score, _), (shard_score, _) in zip(whole_index_ranking, shards_ranking):
+                        self.assertAlmostEqual(whole_index_score, shard_score)
+
+        shards = self.query_processor._get_shards()
+        self.assertEqual(len(shards), 3)
+        self.assertIn(tokens[-1], shards[0].bloom_filter)
+        self.assertNotIn(tokens[-1], shards[1].bloom_filter)
+        self.assertNotIn(tokens[-1], shards[2].bloom_filter)
+
+        self.query_processor.doc_id_to_url_file_path = self.create_doc_to_url_map_file(range(num_docs))
+        self.query_processor.result_cache_size = 0
+
+        shards_results = self.query_processor.process_queries_in_batch(queries_list)
+        self.assertListEqual([self.query_processor.process_query(query) for query in queries_list], shards_results)
+        self.query_processor.use_shards = False
+        self.assertListEqual(self.query_processor.process_queries_in_batch(queries_list), shards_results)
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,147 @@
+from unittest import TestCase, main
+from queryProcessingClasses.queryProcess import QueryProcessor
+from queryProcessingClasses.query_server import QueryServer
+from parserClasses.myparser import TextParser
+from indexClasses.lexicon import Lexicon
+from indexClasses.binary_index import BinaryIndexWriter
+from indexClasses.doc_table import DocTableWriter
+from threading import Thread
+import pathlib
+import pickle
+import socket
+import json
+import time
+
+class TestQueryServer(TestCase):
+
+    def setUp(self):
+        self.test_dir = pathlib.Path('queryProcessingClasses/fake_server_index')
+        self.test_dir.mkdir(parents=True, exist_ok=True)
+
+        self.first_index_path = self.test_dir / 'index_0.bin'
+        self.create_index_file(self.first_index_path, {'Cruzeiro': [(1, 3), (2, 5)]})
+        self.second_index_path = self.test_dir / 'index_1.bin'
+        self.create_index_file(self.second_index_path, {'Cruzeiro': [(3, 7)]})
+
+        self.doc_id_to_url_path = self.test_dir / 'doc_to_url.map.pickle'
+        with open(self.doc_id_to_url_path, 'wb') as doc_id_to_url_file:
+            pickle.dump({(doc_id, f'url{doc_id}') for doc_id in range(5)}, doc_id_to_url_file)
+
+        query_processor = QueryProcessor()
+        query_processor.index_file_path = self.first_index_path
+        query_processor.doc_id_to_url_file_path = self.doc_id_to_url_path
+        self.query_server = QueryServer(query_processor)
+
+    def tearDown(self):
+        for file in self.test_dir.glob('*'):
+            file.unlink()
+
+    def create_index_file(self, index_file_path:pathlib.Path, postings_per_word:dict):
+        lexicon = Lexicon()
+        index_writer = BinaryIndexWriter()
+        with open(index_file_path, 'wb') as index_file:
+            for word, postings in postings_per_word.items():
+                token = list(TextParser.pre_proccess(word))[0]
+                postings_offset, postings_length = index_writer.write_postings(index_file, postings)
+                lexicon.add(token, postings_offset, postings_length, len(postings))
+        lexicon.save_to_pickle(index_file_path.with_suffix('.lexicon'))
+
+    def test_handle_query(self):
+        response = json.loads(self.query_server.handle_line(json.dumps({'query': 'Cruzeiro'})))
+        self.assertEqual(response['Generation'], 0)
+        self.assertListEqual([result['URL'] for result in response['Results']], ['url2', 'url1'])
+
+    def test_handle_invalid_request(self):
+        response = json.loads(self.query_server.handle_line('{"command": "unknown"}'))
+        self.assertTrue('Error' in response)
+
+        response = json.loads(self.query_server.handle_line('not json'))
+        self.assertTrue('Error' in response)
+
+    def test_swap_index(self):
+        _, old_query_processor = self.query_server.get_current()
+        old_query_processor.collect_timings = True
+        old_query_processor.doc_lengths_file_path = self.test_dir / 'doc_lengths'
+
+        with self.query_server.serving() as (generation, in_flight_query_processor):
+            self.assertEqual(generation, 0)
+            in_flight_query_processor.load()
+            old_index_reader = in_flight_query_processor._index_reader
+
+            swap_request = {'command': 'swap', 'index_path': str(self.second_index_path)}
+            response = json.loads(self.query_server.handle_line(json.dumps(swap_request)))
+            self.assertEqual(response['Generation'], 1)
+
+            response = json.loads(self.query_server.handle_line(json.dumps({'query': 'Cruzeiro'})))
+            self.assertEqual(response['Generation'], 1)
+            self.assertListEqual([result['URL'] for result in response['Results']], ['url3'])
+            self.assertTrue('Timings' in response)
+
+            in_flight_response = in_flight_query_processor.process_query('Cruzeiro')
+            self.assertListEqual([result['URL'] for result in in_flight_response['Results']], ['url2', 'url1'])
+            self.assertFalse(old_index_reader._file.closed)
+        
+        self.assertTrue(old_index_reader._file.closed)
+
+        _, new_query_processor = self.query_server.get_current()
+        self.assertEqual(new_query_processor.index_file_path, self.second_index_path)
+        self.assertEqual(new_query_processor.lexicon_file_path, self.second_index_path.with_suffix('.lexicon'))
+        self.assertEqual(new_query_processor.doc_lengths_file_path, self.second_index_path.with_suffix('.doc_lengths'))
+        self.assertEqual(new_query_processor.doc_id_to_url_file_path, self.doc_id_to_url_path)
+
+        swap_request = {'command': 'swap', 'index_path': str(self.first_index_path)}
+        json.loads(self.query_server.handle_line(json.dumps(swap_request)))
+        self.assertIsNone(new_query_processor._index_reader)
+        self.query_server.close()
+
+    def test_rebuild_and_swap_while_querying(self):
+        with DocTableWriter(self.first_index_path.with_suffix('.doc_table')) as doc_table_writer:
+            for doc_id in range(5):
+                doc_table_writer.add(doc_id, f'first/url{doc_id}')
+
+        with self.query_server.serving() as (_, in_flight_query_processor):
+            in_flight_query_processor.load()
+            self.assertListEqual([result['URL'] for result in in_flight_query_processor.process_query('Cruzeiro')['Results']],
+                                    ['first/url2', 'first/url1'])
+
+            with DocTableWriter(self.second_index_path.with_suffix('.doc_table')) as doc_table_writer:
+                for doc_id in range(5):
+                    doc_table_writer.add(doc_id, f'second/url{doc_id}')
+            self.query_server.swap_index(self.second_index_path)
+
+            response = self.query_server.handle_request({'query': 'Cruzeiro'})
+            self.assertListEqual([result['URL'] for result in response['Results']], ['second/url3'])
+
+            in_flight_response = in_flight_query_processor.process_query('Cruzeiro')
+            self.assertListEqual([result['URL'] for result in in_flight_response['Results']], ['first/url2', 'first/url1'])
+
+        _, new_query_processor = self.query_server.get_current()
+        self.assertEqual(new_query_processor.doc_table_file_path, self.second_index_path.with_suffix('.doc_table'))
+        self.query_server.close()
+
+    def test_serve_over_unix_socket(self):
+        socket_path = self.test_dir / 'server.sock'
+        server_thread = Thread(target=self.query_server.serve_forever, args=(str(socket_path),))
+        server_thread.start()
+        try:
+            while not socket_path.exists():
+                time.sleep(0.01)
+
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.connect(str(socket_path))
+                client_file = client.makefile('rw')
+                client_file.write(json.dumps({'query': 'Cruzeiro'}) + '\n')
+                client_file.write(json.dumps({'command': 'generation'}) + '\n')
+                client_file.flush()
+
+                query_response = json.loads(client_file.readline())
+                generation_response = json.loads(client_file.readline())
+        finally:
+            self.query_server.shutdown()
+            server_thread.join()
+
+        self.assertEqual(len(query_response['Results']), 2)
+        self.assertEqual(generation_response['Generation'], 0)
+
+if __name__ == '__main__':
+    main()
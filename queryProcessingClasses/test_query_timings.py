@@ -0,0 +1,52 @@
+from unittest import TestCase, main
+from queryProcessingClasses.query_timings import QueryTimings, TimingsSummary
+
+class TestQueryTimings(TestCase):
+
+    def test_stages_and_counters(self):
+        query_timings = QueryTimings()
+        with query_timings.stage('parse'):
+            pass
+        with query_timings.stage('score'):
+            pass
+        query_timings.add_postings_read(5)
+        query_timings.add_docs_scored(2)
+        query_timings.add_docs_scored(1)
+
+        timings = query_timings.as_dict()
+        self.assertCountEqual(timings.keys(), ['parse_ms', 'score_ms', 'postings_read', 'docs_scored'])
+        self.assertGreaterEqual(timings['parse_ms'], 0)
+        self.assertEqual(timings['postings_read'], 5)
+        self.assertEqual(timings['docs_scored'], 3)
+
+        with self.assertRaises(ValueError):
+            with query_timings.stage('index'):
+                pass
+
+    def test_planned_postings(self):
+        query_timings = QueryTimings()
+        self.assertNotIn('estimated_postings', query_timings.as_dict())
+
+        query_timings.add_estimated_postings(120)
+        query_timings.add_postings_touched(100)
+        query_timings.add_postings_touched(15)
+        timings = query_timings.as_dict()
+        self.assertEqual(timings['estimated_postings'], 120)
+        self.assertEqual(timings['postings_touched'], 115)
+
+    def test_percentiles(self):
+        self.assertListEqual(TimingsSummary.get_percentiles(list(range(100, 0, -1)), (50, 95, 99, 100)), [50, 95, 99, 100])
+        self.assertListEqual(TimingsSummary.get_percentiles([7], (50, 99)), [7, 7])
+
+    def test_summary_by_ranker(self):
+        timings_summary = TimingsSummary()
+        timings_summary.add_results('BM25/DAAT', [{'Query': 'a', 'Timings': {'score_ms': score_ms}} 
+                                                    for score_ms in range(1, 21)])
+        timings_summary.add_results('TFIDF/DAAT', [{'Query': 'a', 'Timings': {'score_ms': 3}}, {'Query': 'b'}])
+
+        summary = timings_summary.get_summary()
+        self.assertDictEqual(summary['BM25/DAAT']['score_ms'], {'p50': 10, 'p95': 19, 'p99': 20, 'count': 20})
+        self.assertDictEqual(summary['TFIDF/DAAT']['score_ms'], {'p50': 3, 'p95': 3, 'p99': 3, 'count': 1})
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+from unittest import TestCase, main
+from queryProcessingClasses.scorer import Scorer
+from indexClasses.binary_index import PostingList
+from indexClasses.doc_lengths import DocLengthTable
+import numpy as np
+
+class TestScorer(TestCase):
+
+    def setUp(self):
+        self.doc_lengths = DocLengthTable()
+        self.doc_lengths.add(1, 10)
+        self.doc_lengths.add(2, 100)
+        self.inv_list = PostingList.from_tuples([(1, 3), (2, 3), (5, 1)])
+
+    def test_upper_bound_holds(self):
+        for scoring_method in Scorer.SCORING_METHODS:
+            scorer = Scorer(1000, self.doc_lengths)
+            scoring_function = scorer.get_scoring_function(scoring_method)
+            upper_bound = scorer.get_upper_bound_function(scoring_method)(self.inv_list, self.inv_list.max_frequency)
+            for doc_id, doc_freq in self.inv_list.as_tuples():
+                self.assertLessEqual(scoring_function(self.inv_list, doc_freq, doc_id), upper_bound)
+
+    def test_vectorized_same_scores(self):
+        for scoring_method in Scorer.SCORING_METHODS:
+            scorer = Scorer(1000, self.doc_lengths)
+            scoring_function = scorer.get_scoring_function(scoring_method)
+            vectorized_scoring_function = scorer.get_vectorized_scoring_function(scoring_method)
+
+            scores = vectorized_scoring_function(self.inv_list, np.asarray(self.inv_list.frequencies),
+                                                    np.asarray(self.inv_list.doc_ids))
+            expected_scores = [scoring_function(self.inv_list, doc_freq, doc_id)
+                                for doc_id, doc_freq in self.inv_list.as_tuples()]
+            self.assertListEqual(list(np.round(scores, 9)), list(np.round(expected_scores, 9)))
+
+    def test_without_doc_lengths(self):
+        bm25 = Scorer(1000).get_scoring_function('BM25')
+        self.assertEqual(bm25(self.inv_list, 3, 1), bm25(self.inv_list, 3, 2))
+
+        bm25 = Scorer(1000, self.doc_lengths).get_scoring_function('BM25')
+        self.assertGreater(bm25(self.inv_list, 3, 1), bm25(self.inv_list, 3, 2))
+        self.assertEqual(bm25(self.inv_list, 1, 5), Scorer(1000).get_scoring_function('BM25')(self.inv_list, 1, 5))
+
+if __name__ == '__main__':
+    main()